@@ -1,17 +1,29 @@
 import os
+import re
+import time
 import logging
-import threading
 import datetime
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
-from src.config import SLACK_BOT_TOKEN, SLACK_APP_TOKEN, SLACK_CHANNEL_ID
+from src.config import (SLACK_BOT_TOKEN, SLACK_APP_TOKEN, SLACK_CHANNEL_ID,
+                        REPORT_JOB_WORKERS, REPORT_JOB_QUEUE_SIZE, REPORT_JOB_ESTIMATED_SECONDS,
+                        CHECKPOINT_RESUME_WINDOW_MINUTES, PRECOMPUTE_SCHEDULE, PRECOMPUTE_TIMEZONE,
+                        PRECOMPUTE_FRESHNESS_MINUTES, POLLER_ENABLED, POLLER_NEWS_INTERVAL_SECONDS,
+                        POLLER_QUOTE_INTERVAL_SECONDS, POLLER_NEWS_DAILY_QUOTA, POLLER_WINDOW_MINUTES)
 from src.utils.logger import ExecutionLogger
 from src.collectors.stock_collector import StockDataCollector
 from src.collectors.news_collector import NewsDataCollector
+from src.collectors.market_poller import MarketPoller
 from src.services.llm_service import LLMService
+from src.services.article_store import get_article_store
 from src.generators.report_generator import ReportGenerator
 from src.generators.video_generator import VideoGenerator
 from src.managers.file_manager import FileManager
+from src.managers.job_manager import Job, JobManager
+from src.managers.scheduler import PrecomputeScheduler, WarmArtifacts, parse_schedule
+from src.utils.stage_graph import StageGraph, StageAborted
+from src.utils.slack_progress import SlackProgressMessage
+from src.utils.checkpoint import CheckpointStore, CHECKPOINT_DIR_NAME, claim_new_run, find_resumable_run
 
 # Initialize Logging
 logging.basicConfig(level=logging.INFO)
@@ -20,98 +32,203 @@ logger = logging.getLogger(__name__)
 # Initialize Slack App
 app = App(token=SLACK_BOT_TOKEN)
 
-def run_report_generation(say, thread_ts):
+def run_report_generation(say, thread_ts, job: Job = None, resume_run: str = None):
     """
     Orchestrates the full report generation pipeline.
+    When run as a job, status messages, results and reactions go to every thread
+    subscribed to it; live section progress stays in the originating thread.
+    Stage outputs are checkpointed under the run's output directory; `resume_run`
+    (a run directory name) reuses the checkpoints of an unfinished run.
+    A `thread_ts` of None is a background (scheduled) run: nothing is posted to Slack
+    except for mentions that attach to it.
     """
+    job = job or Job("report", say, thread_ts)
     execution_logger = ExecutionLogger()
     execution_logger.log("Starting V7.2 News Report System...")
     
     try:
         # 1. Initialize Components
         stock_collector = StockDataCollector()
-        news_collector = NewsDataCollector()
         llm_service = LLMService()
-        report_generator = ReportGenerator(llm_service, execution_logger)
+        article_store = get_article_store()
+        news_collector = NewsDataCollector(llm_service, article_store=article_store)
+        report_generator = ReportGenerator(llm_service, execution_logger, article_store=article_store)
         video_generator = VideoGenerator(llm_service, execution_logger)
         file_manager = FileManager(execution_logger)
 
-        # 2. Data Collection
-        say(text="⏳ 株価データを取得中...", thread_ts=thread_ts)
-        stock_data = stock_collector.fetch_stock_prices()
-        execution_logger.log(f"Stock data fetched: {list(stock_data.keys())}")
-        
-        say(text="⏳ ニュースデータを収集中 (Reuters, Bloomberg, WSJ)...", thread_ts=thread_ts)
-        news_items = news_collector.fetch_news()
-        execution_logger.log(f"News items fetched: {len(news_items)}")
-        
-        if not news_items:
-            say(text="⚠️ ニュースが見つかりませんでした。処理を中止します。", thread_ts=thread_ts)
-            return
-
-        # 3. Report Generation
-        say(text="⏳ レポートと深堀り分析を生成中...", thread_ts=thread_ts)
-        report_md = report_generator.generate_report(stock_data, news_items)
-        
-        # 4. Video Content Generation
-        say(text="⏳ 動画用台本と字幕を生成中 (タイツ風)...", thread_ts=thread_ts)
-        script_txt = video_generator.generate_script(news_items)
-        subtitles_txt = video_generator.generate_subtitles(script_txt)
-
-        # 5. Save Files
-        say(text="⏳ ファイルを保存・アップロード中...", thread_ts=thread_ts)
-        saved_files = []
-        
         # Generate timestamp for naming: YYYYMMDD_H:mm
         # Note: H:mm might be tricky on Windows but OK on Mac/Linux.
         now = datetime.datetime.fromtimestamp(execution_logger.start_time)
-        timestamp_str = now.strftime("%Y%m%d_%H:%M")
-        
-        # Save Markdown Report
-        report_filename = f"{timestamp_str}_report.md"
-        report_path = file_manager.save_to_local(report_md, report_filename, sub_dir=timestamp_str)
-        saved_files.append(report_path)
-        
-        # Save Script
-        script_filename = f"{timestamp_str}_script.txt"
-        script_path = file_manager.save_to_local(script_txt, script_filename, sub_dir=timestamp_str)
-        saved_files.append(script_path)
-        
-        # Save Subtitles
-        subtitles_filename = f"{timestamp_str}_subtitles.txt"
-        subtitles_path = file_manager.save_to_local(subtitles_txt, subtitles_filename, sub_dir=timestamp_str)
-        saved_files.append(subtitles_path)
-        
-        # Save Execution Log
-        execution_logger.save()
-        log_filename = f"{timestamp_str}_log.txt"
-        log_path = file_manager.save_to_local(execution_logger.get_logs(), log_filename, sub_dir=timestamp_str)
-        saved_files.append(log_path)
-
-        # 6. Upload to Drive
-        for path in saved_files:
-            file_manager.upload_to_drive(path)
-
-        # 7. Upload to Slack
-        file_manager.upload_to_slack(saved_files, SLACK_CHANNEL_ID, thread_ts)
-
-        # 8. Finish
-        say(text="✅ レポート生成が完了しました！", thread_ts=thread_ts)
-        app.client.reactions_add(
-            channel=SLACK_CHANNEL_ID,
-            name="white_check_mark",
-            timestamp=thread_ts
-        )
+        def checkpoint_path(run_name):
+            return file_manager.local_path(CHECKPOINT_DIR_NAME, sub_dir=run_name)
+
+        if resume_run:
+            timestamp_str, checkpoint_dir = resume_run, checkpoint_path(resume_run)
+        else:
+            # A new run never picks up checkpoints of another run started in the same minute
+            timestamp_str, checkpoint_dir = claim_new_run(checkpoint_path, now.strftime("%Y%m%d_%H:%M"))
+        job.run_name = timestamp_str
+        checkpoints = CheckpointStore(checkpoint_dir)
+        if resume_run:
+            execution_logger.log(f"Resuming run {resume_run} from its checkpoints")
+            job.say(f"♻️ 前回の実行 ({resume_run}) を完了済みの段階から再開します")
+
+        def checkpointed(name, compute):
+            return checkpoints.get_or_compute(name, compute, on_reuse=lambda n: execution_logger.log(f"Resumed from checkpoint: {n}"))
+
+        # 2. Stage functions (dependencies are passed in by name)
+        def fetch_stocks():
+            # The background poller's latest quotes when fresh, otherwise fetched on demand
+            stock_data = checkpointed("stocks", lambda: (market_poller and market_poller.get_quotes())
+                                      or stock_collector.fetch_stock_prices())
+            execution_logger.log(f"Stock data fetched: {list(stock_data.keys())}")
+            return stock_data
+
+        def fetch_news():
+            # Ranked candidates only; enrichment streams into the report stage
+            # The poller's hot window is already ranked and mostly enriched
+            news_items = checkpointed("news", lambda: (market_poller and market_poller.get_news())
+                                      or news_collector.fetch_candidates())
+            execution_logger.log(f"News items fetched: {len(news_items)}")
+            if not news_items:
+                raise StageAborted("⚠️ ニュースが見つかりませんでした。処理を中止します。")
+            return news_items
+
+        def start_enrichment(news):
+            # Enrichment starts now; the report's deep dives consume articles as they finish
+            if checkpoints.has("report"):
+                return iter(())
+            enriched = news_collector.iter_enriched(news)
+            if article_store:
+                stats = news_collector.enrichment_stats
+                execution_logger.log(f"Article enrichment: {stats['reused']} reused from the article store, {stats['enriched']} enriched")
+            return enriched
+
+        def generate_report(stocks, news, enrichment):
+            report = checkpoints.load("report")
+            if report is not None:
+                execution_logger.log("Resumed from checkpoint: report")
+                return report
+            # Sections land in the local report file and in one progress message as they complete
+            progress = None
+            if thread_ts:
+                progress = SlackProgressMessage(app.client, SLACK_CHANNEL_ID, thread_ts, "📝 レポート生成の進捗")
+                progress.start()
+            report_path = file_manager.local_path(f"{timestamp_str}_report.md", sub_dir=timestamp_str)
+            try:
+                return checkpointed("report", lambda: report_generator.generate_report(
+                    stocks, news, output_path=report_path, progress=progress, enriched_news=enrichment, checkpoints=checkpoints))
+            finally:
+                if progress:
+                    progress.finish()
+
+        def generate_script(news):
+            return checkpointed("script", lambda: video_generator.generate_script(news))
+
+        def generate_subtitles(script):
+            return checkpointed("subtitles", lambda: video_generator.generate_subtitles(script))
+
+        def save_files(report, script, subtitles):
+            # Save Execution Log
+            cache_stats = llm_service.get_cache_stats()
+            execution_logger.log(f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+            hedge_stats = llm_service.get_hedge_stats()
+            execution_logger.log(f"LLM hedged requests: {hedge_stats['sent']} sent / {hedge_stats['won']} won by the backup")
+            scheduler_stats = llm_service.get_scheduler_stats()
+            execution_logger.log(
+                f"LLM scheduler: {scheduler_stats['queued']}/{scheduler_stats['calls']} calls queued, "
+                f"total wait {scheduler_stats['total_wait']}s, max wait {scheduler_stats['max_wait']}s, "
+                f"max queue depth {scheduler_stats['max_queue_depth']}"
+            )
+            token_stats = llm_service.get_token_stats()
+            execution_logger.log(
+                f"LLM tokens: {token_stats['input']} input ({token_stats['cached']} served from provider prompt caches) "
+                f"/ {token_stats['output']} output"
+            )
+            for task, stats in sorted(llm_service.get_task_stats().items()):
+                execution_logger.log(
+                    f"LLM task {task}: {stats['calls']} calls (avg {stats['avg_latency']}s), {stats['cache_hits']} cache hits, "
+                    f"{stats['input_tokens']} input / {stats['output_tokens']} output tokens"
+                )
+            execution_logger.save()
+
+            artifacts = [
+                {"filename": f"{timestamp_str}_report.md", "content": report},
+                {"filename": f"{timestamp_str}_script.txt", "content": script},
+                {"filename": f"{timestamp_str}_subtitles.txt", "content": subtitles},
+                {"filename": f"{timestamp_str}_log.txt", "content": execution_logger.get_logs()},
+            ]
+            # Local copies are kept as an archive; uploads use the in-memory content
+            for artifact in artifacts:
+                artifact["path"] = file_manager.save_to_local(artifact["content"], artifact["filename"], sub_dir=timestamp_str)
+            return artifacts
+
+        def upload_files(save):
+            # Slack (one multi-file request per thread) and Drive (concurrent) run in parallel.
+            # Mentions arriving from here on start a new run instead of attaching.
+            threads = [ts for ts in job.close() if ts]
+            if threads:
+                file_manager.upload_artifacts(save, SLACK_CHANNEL_ID, threads[0], extra_thread_ts=threads[1:])
+            else:
+                file_manager.upload_many_to_drive(save)
+            checkpoints.mark_complete()
+            warm_artifacts.update(save, timestamp_str)
+
+        # 3. Dependency graph: stocks and news are fetched in parallel, and the
+        # script/subtitles only need the news so they overlap report generation.
+        # Article enrichment runs in the background and feeds the deep dives in order.
+        graph = StageGraph(on_message=job.say)
+        graph.add_stage("stocks", fetch_stocks,
+                        start_message="⏳ 株価データを取得中...",
+                        done_message="✔️ 株価データの取得が完了しました")
+        graph.add_stage("news", fetch_news,
+                        start_message="⏳ ニュースデータを収集中 (Reuters, Bloomberg, WSJ)...",
+                        done_message="✔️ ニュースデータの収集が完了しました")
+        graph.add_stage("enrichment", start_enrichment, depends_on=["news"])
+        graph.add_stage("report", generate_report, depends_on=["stocks", "news", "enrichment"],
+                        start_message="⏳ レポートと深堀り分析を生成中...",
+                        done_message="✔️ レポートの生成が完了しました")
+        graph.add_stage("script", generate_script, depends_on=["news"],
+                        start_message="⏳ 動画用台本を生成中 (タイツ風)...",
+                        done_message="✔️ 動画用台本の生成が完了しました")
+        graph.add_stage("subtitles", generate_subtitles, depends_on=["script"],
+                        start_message="⏳ 動画用字幕を生成中...",
+                        done_message="✔️ 動画用字幕の生成が完了しました")
+        graph.add_stage("save", save_files, depends_on=["report", "script", "subtitles"],
+                        start_message="⏳ ファイルを保存・アップロード中...")
+        graph.add_stage("upload", upload_files, depends_on=["save"])
+
+        try:
+            graph.run()
+        except StageAborted as e:
+            # A clean stop (e.g. no news) is final; only crashes leave a run resumable
+            checkpoints.mark_complete()
+            job.say(str(e))
+            return
+
+        # 4. Finish
+        job.say("✅ レポート生成が完了しました！")
+        for ts in filter(None, job.thread_timestamps):
+            app.client.reactions_add(
+                channel=SLACK_CHANNEL_ID,
+                name="white_check_mark",
+                timestamp=ts
+            )
 
     except Exception as e:
-        error_msg = f"❌ エラーが発生しました: {str(e)}"
+        error_msg = f"❌ エラーが発生しました: {str(e)}\n「retry」とメンションすると、完了済みの段階から再開します。"
         logger.error(error_msg)
-        say(text=error_msg, thread_ts=thread_ts)
-        app.client.reactions_add(
-            channel=SLACK_CHANNEL_ID,
-            name="x",
-            timestamp=thread_ts
-        )
+        job.close()
+        job.say(error_msg)
+        for ts in filter(None, job.thread_timestamps):
+            try:
+                app.client.reactions_add(
+                    channel=SLACK_CHANNEL_ID,
+                    name="x",
+                    timestamp=ts
+                )
+            except Exception as reaction_error:
+                logger.warning(f"Failed to add reaction: {reaction_error}")
         # Try to save log even if failed
         try:
             execution_logger.log(f"Critical Failure: {e}", level="ERROR")
@@ -119,6 +236,52 @@ def run_report_generation(say, thread_ts):
         except:
             pass
 
+# Artifacts of the latest completed run (scheduled or mention-triggered)
+warm_artifacts = WarmArtifacts()
+
+# Background news/quote poller, started in __main__ when POLLER_ENABLED
+market_poller = None
+
+job_manager = JobManager(
+    lambda job: run_report_generation(*job.subscribers[0], job=job, **job.options),
+    max_workers=REPORT_JOB_WORKERS,
+    max_queue=REPORT_JOB_QUEUE_SIZE,
+    estimated_duration=REPORT_JOB_ESTIMATED_SECONDS
+)
+
+RETRY_PATTERN = re.compile(r"\b(retry|resume)\b|再開|再試行", re.IGNORECASE)
+FRESH_PATTERN = re.compile(r"\b(fresh|force)\b|最新|再生成", re.IGNORECASE)
+
+def precompute_report():
+    """
+    Scheduled run with no Slack thread of its own; mentions during it attach as usual.
+    """
+    status = job_manager.submit("report", lambda text, thread_ts=None: logger.info(f"[precompute] {text}"), None)
+    logger.info(f"Precompute run {status['status']}")
+
+def send_warm_artifacts(warm, say, thread_ts):
+    age_minutes = int((time.time() - warm["created_at"]) // 60)
+    say(text=f"⚡ {age_minutes}分前に生成済みのレポート ({warm['run_name']}) を送信します。"
+             f"最新の内容で作り直す場合は「fresh」を付けてメンションしてください。", thread_ts=thread_ts)
+    file_manager = FileManager(ExecutionLogger())
+    file_manager.upload_to_slack(warm["artifacts"], SLACK_CHANNEL_ID, thread_ts)
+    app.client.reactions_add(channel=SLACK_CHANNEL_ID, name="white_check_mark", timestamp=thread_ts)
+
+def format_job_status(status) -> str:
+    """
+    Reply to a mention for a JobManager.submit status.
+    """
+    minutes = max(1, round(status["eta_seconds"] / 60))
+    if status["status"] == "started":
+        return f"🚀 ニュースレポート生成を開始します...（完了見込み: 約{minutes}分後）"
+    if status["status"] == "queued":
+        return f"⏳ 他のレポートを生成中のため、待ち行列に追加しました（{status['position']}番目、完了見込み: 約{minutes}分後）"
+    if status["status"] == "attached":
+        if status["position"]:
+            return f"🔗 待機中のレポート生成に合流しました（{status['position']}番目、完了見込み: 約{minutes}分後）。結果はこのスレッドにも送信します。"
+        return f"🔗 実行中のレポート生成に合流しました（完了見込み: 約{minutes}分後）。結果はこのスレッドにも送信します。"
+    return f"⚠️ 現在混雑しているため受け付けできませんでした。約{minutes}分後に再度お試しください。"
+
 @app.event("app_mention")
 def handle_mention(event, say):
     """
@@ -142,15 +305,43 @@ def handle_mention(event, say):
     except Exception as e:
         logger.warning(f"Failed to add reaction: {e}")
 
-    say(text="🚀 ニュースレポート生成を開始します...", thread_ts=thread_ts)
+    # "retry" resumes the latest unfinished run; "fresh" always generates a new report.
+    # A plain mention gets the latest report while it is fresh, resumes a run that
+    # failed recently, and otherwise starts a new run.
+    text = event.get("text", "")
+    if RETRY_PATTERN.search(text):
+        resume_run = find_resumable_run("output", exclude=job_manager.active_run_names())
+        if not resume_run:
+            say(text="再開できる未完了の実行が見つからないため、新しく生成します。", thread_ts=thread_ts)
+    elif FRESH_PATTERN.search(text):
+        resume_run = None
+    else:
+        warm = warm_artifacts.get_fresh(PRECOMPUTE_FRESHNESS_MINUTES * 60)
+        if warm:
+            try:
+                send_warm_artifacts(warm, say, thread_ts)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to send precomputed report, generating a new one: {e}")
+        # Runs still in flight (e.g. uploading after their job closed) are not resumable
+        resume_run = find_resumable_run("output", max_age_seconds=CHECKPOINT_RESUME_WINDOW_MINUTES * 60,
+                                        exclude=job_manager.active_run_names())
 
-    # Run in a separate thread to prevent timeout
-    thread = threading.Thread(target=run_report_generation, args=(say, thread_ts))
-    thread.start()
+    # Runs on the job manager's worker pool; a mention during a run joins that run
+    status = job_manager.submit("report", say, thread_ts, options={"resume_run": resume_run})
+    say(text=format_job_status(status), thread_ts=thread_ts)
 
 if __name__ == "__main__":
     if not SLACK_APP_TOKEN:
         print("SLACK_APP_TOKEN is missing.")
     else:
+        if PRECOMPUTE_SCHEDULE:
+            PrecomputeScheduler(parse_schedule(PRECOMPUTE_SCHEDULE, PRECOMPUTE_TIMEZONE), precompute_report).start()
+        if POLLER_ENABLED:
+            market_poller = MarketPoller(
+                NewsDataCollector(LLMService(), article_store=get_article_store()), StockDataCollector(),
+                news_interval=POLLER_NEWS_INTERVAL_SECONDS, quote_interval=POLLER_QUOTE_INTERVAL_SECONDS,
+                daily_news_quota=POLLER_NEWS_DAILY_QUOTA, window_seconds=POLLER_WINDOW_MINUTES * 60)
+            market_poller.start()
         handler = SocketModeHandler(app, SLACK_APP_TOKEN)
         handler.start()
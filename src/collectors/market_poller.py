@@ -0,0 +1,193 @@
+import copy
+import time
+import logging
+import datetime
+import threading
+from typing import Any, Dict, List, Optional
+from src.config import NEWS_TOP_N, NEWS_NEAR_DUPLICATE_THRESHOLD, SEARCH_CACHE_TTL_SECONDS
+from src.services.near_duplicates import cluster_near_duplicates
+from src.services.article_store import ENRICHMENT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+class MarketPoller:
+    """
+    Background poller that keeps a rolling "hot window" of news and the latest quotes,
+    so report runs read them with no collection latency.
+
+    News: every `news_interval` seconds the collector's candidates (filtered, deduplicated,
+    ranked, clustered) are merged into the window by URL; articles not seen in any poll
+    for `window_seconds` drop out. The merged window is re-ranked and re-clustered, and
+    its top NEWS_TOP_N are enriched in the background. Enrichment of unchanged articles
+    is kept until its search context is older than SEARCH_CACHE_TTL_SECONDS.
+    NewsAPI calls are capped at `daily_news_quota` per UTC day.
+
+    Quotes: refreshed every `quote_interval` seconds.
+
+    Readers get copies, and only while the last successful poll is younger than
+    `max_staleness` seconds; otherwise they should collect on demand.
+    """
+    def __init__(self, news_collector, stock_collector, news_interval: float = 900, quote_interval: float = 300,
+                 daily_news_quota: int = 90, window_seconds: float = 7200, max_staleness: Optional[float] = None):
+        self.news_collector = news_collector
+        self.stock_collector = stock_collector
+        self.news_interval = news_interval
+        self.quote_interval = quote_interval
+        self.daily_news_quota = daily_news_quota
+        self.window_seconds = window_seconds
+        self.max_staleness = max_staleness if max_staleness is not None else 2 * max(news_interval, quote_interval)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # url -> {"article": dict, "last_seen": epoch seconds, "context_at": when its search context was fetched}
+        self._window: Dict[str, Dict[str, Any]] = {}
+        self._news: Optional[List[Dict[str, Any]]] = None
+        self._news_at: Optional[float] = None
+        self._quotes: Optional[Dict[str, Any]] = None
+        self._quotes_at: Optional[float] = None
+        self._quota_day: Optional[datetime.date] = None
+        self._news_calls_today = 0
+
+    # --- Readers ---
+
+    def _fresh(self, polled_at: Optional[float]) -> bool:
+        return polled_at is not None and time.time() - polled_at <= self.max_staleness
+
+    def get_news(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Ranked candidates with the top NEWS_TOP_N enriched, or None if the window is stale or empty.
+        """
+        with self._lock:
+            if not self._news or not self._fresh(self._news_at):
+                return None
+            return copy.deepcopy(self._news)
+
+    def get_quotes(self) -> Optional[Dict[str, Any]]:
+        """
+        The latest quotes, or None if they are stale or missing.
+        """
+        with self._lock:
+            if not self._quotes or not self._fresh(self._quotes_at):
+                return None
+            return copy.deepcopy(self._quotes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window_size": len(self._window),
+                "news_calls_today": self._news_calls_today,
+                "news_age": round(time.time() - self._news_at) if self._news_at else None,
+                "quotes_age": round(time.time() - self._quotes_at) if self._quotes_at else None,
+            }
+
+    # --- Polling ---
+
+    def _take_news_quota(self) -> bool:
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        with self._lock:
+            if self._quota_day != today:
+                self._quota_day = today
+                self._news_calls_today = 0
+            if self._news_calls_today >= self.daily_news_quota:
+                return False
+            self._news_calls_today += 1
+            return True
+
+    def poll_news(self) -> bool:
+        """
+        One news poll. Returns False when skipped (quota) or failed.
+        """
+        if not self._take_news_quota():
+            logger.warning(f"NewsAPI poll skipped: daily quota of {self.daily_news_quota} calls used")
+            return False
+        try:
+            candidates = self.news_collector.fetch_candidates()
+        except Exception as e:
+            logger.error(f"News poll failed: {e}")
+            return False
+
+        now = time.time()
+        with self._lock:
+            for article in candidates:
+                previous = self._window.get(article['url'])
+                context_at = previous.get("context_at") if previous else None
+                # Keep the enrichment of an unchanged article from an earlier poll while its search is fresh
+                if context_at is not None and now - context_at <= SEARCH_CACHE_TTL_SECONDS \
+                        and all(previous["article"].get(k) == article.get(k) for k in ("title", "description", "content")):
+                    # Score and related sources come from this poll
+                    kept = {k: v for k, v in previous["article"].items() if k != 'related_sources'}
+                    article = dict(kept, **{k: article[k] for k in ('relevance_score', 'related_sources') if k in article})
+                else:
+                    context_at = None
+                self._window[article['url']] = {"article": article, "last_seen": now, "context_at": context_at}
+            for url in [url for url, entry in self._window.items() if now - entry["last_seen"] > self.window_seconds]:
+                del self._window[url]
+            # Articles not in this poll can still hold search context past its TTL: enrich them again
+            for entry in self._window.values():
+                if entry["context_at"] is not None and now - entry["context_at"] > SEARCH_CACHE_TTL_SECONDS:
+                    entry["article"] = {k: v for k, v in entry["article"].items() if k not in ENRICHMENT_FIELDS}
+                    entry["context_at"] = None
+            # Work on copies: readers may be deep-copying the current snapshot meanwhile
+            merged = [copy.deepcopy(entry["article"]) for entry in self._window.values()]
+
+        # Re-rank and re-cluster the whole window (stable: newer polls first among ties)
+        merged.sort(key=lambda a: a.get('relevance_score') or 0, reverse=True)
+        merged = cluster_near_duplicates(merged, threshold=NEWS_NEAR_DUPLICATE_THRESHOLD)
+        try:
+            enriched = list(self.news_collector.iter_enriched(merged))
+        except Exception as e:
+            logger.error(f"News pre-enrichment failed: {e}")
+            return False
+        news = enriched + merged[NEWS_TOP_N:]
+
+        enriched_at = time.time()
+        with self._lock:
+            for article in news:
+                entry = self._window.get(article['url'])
+                if entry is None:
+                    continue
+                entry["article"] = article
+                if entry["context_at"] is None and article.get('search_context') is not None:
+                    # A search served from the cache is as old as the cached results
+                    entry["context_at"] = article.get('search_context_cached_at') or enriched_at
+            self._news = news
+            self._news_at = time.time()
+        logger.info(f"News window updated: {len(news)} articles ({len(candidates)} from this poll)")
+        return True
+
+    def poll_quotes(self) -> bool:
+        try:
+            quotes = self.stock_collector.fetch_stock_prices()
+        except Exception as e:
+            logger.error(f"Quote poll failed: {e}")
+            return False
+        if not quotes:
+            return False
+        with self._lock:
+            self._quotes = quotes
+            self._quotes_at = time.time()
+        return True
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._loop, name="market-poller", daemon=True)
+        self._thread.start()
+        logger.info(f"Market poller started (news every {self.news_interval}s, quotes every {self.quote_interval}s, "
+                    f"NewsAPI quota {self.daily_news_quota}/day)")
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        next_news = next_quotes = time.time()
+        while not self._stop.is_set():
+            now = time.time()
+            if now >= next_quotes:
+                self.poll_quotes()
+                next_quotes = now + self.quote_interval
+            if now >= next_news:
+                self.poll_news()
+                next_news = now + self.news_interval
+            self._stop.wait(max(0.0, min(next_news, next_quotes) - time.time()))
@@ -1,21 +1,31 @@
 from newsapi import NewsApiClient
 import logging
-from typing import List, Dict, Any
-from src.config import NEWSAPI_KEY, ALLOWED_NEWS_SOURCES
+import threading
+from concurrent.futures import Future
+from typing import Iterator, List, Dict, Any, Optional
+from src.config import (NEWSAPI_KEY, ALLOWED_NEWS_SOURCES, NEWS_TOP_N, RELEVANCE_MIN_SCORE,
+                        NEWS_FETCH_PAGE_SIZE, NEWS_NEAR_DUPLICATE_THRESHOLD)
+from src.services.relevance_scorer import get_relevance_scorer
+from src.services.near_duplicates import cluster_near_duplicates
 
 logger = logging.getLogger(__name__)
 
 class NewsDataCollector:
-    def __init__(self):
+    def __init__(self, llm_service=None, article_store=None):
         if not NEWSAPI_KEY:
             raise ValueError("NEWSAPI_KEY is not set in environment variables.")
         self.newsapi = NewsApiClient(api_key=NEWSAPI_KEY)
         self.sources_str = ",".join(ALLOWED_NEWS_SOURCES)
+        # Shared with the rest of the run when provided (ticker extraction)
+        self.llm_service = llm_service
+        # Optional ArticleStore: unchanged articles reuse their stored ticker and search context
+        self.article_store = article_store
+        self.enrichment_stats = {"reused": 0, "enriched": 0}
 
-    def fetch_news(self) -> List[Dict[str, Any]]:
+    def fetch_candidates(self) -> List[Dict[str, Any]]:
         """
         Fetch top headlines from allowed sources (Reuters, Bloomberg, WSJ).
-        Returns a list of news articles.
+        Returns the filtered, deduplicated articles, most relevant first (not yet enriched).
         """
         all_articles = []
         
@@ -24,7 +34,7 @@ class NewsDataCollector:
             # Note: 'country' cannot be mixed with 'sources' in NewsAPI
             response = self.newsapi.get_top_headlines(
                 sources=self.sources_str,
-                page_size=30  # Fetch enough to filter down to 15
+                page_size=NEWS_FETCH_PAGE_SIZE  # Fetch enough to filter down to NEWS_TOP_N
             )
             
             if response['status'] == 'ok':
@@ -55,18 +65,15 @@ class NewsDataCollector:
 
         # Filter articles based on keywords and time
         # Filter articles based on keywords and time
-        from src.config import EXCLUDED_KEYWORDS, NON_US_KEYWORDS
         from datetime import datetime, timedelta, timezone
         import dateutil.parser
 
         # 12-hour window check (Temporarily set to 48h for testing as sample data is old)
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=48)
         
+        scorer = get_relevance_scorer()
         filtered_articles = []
         for article in all_articles:
-            title = article['title'].lower()
-            description = (article['description'] or "").lower()
-            
             # 1. Time Check
             try:
                 pub_date = dateutil.parser.parse(article['publishedAt'])
@@ -78,21 +85,11 @@ class NewsDataCollector:
                 # If date parsing fails, we might skip or keep. Let's keep to be safe but log it.
                 pass
 
-            # 2. Lifestyle/Irrelevant Check
-            if any(keyword in title for keyword in EXCLUDED_KEYWORDS):
-                logger.info(f"Skipping lifestyle/irrelevant article: {article['title']}")
-                continue
-
-            # 3. Non-US/UK Check
-            # If title contains UK keywords, check if it ALSO contains US keywords.
-            # If ONLY UK keywords are present, skip it.
-            us_safe_keywords = ["us", "u.s.", "american", "wall street", "fed ", "federal reserve", "dollar", "nasdaq", "nyse", "dow"]
-            
-            has_non_us = any(k in title for k in NON_US_KEYWORDS)
-            has_us_safe = any(k in title for k in us_safe_keywords)
-            
-            if has_non_us and not has_us_safe:
-                logger.info(f"Skipping non-US (UK/EU) article: {article['title']}")
+            # 2. Lifestyle/Irrelevant and Non-US/UK Check (whole-word keyword matches)
+            # UK/EU headlines are kept only if they also mention the US market.
+            reason = scorer.rejection_reason(article['title'])
+            if reason:
+                logger.info(f"Skipping {reason} article: {article['title']}")
                 continue
                 
             filtered_articles.append(article)
@@ -109,38 +106,111 @@ class NewsDataCollector:
             else:
                 logger.info(f"Duplicate article skipped: {title}")
 
-        # --- Web Search Enrichment ---
+        # 3. Relevance ranking: most market-relevant first, clear off-topic pieces dropped
+        unique_articles = scorer.rank(unique_articles, min_score=RELEVANCE_MIN_SCORE)
+
+        # 4. Near-duplicate clustering: the same story from several outlets (or a reworded
+        # update) is analysed once; the best-ranked version keeps the others as related_sources
+        unique_articles = cluster_near_duplicates(unique_articles, threshold=NEWS_NEAR_DUPLICATE_THRESHOLD)
+
+        return unique_articles
+
+    def iter_enriched(self, candidates: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Starts enriching the top NEWS_TOP_N candidates (ticker + web search context)
+        right away and returns an iterator that yields each one as soon as it and every
+        article ranked above it are done, so deep dives can start on article 1 while
+        later articles are still being searched. The order is always the ranked order.
+        """
         # Only enrich the top N articles to save time/bandwidth
-        # Since we filter heavily, we might have fewer articles, but let's limit to be safe.
         from src.services.search_service import SearchService
         from src.services.llm_service import LLMService
         
         search_service = SearchService()
-        llm_service = LLMService() # Initialize LLM service for ticker extraction
+        llm_service = self.llm_service or LLMService() # LLM service for ticker extraction
         
-        enriched_articles = []
-        # Limit enrichment to top 15 to match report generation limit
-        for i, article in enumerate(unique_articles):
-            if i < 15:
-                logger.info(f"Enriching article {i+1}/{len(unique_articles)}: {article['title']}")
-                
-                # 1. Extract Ticker
-                ticker = llm_service.extract_ticker(article['title'])
-                if ticker:
-                    logger.info(f"Extracted Ticker: {ticker}")
-                    article['ticker'] = ticker
-                else:
-                    logger.info("No ticker found.")
-                    article['ticker'] = None
-
-                # 2. Enrich with Search (passing ticker)
-                enriched_article = search_service.enrich_article(article, ticker=ticker)
-                enriched_articles.append(enriched_article)
+        # Limit enrichment to the top N to match report generation limit
+        selected = candidates[:NEWS_TOP_N]
+
+        # 0. Skip articles enriched earlier (e.g. by the background poller) and reuse the
+        # stored enrichment of articles seen in an earlier run with unchanged content
+        to_enrich = []
+        for article in selected:
+            if 'search_context' in article:
+                continue
+            stored = self.article_store.get_enrichment(article) if self.article_store else None
+            if stored is not None:
+                article.update(stored)
+                logger.info(f"Reusing stored enrichment: {article['title']}")
             else:
-                enriched_articles.append(article)
+                to_enrich.append(article)
+        self.enrichment_stats = {"reused": len(selected) - len(to_enrich), "enriched": len(to_enrich)}
+        
+        # 1. Extract Tickers (one batched call for all headlines)
+        # 2. Enrich with Search (passing ticker)
+        # Each search is submitted as soon as its ticker is known, so searches for
+        # locally resolved headlines overlap the LLM ticker call. Ticker extraction
+        # runs in the background so finished articles can be yielded meanwhile.
+        enriched = {id(article): Future() for article in to_enrich}
+        started = set()
+
+        def start_search(index: int, ticker: Optional[str]):
+            started.add(index)
+            article = to_enrich[index]
+            if ticker:
+                logger.info(f"Extracted Ticker: {ticker} ({article['title']})")
+            else:
+                logger.info(f"No ticker found. ({article['title']})")
+            article['ticker'] = ticker
+            search_future = search_service.submit_enrichment(article, ticker=ticker)
+            search_future.add_done_callback(lambda f: _chain(f, enriched[id(article)]))
+
+        def extract():
+            try:
+                tickers = llm_service.extract_tickers([article['title'] for article in to_enrich], on_resolved=start_search)
+                # Never leave an article waiting on a ticker that wasn't reported through the callback
+                for index in range(len(to_enrich)):
+                    if index not in started:
+                        start_search(index, tickers[index] if isinstance(tickers, list) and index < len(tickers) else None)
+                ticker_stats = llm_service.get_ticker_stats()
+                logger.info(f"Tickers resolved locally: {ticker_stats['resolved_locally']}/{len(to_enrich)} "
+                            f"(LLM calls avoided: {ticker_stats['llm_calls_avoided']})")
+            except Exception as e:
+                for future in enriched.values():
+                    if not future.done():
+                        future.set_exception(e)
+
+        if to_enrich:
+            threading.Thread(target=extract, name="ticker-extraction", daemon=True).start()
 
+        def in_order() -> Iterator[Dict[str, Any]]:
+            for i, article in enumerate(selected, 1):
+                if id(article) in enriched:
+                    logger.info(f"Waiting for enrichment {i}/{len(selected)}: {article['title']}")
+                    article = enriched[id(article)].result()
+                    if self.article_store:
+                        self.article_store.save_enrichment(article)
+                yield article
+
+        return in_order()
+
+    def fetch_news(self) -> List[Dict[str, Any]]:
+        """
+        Ranked candidates with the top NEWS_TOP_N enriched; the rest follow unenriched.
+        """
+        candidates = self.fetch_candidates()
+        enriched_articles = list(self.iter_enriched(candidates))
+        enriched_articles.extend(candidates[NEWS_TOP_N:])
         return enriched_articles
 
+def _chain(source: Future, target: Future):
+    if target.done():
+        return
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
 if __name__ == "__main__":
     # Simple test
     try:
@@ -0,0 +1,136 @@
+import os
+import re
+import logging
+import datetime
+import threading
+import numpy as np
+from typing import Dict, Any, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# One fixed-size record per daily bar: days since the Unix epoch + close
+BAR_DTYPE = np.dtype([("date", "<i4"), ("close", "<f8")])
+TRADING_DAYS_PER_YEAR = 252
+
+class PriceHistoryStore:
+    """
+    Append-only daily close history, one binary file per symbol, read through np.memmap.
+    Records are sorted by date. Re-appending the latest stored date overwrites that bar
+    in place, so a partial intraday close is corrected by the next run.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str) -> str:
+        # "^DJI" -> "_5EDJI.bin"; keeps file names unique and portable
+        safe = re.sub(r"[^A-Za-z0-9.-]", lambda m: f"_{ord(m.group()):02X}", symbol)
+        return os.path.join(self.directory, f"{safe}.bin")
+
+    def read(self, symbol: str, lookback: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the stored bars for a symbol (optionally only the last `lookback`) as a read-only view.
+        """
+        path = self._path(symbol)
+        if not os.path.exists(path) or os.path.getsize(path) < BAR_DTYPE.itemsize:
+            return np.empty(0, dtype=BAR_DTYPE)
+        count = os.path.getsize(path) // BAR_DTYPE.itemsize
+        bars = np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+        return bars[-lookback:] if lookback else bars
+
+    def last_date(self, symbol: str) -> Optional[datetime.date]:
+        bars = self.read(symbol, lookback=1)
+        if len(bars) == 0:
+            return None
+        return datetime.date(1970, 1, 1) + datetime.timedelta(days=int(bars["date"][-1]))
+
+    def append(self, symbol: str, dates: Iterable, closes: Iterable[float]) -> int:
+        """
+        Appends bars newer than the last stored one (the last stored bar itself may be updated).
+        Returns the number of records written.
+        """
+        days = np.asarray(dates, dtype="datetime64[D]").astype("int64")
+        values = np.asarray(closes, dtype="f8")
+        keep = ~np.isnan(values)
+        days, values = days[keep], values[keep]
+        if len(days) == 0:
+            return 0
+        order = np.argsort(days, kind="stable")
+        days, values = days[order], values[order]
+
+        path = self._path(symbol)
+        with self._lock, open(path, "a+b") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                size = f.seek(0, os.SEEK_END)
+                size -= size % BAR_DTYPE.itemsize  # ignore a torn trailing record
+                last_day = None
+                if size:
+                    f.seek(size - BAR_DTYPE.itemsize)
+                    last_day = int(np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)["date"][0])
+
+                if last_day is not None:
+                    newer = days >= last_day
+                    days, values = days[newer], values[newer]
+                # Keep only the last value for duplicate dates within the batch
+                unique_last = np.append(days[1:] != days[:-1], True)
+                days, values = days[unique_last], values[unique_last]
+                if len(days) == 0:
+                    return 0
+
+                records = np.empty(len(days), dtype=BAR_DTYPE)
+                records["date"] = days
+                records["close"] = values
+
+                if last_day is not None and days[0] == last_day:
+                    size -= BAR_DTYPE.itemsize
+                f.truncate(size)
+                f.seek(size)
+                f.write(records.tobytes())
+                f.flush()
+                return len(records)
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def compute_metrics(self, symbols: List[str], window: int = 20) -> Dict[str, Dict[str, Any]]:
+        """
+        1d/5d/20d returns (%) and annualised 20-day volatility (%) from the stored closes,
+        plus `as_of`, the date of the latest stored bar. Reads only the last `window + 1` bars per symbol.
+        """
+        metrics = {}
+        for symbol in symbols:
+            bars = self.read(symbol, lookback=window + 1)
+            closes = np.asarray(bars["close"])
+            if len(closes) == 0:
+                continue
+
+            last = closes[-1]
+            def pct_return(days: int) -> Optional[float]:
+                if len(closes) <= days:
+                    return None
+                return float((last / closes[-1 - days] - 1) * 100)
+
+            log_returns = np.diff(np.log(closes))
+            volatility = None
+            if len(log_returns) >= 5:
+                volatility = float(log_returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100)
+
+            prev_close = closes[-2] if len(closes) >= 2 else None
+            metrics[symbol] = {
+                "as_of": datetime.date(1970, 1, 1) + datetime.timedelta(days=int(bars["date"][-1])),
+                "close": float(last),
+                "change": float(last - prev_close) if prev_close is not None else None,
+                "change_pct": pct_return(1),
+                "ret_5d": pct_return(5),
+                "ret_20d": pct_return(window),
+                "vol_20d": volatility
+            }
+        return metrics
@@ -1,68 +1,180 @@
 import yfinance as yf
+import pandas as pd
 import logging
-from typing import Dict, Any
-from src.config import MARKET_NAMES
+import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from src.config import MARKET_NAMES, MARKET_TICKERS, PRICE_STORE_DIR, PRICE_HISTORY_BACKFILL
+from src.collectors.price_store import PriceHistoryStore
 
 logger = logging.getLogger(__name__)
 
 class StockDataCollector:
     def __init__(self):
-        # Mapping of internal keys to Yahoo Finance tickers
-        self.tickers = {
-            "DOW": "^DJI",
-            "NASDAQ": "^IXIC",
-            "SP500": "^GSPC",
-            "NIKKEI": "^N225"
-        }
+        # Mapping of internal keys to Yahoo Finance tickers (see MARKET_TICKERS_FILE)
+        self.tickers = dict(MARKET_TICKERS)
+        self.store = self._initialize_store()
+
+    def _initialize_store(self) -> Optional[PriceHistoryStore]:
+        try:
+            return PriceHistoryStore(PRICE_STORE_DIR)
+        except Exception as e:
+            logger.warning(f"Price history store disabled: {e}")
+            return None
+
+    # Stored histories this many days behind the newest one are downloaded separately
+    LAGGING_DAYS = 4
+
+    def _download_windows(self, symbols: List[str]) -> List[Tuple[List[str], Dict[str, Any]]]:
+        """
+        (symbols, yf.download arguments) batches covering only the bars missing from the
+        local store. The latest stored date is re-fetched so a partial intraday close gets
+        corrected. Symbols that are up to date share one download; a lagging or new symbol
+        gets its own window instead of widening everyone else's.
+        """
+        if not self.store:
+            return [(symbols, {"period": "5d"})]
+        last_dates = {symbol: self.store.last_date(symbol) for symbol in symbols}
+        missing = [symbol for symbol, last in last_dates.items() if last is None]
+        stored = {symbol: last for symbol, last in last_dates.items() if last is not None}
+        batches = [(missing, {"period": PRICE_HISTORY_BACKFILL})] if missing else []
+
+        # A few extra days so every symbol has two valid closes across holidays
+        margin = datetime.timedelta(days=4)
+        starts: Dict[datetime.date, List[str]] = {}
+        newest = max(stored.values(), default=None)
+        current = [s for s, last in stored.items() if newest - last <= datetime.timedelta(days=self.LAGGING_DAYS)]
+        if current:
+            starts[min(stored[s] for s in current) - margin] = current
+        for symbol, last in stored.items():
+            if symbol not in current:
+                starts.setdefault(last - margin, []).append(symbol)
+        batches += [(group, {"start": start.isoformat()}) for start, group in sorted(starts.items())]
+        return batches
+
+    def _download_closes(self, symbols: List[str]) -> pd.DataFrame:
+        """
+        (date x symbol) closes for every download window. Raises if a download fails.
+        """
+        frames = []
+        for group, window in self._download_windows(symbols):
+            logger.info(f"Downloading {len(group)} symbols ({window})")
+            history = yf.download(
+                group,
+                **window,
+                interval="1d",
+                group_by="column",
+                auto_adjust=False,
+                progress=False,
+                threads=True
+            )
+            frames.append(self._extract_closes(history, group))
+        return pd.concat(frames, axis=1).sort_index() if len(frames) > 1 else frames[0]
 
     def fetch_stock_prices(self) -> Dict[str, Any]:
         """
-        Fetch stock data for the defined tickers.
+        Fetch stock data for the defined tickers in one batched download.
         Returns a dictionary with market names as keys and data as values.
         """
         stock_data = {}
+        symbols = list(dict.fromkeys(self.tickers.values()))
+        
+        try:
+            closes = self._download_closes(symbols)
+        except Exception as e:
+            logger.error(f"Error downloading market data for {len(symbols)} symbols: {e}")
+            return stock_data
+        
+        metrics = self._update_store(closes, symbols)
+        if metrics is None:
+            metrics = self.compute_changes(closes).to_dict(orient="index")
         
         for key, ticker_symbol in self.tickers.items():
             market_name = MARKET_NAMES.get(key, key)
-            try:
-                ticker = yf.Ticker(ticker_symbol)
-                # Get the latest history (1 day)
-                hist = ticker.history(period="2d")
-                
-                if len(hist) >= 1:
-                    # Use the most recent close
-                    current_close = hist['Close'].iloc[-1]
-                    
-                    # Calculate change if we have previous day data
-                    if len(hist) >= 2:
-                        prev_close = hist['Close'].iloc[-2]
-                        change = current_close - prev_close
-                        change_pct = (change / prev_close) * 100
-                    else:
-                        # Fallback if only 1 day data is available (e.g. new listing or API limit)
-                        # Try to get previous close from info
-                        info = ticker.info
-                        prev_close = info.get('previousClose', current_close)
-                        change = current_close - prev_close
-                        change_pct = (change / prev_close) * 100
-
-                    stock_data[market_name] = {
-                        "close": round(current_close, 2),
-                        "change": round(change, 2),
-                        "change_pct": round(change_pct, 2),
-                        "symbol": ticker_symbol
-                    }
-                    logger.info(f"Fetched data for {market_name}: {stock_data[market_name]}")
-                else:
-                    logger.warning(f"No history data found for {market_name} ({ticker_symbol})")
-                    
-            except Exception as e:
-                logger.error(f"Error fetching data for {market_name} ({ticker_symbol}): {e}")
-                # Continue to next ticker even if one fails
+            row = metrics.get(ticker_symbol)
+            if not row or pd.isna(row["close"]):
+                logger.warning(f"No history data found for {market_name} ({ticker_symbol})")
+                continue
+            if "as_of" in row and not self._downloaded(closes, ticker_symbol):
+                # Only the stored history is left: its last bar is not today's close
+                logger.warning(f"No new data for {market_name} ({ticker_symbol}); "
+                               f"skipping stale close from {row['as_of'].isoformat()}")
                 continue
-                
+            
+            stock_data[market_name] = {
+                "close": self._round(row["close"]),
+                "change": self._round(row["change"]) or 0.0,
+                "change_pct": self._round(row["change_pct"]) or 0.0,
+                "symbol": ticker_symbol
+            }
+            # Longer-horizon context, only available from the local history
+            for field in ("ret_5d", "ret_20d", "vol_20d"):
+                if row.get(field) is not None:
+                    stock_data[market_name][field] = self._round(row[field])
+        
+        logger.info(f"Fetched data for {len(stock_data)}/{len(self.tickers)} symbols")
         return stock_data
 
+    def _update_store(self, closes: pd.DataFrame, symbols: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Appends the downloaded bars to the local store and returns per-symbol metrics
+        computed from it, or None if the store is unavailable.
+        """
+        if not self.store:
+            return None
+        try:
+            dates = closes.index.values.astype("datetime64[D]")
+            for symbol in symbols:
+                if symbol in closes.columns:
+                    self.store.append(symbol, dates, closes[symbol].values)
+            return self.store.compute_metrics(symbols)
+        except Exception as e:
+            logger.error(f"Price history store update failed: {e}")
+            return None
+
+    @staticmethod
+    def _downloaded(closes: pd.DataFrame, symbol: str) -> bool:
+        return symbol in closes.columns and bool(closes[symbol].notna().any())
+
+    @staticmethod
+    def _round(value: Optional[float]) -> Optional[float]:
+        if value is None or pd.isna(value):
+            return None
+        return round(float(value), 2)
+
+    @staticmethod
+    def _extract_closes(history: pd.DataFrame, symbols: List[str]) -> pd.DataFrame:
+        """
+        Returns a (date x symbol) frame of closing prices from a yf.download result.
+        """
+        if history is None or history.empty:
+            return pd.DataFrame(columns=symbols, dtype=float)
+        if isinstance(history.columns, pd.MultiIndex):
+            return history["Close"]
+        # Single-symbol downloads may come back with flat columns
+        return history[["Close"]].rename(columns={"Close": symbols[0]})
+
+    @staticmethod
+    def compute_changes(closes: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vectorized last close / previous close / change / change % for every column.
+        Uses the last two *valid* closes per symbol, so markets closed on a given day
+        (e.g. Japanese holidays) still compare against their own previous session.
+        """
+        valid = closes.notna()
+        # 1 for the most recent valid row of each column, 2 for the one before, ...
+        rank_from_end = valid[::-1].cumsum()[::-1]
+        
+        close = closes.where(valid & rank_from_end.eq(1)).max()
+        prev_close = closes.where(valid & rank_from_end.eq(2)).max()
+        change = close - prev_close
+        
+        return pd.DataFrame({
+            "close": close,
+            "prev_close": prev_close,
+            "change": change,
+            "change_pct": change / prev_close * 100
+        })
+
 if __name__ == "__main__":
     # Simple test
     collector = StockDataCollector()
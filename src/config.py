@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 import logging
 
@@ -27,18 +28,163 @@ NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 SLACK_APP_TOKEN = os.getenv("SLACK_APP_TOKEN")
 SLACK_CHANNEL_ID = os.getenv("SLACK_CHANNEL_ID", "C09S2KBK3HU")
+# Minimum seconds between edits of the in-thread progress message
+SLACK_PROGRESS_UPDATE_INTERVAL_SECONDS = float(os.getenv("SLACK_PROGRESS_UPDATE_INTERVAL_SECONDS", "3"))
+# Report jobs: pipeline runs in parallel, runs allowed to wait in the queue, and the
+# initial run duration used for ETAs (refined from completed runs)
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "1"))
+REPORT_JOB_QUEUE_SIZE = int(os.getenv("REPORT_JOB_QUEUE_SIZE", "2"))
+REPORT_JOB_ESTIMATED_SECONDS = float(os.getenv("REPORT_JOB_ESTIMATED_SECONDS", "720"))
+# A plain mention resumes an unfinished run whose last checkpoint is at most this old;
+# "retry" resumes the latest unfinished run regardless of age
+CHECKPOINT_RESUME_WINDOW_MINUTES = float(os.getenv("CHECKPOINT_RESUME_WINDOW_MINUTES", "60"))
+# Scheduled pre-computation: semicolon-separated cron expressions ("minute hour day
+# month weekday", Sunday = 0) in PRECOMPUTE_TIMEZONE; empty disables the scheduler.
+# Mentions get the latest report as-is while it is younger than the freshness window.
+PRECOMPUTE_SCHEDULE = os.getenv("PRECOMPUTE_SCHEDULE", "")
+PRECOMPUTE_TIMEZONE = os.getenv("PRECOMPUTE_TIMEZONE", "Asia/Tokyo")
+PRECOMPUTE_FRESHNESS_MINUTES = float(os.getenv("PRECOMPUTE_FRESHNESS_MINUTES", "60"))
 
 # Google Drive
 GOOGLE_SERVICE_ACCOUNT_JSON = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
 GOOGLE_DRIVE_FOLDER_ID = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
+# Files up to this size use a single multipart request instead of a resumable session
+DRIVE_RESUMABLE_THRESHOLD_BYTES = int(os.getenv("DRIVE_RESUMABLE_THRESHOLD_BYTES", str(5 * 1024 * 1024)))
+DRIVE_UPLOAD_MAX_WORKERS = int(os.getenv("DRIVE_UPLOAD_MAX_WORKERS", "4"))
 
-# Constants
-MARKET_NAMES = {
-    "DOW": "ダウ平均株価",
-    "NASDAQ": "ナスダック総合指数",
-    "SP500": "S&P 500",
-    "NIKKEI": "日経平均株価"
+# Concurrency
+# Number of deep-dive analyses generated in parallel (1 = sequential)
+DEEP_DIVE_MAX_WORKERS = int(os.getenv("DEEP_DIVE_MAX_WORKERS", "15"))
+# Cap on simultaneous in-flight requests per LLM provider (shared across the process)
+LLM_MAX_INFLIGHT = {
+    "openai": int(os.getenv("LLM_MAX_INFLIGHT_OPENAI", "10")),
+    "anthropic": int(os.getenv("LLM_MAX_INFLIGHT_ANTHROPIC", "5")),
+    "gemini": int(os.getenv("LLM_MAX_INFLIGHT_GEMINI", "5")),
+}
+# Per-provider request and token budgets per minute, shared by every concurrent run (0 = unlimited)
+LLM_RPM_LIMIT = {
+    "openai": int(os.getenv("LLM_RPM_LIMIT_OPENAI", "500")),
+    "anthropic": int(os.getenv("LLM_RPM_LIMIT_ANTHROPIC", "50")),
+    "gemini": int(os.getenv("LLM_RPM_LIMIT_GEMINI", "60")),
+}
+LLM_TPM_LIMIT = {
+    "openai": int(os.getenv("LLM_TPM_LIMIT_OPENAI", "450000")),
+    "anthropic": int(os.getenv("LLM_TPM_LIMIT_ANTHROPIC", "40000")),
+    "gemini": int(os.getenv("LLM_TPM_LIMIT_GEMINI", "1000000")),
+}
+# Circuit breaker: skip a provider after N consecutive failures, probe again after the cool-down
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "3"))
+LLM_CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("LLM_CIRCUIT_COOLDOWN_SECONDS", "60"))
+# Hedged requests: if the primary is slower than this percentile of its observed
+# latency, send the same prompt to the next provider and keep the first answer
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "5"))
+LLM_HEDGE_MAX_PER_RUN = int(os.getenv("LLM_HEDGE_MAX_PER_RUN", "5"))
+# Model routing: the "fast" tier per provider, and optional task=tier overrides
+# (e.g. "themes=quality,subtitles=fast"; tasks: ticker, themes, market_overview, deep_dive, conclusion, script, subtitles)
+LLM_FAST_MODELS = {
+    "openai": os.getenv("LLM_FAST_MODEL_OPENAI", "gpt-4o-mini"),
+    "anthropic": os.getenv("LLM_FAST_MODEL_ANTHROPIC", "claude-3-5-haiku-20241022"),
+    "gemini": os.getenv("LLM_FAST_MODEL_GEMINI", "gemini-1.5-flash"),
+}
+LLM_TIERS = ("quality", "fast")
+
+def parse_task_tiers(spec: str) -> dict:
+    """
+    "task=tier" pairs separated by commas; whitespace is ignored and ":" works as well as "=".
+    Entries with an unknown tier are skipped with a warning.
+    """
+    tiers = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        task, _, tier = item.replace(":", "=", 1).partition("=")
+        task, tier = task.strip(), tier.strip().lower()
+        if not task or tier not in LLM_TIERS:
+            logging.getLogger(__name__).warning(f"Ignoring LLM_TASK_TIERS entry '{item.strip()}' (tiers: {', '.join(LLM_TIERS)})")
+            continue
+        tiers[task] = tier
+    return tiers
+
+LLM_TASK_TIERS = parse_task_tiers(os.getenv("LLM_TASK_TIERS", ""))
+# Input-token budget for the article text + web search snippets of one deep-dive prompt
+DEEP_DIVE_INPUT_TOKEN_BUDGET = int(os.getenv("DEEP_DIVE_INPUT_TOKEN_BUDGET", "1500"))
+# Search snippets at least this similar (Jaccard over word 3-shingles) count as duplicates
+SNIPPET_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("SNIPPET_NEAR_DUPLICATE_THRESHOLD", "0.6"))
+
+# News selection: articles below this relevance score (0-1) are dropped, and only
+# the top N go on to ticker extraction, web search and deep dives
+NEWS_TOP_N = int(os.getenv("NEWS_TOP_N", "15"))
+RELEVANCE_MIN_SCORE = float(os.getenv("RELEVANCE_MIN_SCORE", "0.3"))
+# Headlines requested from NewsAPI per run (max 100); near-duplicate clustering keeps
+# a wider pool from turning into extra search and deep-dive calls
+NEWS_FETCH_PAGE_SIZE = int(os.getenv("NEWS_FETCH_PAGE_SIZE", "50"))
+# Articles at least this similar (estimated Jaccard over title + description) are one story
+NEWS_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEWS_NEAR_DUPLICATE_THRESHOLD", "0.5"))
+
+# Background market poller (optional): keeps a rolling window of ranked, enriched news
+# and the latest quotes so report runs skip collection. NewsAPI calls are capped per
+# UTC day; leave headroom for on-demand runs when the window is stale.
+POLLER_ENABLED = os.getenv("POLLER_ENABLED", "false").lower() == "true"
+POLLER_NEWS_INTERVAL_SECONDS = float(os.getenv("POLLER_NEWS_INTERVAL_SECONDS", "900"))
+POLLER_QUOTE_INTERVAL_SECONDS = float(os.getenv("POLLER_QUOTE_INTERVAL_SECONDS", "300"))
+POLLER_NEWS_DAILY_QUOTA = int(os.getenv("POLLER_NEWS_DAILY_QUOTA", "90"))
+POLLER_WINDOW_MINUTES = float(os.getenv("POLLER_WINDOW_MINUTES", "120"))
+
+# Web search enrichment (DuckDuckGo)
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "4"))
+SEARCH_RATE_PER_SECOND = float(os.getenv("SEARCH_RATE_PER_SECOND", "1.0"))
+SEARCH_RATE_BURST = float(os.getenv("SEARCH_RATE_BURST", "2"))
+SEARCH_MAX_RETRIES = int(os.getenv("SEARCH_MAX_RETRIES", "3"))
+# Search result cache: freshness window for results, shorter window for failed searches
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "cache/search_results.sqlite3")
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "1800"))
+SEARCH_NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_NEGATIVE_CACHE_TTL_SECONDS", "300"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+
+# LLM response cache (content-addressed, shared by concurrent runs)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_responses.sqlite3")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+
+# Article store: enrichment and deep-dive sections of unchanged articles are reused
+# across runs for up to ARTICLE_STORE_MAX_AGE_HOURS; rows are kept for the retention window
+ARTICLE_STORE_ENABLED = os.getenv("ARTICLE_STORE_ENABLED", "true").lower() == "true"
+ARTICLE_STORE_PATH = os.getenv("ARTICLE_STORE_PATH", "cache/articles.sqlite3")
+ARTICLE_STORE_MAX_AGE_HOURS = float(os.getenv("ARTICLE_STORE_MAX_AGE_HOURS", "6"))
+ARTICLE_STORE_RETENTION_DAYS = float(os.getenv("ARTICLE_STORE_RETENTION_DAYS", "7"))
+
+# Market data universe: key -> {"symbol": Yahoo Finance ticker, "name": display name}
+DEFAULT_MARKET_TICKERS = {
+    "DOW": {"symbol": "^DJI", "name": "ダウ平均株価"},
+    "NASDAQ": {"symbol": "^IXIC", "name": "ナスダック総合指数"},
+    "SP500": {"symbol": "^GSPC", "name": "S&P 500"},
+    "NIKKEI": {"symbol": "^N225", "name": "日経平均株価"}
 }
+MARKET_TICKERS_FILE = os.getenv("MARKET_TICKERS_FILE") or os.path.join(
+    os.path.dirname(__file__), "data", "market_tickers.json"
+)
+
+def load_market_tickers(path: str = MARKET_TICKERS_FILE) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Could not load market tickers from {path}: {e}. Using defaults.")
+        return DEFAULT_MARKET_TICKERS
+
+MARKET_UNIVERSE = load_market_tickers()
+
+# Local daily price history (append-only, one file per symbol)
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", "data/prices")
+PRICE_HISTORY_BACKFILL = os.getenv("PRICE_HISTORY_BACKFILL", "1y")
+
+# Constants
+MARKET_TICKERS = {key: entry["symbol"] for key, entry in MARKET_UNIVERSE.items()}
+MARKET_NAMES = {key: entry.get("name", key) for key, entry in MARKET_UNIVERSE.items()}
 
 ALLOWED_NEWS_SOURCES = [
     "reuters",
@@ -1,60 +1,121 @@
+import re
 import logging
+import threading
 import datetime
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Dict, Any, Optional, Tuple
+from src.config import NEWS_TOP_N, DEEP_DIVE_MAX_WORKERS, DEEP_DIVE_INPUT_TOKEN_BUDGET, SNIPPET_NEAR_DUPLICATE_THRESHOLD
 from src.services.llm_service import LLMService
+from src.services.token_budget import estimate_tokens, truncate_to_tokens, select_snippets, format_snippets
 from src.utils.logger import ExecutionLogger
+from src.utils.slack_progress import SlackProgressMessage
+from src.utils.checkpoint import CheckpointStore
 
 logger = logging.getLogger(__name__)
 
 class ReportGenerator:
-    def __init__(self, llm_service: LLMService, execution_logger: ExecutionLogger):
+    def __init__(self, llm_service: LLMService, execution_logger: ExecutionLogger, article_store=None):
         self.llm = llm_service
         self.logger = execution_logger
-
-    def generate_report(self, stock_data: Dict[str, Any], news_items: List[Dict[str, Any]]) -> str:
+        # Optional ArticleStore: deep dives of unchanged articles are reused from earlier runs
+        self.article_store = article_store
+        self.section_stats = {"reused": 0, "regenerated": 0}
+        self._stats_lock = threading.Lock()
+
+    def generate_report(self, stock_data: Dict[str, Any], news_items: List[Dict[str, Any]],
+                        output_path: Optional[str] = None,
+                        progress: Optional[SlackProgressMessage] = None,
+                        enriched_news: Optional[Iterable[Dict[str, Any]]] = None,
+                        checkpoints: Optional[CheckpointStore] = None) -> str:
         """
         Orchestrates the generation of the full markdown report.
+        Each section is appended to `output_path` (when given) as soon as it is complete,
+        and reported to `progress`, so partial results are visible before the run ends.
+        `news_items` may be unenriched candidates (themes only need headlines) when
+        `enriched_news` streams the top articles for the deep dives in ranked order,
+        e.g. NewsDataCollector.iter_enriched.
+        With `checkpoints`, themes, the overview, each deep dive and the conclusion are
+        stored as they complete and reused when the run is resumed.
         """
         self.logger.log("Starting report generation...")
+        parts = []
+        writable = output_path is not None
+        if writable:
+            try:
+                open(output_path, 'w', encoding='utf-8').close()
+            except Exception as e:
+                self.logger.log(f"Incremental report file disabled: {e}", level="WARNING")
+                writable = False
+
+        def emit(text: str, label: Optional[str] = None):
+            nonlocal writable
+            parts.append(text)
+            if writable:
+                try:
+                    with open(output_path, 'a', encoding='utf-8') as f:
+                        f.write(text)
+                except Exception as e:
+                    self.logger.log(f"Incremental report file disabled: {e}", level="WARNING")
+                    writable = False
+            if label and progress:
+                progress.section_done(label)
+
+        today = datetime.datetime.now().strftime("%Y年%m月%d日")
+        emit(f"# 市場レポート V7.2\n発行日: {today}\n\n---\n\n")
 
         # 1. Thematic Analysis (New Step)
         # Identify 2-3 main themes driving the market
-        themes = self._identify_themes(stock_data, news_items)
+        themes = self._checkpointed(checkpoints, "themes", lambda: self._identify_themes(stock_data, news_items))
         self.logger.log(f"Identified themes: {themes}")
+        if progress:
+            progress.section_done("テーマ分析")
 
         # 2. Market Overview (Narrative driven by themes)
-        market_section = self._generate_market_overview(stock_data, themes)
+        market_section = self._checkpointed(checkpoints, "market_overview", lambda: self._generate_market_overview(
+            stock_data, themes, on_text=progress.preview if progress else None))
+        emit(f"{market_section}\n\n---\n\n", label="市場概況")
         
         # 3. News Selection & Deep Dive (Tiered)
-        # Limit to top 15 for processing
-        selected_news = news_items[:15]
-        news_section = self._generate_news_section(selected_news, themes)
+        # Limit to the top N (already ranked by relevance) for processing
+        total = len(news_items[:NEWS_TOP_N])
+        stream = enriched_news if enriched_news is not None else news_items[:NEWS_TOP_N]
+        selected_news = []
+
+        def consume():
+            # Keeps the articles as they arrive; the conclusion needs the full list
+            for item in stream:
+                selected_news.append(item)
+                yield item
+
+        emit("## 第2章 ピックアップニュース\n\n")
+        self._generate_news_section(
+            consume(), themes,
+            on_section=lambda index, item, section: emit(section, label=f"ニュース {index}/{total}: {item['title']}"),
+            checkpoints=checkpoints
+        )
+        emit("\n\n---\n\n")
         
         # 4. Conclusion
-        conclusion_section = self._generate_conclusion(stock_data, selected_news, themes)
-
-        # 5. Assembly
-        today = datetime.datetime.now().strftime("%Y年%m月%d日")
-        report = f"""# 市場レポート V7.2
-発行日: {today}
-
----
-
-{market_section}
-
----
-
-{news_section}
-
----
-
-{conclusion_section}
+        conclusion_section = self._checkpointed(checkpoints, "conclusion", lambda: self._generate_conclusion(
+            stock_data, selected_news, themes, on_text=progress.preview if progress else None))
+        emit(f"{conclusion_section}\n\n以上\n", label="総括")
 
-以上
-"""
+        # 5. Assembly (sections were emitted in document order)
+        report = "".join(parts)
         self.logger.log("Report generation completed.")
         return report
 
+    def _generate_streaming(self, prompt: str, task: str, on_text: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Streams a section, passing the text so far to `on_text` as tokens arrive.
+        """
+        chunks = []
+        for chunk in self.llm.stream_text(prompt, system_prompt=self.llm.get_fact_extraction_system_prompt(), task=task):
+            chunks.append(chunk)
+            if on_text:
+                on_text("".join(chunks))
+        return "".join(chunks)
+
     def _identify_themes(self, stock_data: Dict[str, Any], news_items: List[Dict[str, Any]]) -> str:
         """
         Analyzes stock data and news titles to identify 2-3 main market themes.
@@ -87,14 +148,15 @@ Example:
 1. Inflation Fears: CPI data came in hot, pushing yields up and tech stocks down.
 2. China Stimulus: Announcement of new fiscal measures boosted commodities and luxury sectors.
 """
-        return self.llm.generate_text(prompt, system_prompt=self.llm.get_fact_extraction_system_prompt())
+        return self.llm.generate_text(prompt, system_prompt=self.llm.get_fact_extraction_system_prompt(), task="themes")
 
-    def _generate_market_overview(self, stock_data: Dict[str, Any], themes: str) -> str:
+    def _generate_market_overview(self, stock_data: Dict[str, Any], themes: str,
+                                  on_text: Optional[Callable[[str], None]] = None) -> str:
         self.logger.log("Generating market overview...")
         
         # Format stock data for prompt
         stock_summary = "\n".join([
-            f"{name}: {data['close']} (前日比: {data['change']}, {data['change_pct']}%)"
+            f"{name}: {data['close']} (前日比: {data['change']}, {data['change_pct']}%)" + self._format_trend(data)
             for name, data in stock_data.items()
         ])
 
@@ -113,48 +175,171 @@ Requirements:
 - Use specific market names (e.g., "ナスダック総合指数").
 - Output in Markdown format.
 """
-        return self.llm.generate_text(prompt, system_prompt=self.llm.get_fact_extraction_system_prompt())
+        return self._generate_streaming(prompt, "market_overview", on_text)
 
-    def _generate_news_section(self, news_items: List[Dict[str, Any]], themes: str) -> str:
-        self.logger.log(f"Generating deep dive analysis for {len(news_items)} news items...")
+    @staticmethod
+    def _format_trend(data: Dict[str, Any]) -> str:
+        """
+        Weekly/monthly moves and volatility, when the local price history provides them.
+        """
+        parts = []
+        if data.get('ret_5d') is not None:
+            parts.append(f"5日: {data['ret_5d']}%")
+        if data.get('ret_20d') is not None:
+            parts.append(f"20日: {data['ret_20d']}%")
+        if data.get('vol_20d') is not None:
+            parts.append(f"20日ボラティリティ(年率): {data['vol_20d']}%")
+        return f" [{', '.join(parts)}]" if parts else ""
+
+    def _generate_news_section(self, news_items: Iterable[Dict[str, Any]], themes: str,
+                               on_section: Optional[Callable[[int, Dict[str, Any], str], None]] = None,
+                               checkpoints: Optional[CheckpointStore] = None) -> str:
+        """
+        `news_items` may be a lazy stream: each deep dive is submitted as soon as its
+        article arrives. `on_section(index, item, section)` is called for each deep dive,
+        in article order, as soon as it and every deep dive before it are done, even
+        while the stream is still waiting for the next article.
+        Returns the deep dives joined in article order (the chapter heading is the caller's).
+        """
+        self.logger.log("Generating deep dive analysis for the selected news items...")
         
-        section_content = "## 第2章 ピックアップニュース\n\n"
+        # Deep dives are independent of each other, so run them on a bounded pool.
+        # Sections are emitted in the original article order.
+        max_workers = max(1, DEEP_DIVE_MAX_WORKERS)
+        self.logger.log(f"Deep dive concurrency: up to {max_workers} worker(s)")
+        submitted = []
+        sections = []
+        emit_lock = threading.Lock()
+
+        def emit_ready(_future=None):
+            # Runs on whichever thread finished a deep dive; the lock keeps emission ordered
+            with emit_lock:
+                while len(sections) < len(submitted) and submitted[len(sections)][1].done():
+                    item, future = submitted[len(sections)]
+                    sections.append(future.result())
+                    if on_section:
+                        try:
+                            on_section(len(sections), item, sections[-1])
+                        except Exception as e:
+                            self.logger.log(f"Failed to emit deep dive {len(sections)}: {e}", level="ERROR")
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deep-dive") as executor:
+            for index, item in enumerate(news_items, 1):
+                future = executor.submit(self._generate_deep_dive, index, item, themes, checkpoints)
+                with emit_lock:
+                    submitted.append((item, future))
+                future.add_done_callback(emit_ready)
+        # Every future is done here; emit anything a callback left behind
+        emit_ready()
+
+        if self.article_store:
+            self.logger.log(f"Deep dive sections: {self.section_stats['reused']} reused from the article store, "
+                            f"{self.section_stats['regenerated']} regenerated")
+        return "".join(sections)
+
+    def _generate_deep_dive(self, index: int, item: Dict[str, Any], themes: str,
+                            checkpoints: Optional[CheckpointStore] = None) -> str:
+        """
+        Generates the deep dive for a single article, or an error placeholder on failure.
+        Successful sections are checkpointed per article number (and URL).
+        """
+        self.logger.log(f"Processing news item {index}: {item['title']}")
+
+        name = f"deep_dive_{index:02d}"
+        checkpoint = checkpoints.load(name) if checkpoints else None
+        if checkpoint and checkpoint.get("url") == item.get("url"):
+            self.logger.log(f"Resumed from checkpoint: {name}")
+            return checkpoint["section"]
+
+        try:
+            section = self._generate_deep_dive_section(index, item, themes)
+        except Exception as e:
+            self.logger.log(f"Error generating analysis for {item['title']}: {e}", level="ERROR")
+            return f"### {index}. {item['title']}\n\n*Error generating analysis.*\n\n---\n\n"
+        if checkpoints:
+            checkpoints.save(name, {"url": item.get("url"), "section": section})
+        return section
+
+    def _generate_deep_dive_section(self, index: int, item: Dict[str, Any], themes: str) -> str:
+        """
+        The deep dive from the article store, or from the LLM. Raises on LLM errors.
+        """
+        stored = self.article_store.get_section(item) if self.article_store else None
+        if stored is not None:
+            self.logger.log(f"Reusing stored deep dive for news item {index}")
+            with self._stats_lock:
+                self.section_stats["reused"] += 1
+            # The stored heading carries the article number of the run that generated it
+            analysis = re.sub(r"^(###\s*)\d+\.", rf"\g<1>{index}.", stored, count=1, flags=re.M)
+            return f"{analysis}\n\n{self._get_cache_note(item)}---\n\n"
         
-        for i, item in enumerate(news_items, 1):
-            self.logger.log(f"Processing news item {i}: {item['title']}")
-            
-            # Treat ALL items as MAIN THEMES (Deep Dive)
-            # We focus on US Stocks/Economy or major global impact
-            prompt = self._get_main_theme_prompt(item, themes, i)
-
-            try:
-                analysis = self.llm.generate_text(prompt, system_prompt=self.llm.get_fact_extraction_system_prompt())
-                section_content += f"{analysis}\n\n---\n\n"
-            except Exception as e:
-                self.logger.log(f"Error generating analysis for {item['title']}: {e}", level="ERROR")
-                section_content += f"### {i}. {item['title']}\n\n*Error generating analysis.*\n\n---\n\n"
+        # Treat ALL items as MAIN THEMES (Deep Dive)
+        # We focus on US Stocks/Economy or major global impact
+        prompt = self._get_main_theme_prompt(item, index)
+
+        analysis = self.llm.generate_text(prompt, system_prompt=self.llm.get_fact_extraction_system_prompt(),
+                                          prefix=self._get_deep_dive_instructions(themes), task="deep_dive")
+        with self._stats_lock:
+            self.section_stats["regenerated"] += 1
+        if self.article_store:
+            self.article_store.save_section(item, analysis)
+        return f"{analysis}\n\n{self._get_cache_note(item)}---\n\n"
+
+    def _checkpointed(self, checkpoints: Optional[CheckpointStore], name: str, compute: Callable[[], Any]) -> Any:
+        if checkpoints is None:
+            return compute()
+        return checkpoints.get_or_compute(name, compute, on_reuse=lambda n: self.logger.log(f"Resumed from checkpoint: {n}"))
+
+    @staticmethod
+    def _get_cache_note(item: Dict[str, Any]) -> str:
+        """
+        Note shown under a deep dive whose web search context was served from the cache.
+        """
+        cached_at = item.get('search_context_cached_at')
+        if not cached_at:
+            return ""
+        fetched = datetime.datetime.fromtimestamp(cached_at).strftime("%H:%M")
+        return f"*※ Web検索コンテキストはキャッシュ（{fetched} 取得）を使用しています。*\n\n"
 
-        return section_content
+    # Share of the deep-dive input budget the article body may use; search snippets get the rest
+    ARTICLE_BUDGET_SHARE = 0.4
 
-    def _get_main_theme_prompt(self, item: Dict[str, Any], themes: str, index: int) -> str:
+    def _budget_article_context(self, item: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Article text and web search context for a deep-dive prompt, fitted to
+        DEEP_DIVE_INPUT_TOKEN_BUDGET for the active provider.
+        """
+        provider = getattr(self.llm, 'provider', None)
+        budget = DEEP_DIVE_INPUT_TOKEN_BUDGET
+        article_text = f"{item.get('description') or ''}\n{item.get('content') or ''}".strip()
+        article_text = truncate_to_tokens(article_text, int(budget * self.ARTICLE_BUDGET_SHARE), provider)
+        remaining = budget - estimate_tokens(article_text, provider)
+
+        if item.get('search_results'):
+            snippets = select_snippets(item['search_results'], item['title'], remaining, provider,
+                                       near_duplicate_threshold=SNIPPET_NEAR_DUPLICATE_THRESHOLD)
+            search_context = format_snippets(snippets) or "No additional context available."
+        else:
+            # Failed or empty search: the message is short, but keep it bounded as well
+            search_context = truncate_to_tokens(item.get('search_context', 'No additional context available.'), remaining, provider)
+
+        logger.info(f"Deep dive context for '{item['title']}': ~{estimate_tokens(article_text, provider)} article + "
+                    f"~{estimate_tokens(search_context, provider)} search tokens (budget {budget})")
+        return article_text, search_context
+
+    def _get_deep_dive_instructions(self, themes: str) -> str:
+        """
+        The part of every deep-dive prompt that doesn't depend on the article.
+        Sent as the shared, cacheable prefix; the article follows it.
+        """
         return f"""
-Analyze the following news article as a **MAIN THEME** driver for the US Market/Economy.
-
-Article Title: {item['title']}
-Source: {item['source']}
-Published At: {item['publishedAt']}
-URL: {item['url']}
-Content: {item['description']}
-{item.get('content', '')}
-
-Additional Context (from Web Search):
-{item.get('search_context', 'No additional context available.')}
+Analyze the news article given after these instructions as a **MAIN THEME** driver for the US Market/Economy.
 
 Identified Market Themes:
 {themes}
 
 Output Format (Markdown):
-### {index}. [Translated Japanese Title] ([Published Date in JST]) **【重要テーマ】**
+### [Article Number]. [Translated Japanese Title] ([Published Date in JST]) **【重要テーマ】**
 
 **企業情報**:
 - **[Company Name] ([Ticker])**: [Market Cap], [Sector]
@@ -182,10 +367,31 @@ Use specific numbers (e.g., "Stock rose 3%").]
 - **[Specific Indicator/Event]**: [What to watch next. e.g., "Watch the 10-year yield crossing 4.5%..."]
 - **[Scenario]**: [If X happens, expect Y...]
 
-**出典**: {item['url']}
+**出典**: [Article URL]
+"""
+
+    def _get_main_theme_prompt(self, item: Dict[str, Any], index: int) -> str:
+        article_text, search_context = self._budget_article_context(item)
+        return f"""
+Article Number: {index}
+Article Title: {item['title']}
+Source: {item['source']}
+Published At: {item['publishedAt']}
+URL: {item['url']}{self._format_related_sources(item)}
+Content: {article_text}
+
+Additional Context (from Web Search):
+{search_context}
 """
 
-    def _generate_conclusion(self, stock_data: Dict[str, Any], news_items: List[Dict[str, Any]], themes: str) -> str:
+    def _format_related_sources(self, item: Dict[str, Any]) -> str:
+        related = item.get('related_sources') or []
+        if not related:
+            return ""
+        return "\nAlso Reported By: " + "; ".join(f"{r['source']} ({r['url']})" for r in related)
+
+    def _generate_conclusion(self, stock_data: Dict[str, Any], news_items: List[Dict[str, Any]], themes: str,
+                             on_text: Optional[Callable[[str], None]] = None) -> str:
         self.logger.log("Generating conclusion...")
         
         # Summarize titles for context
@@ -206,4 +412,4 @@ Requirements:
 - No personal opinions.
 - Reiterate the main themes and their impact.
 """
-        return self.llm.generate_text(prompt, system_prompt=self.llm.get_fact_extraction_system_prompt())
+        return self._generate_streaming(prompt, "conclusion", on_text)
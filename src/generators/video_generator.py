@@ -44,7 +44,7 @@ Requirements:
 4. **Content Depth**: Do NOT just read the news. Provide *interpretation* and *insight*. Connect the dots for the viewer.
 5. **Language**: Japanese.
 """
-        return self.llm.generate_text(prompt, system_prompt=self.llm.get_taitsu_persona_system_prompt())
+        return self.llm.generate_text(prompt, system_prompt=self.llm.get_taitsu_persona_system_prompt(), task="script")
 
     def generate_subtitles(self, script: str) -> str:
         """
@@ -77,4 +77,4 @@ Example Output:
 - テック株が主導
 [画像を表示: URL]
 """
-        return self.llm.generate_text(prompt, system_prompt=self.llm.get_taitsu_persona_system_prompt())
+        return self.llm.generate_text(prompt, system_prompt=self.llm.get_taitsu_persona_system_prompt(), task="subtitles")
@@ -1,24 +1,35 @@
 import os
+import io
 import logging
 import datetime
-from typing import List, Optional
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence, Union
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from src.config import (
     GOOGLE_SERVICE_ACCOUNT_JSON, 
     GOOGLE_DRIVE_FOLDER_ID, 
-    SLACK_BOT_TOKEN
+    SLACK_BOT_TOKEN,
+    DRIVE_RESUMABLE_THRESHOLD_BYTES,
+    DRIVE_UPLOAD_MAX_WORKERS
 )
 from src.utils.logger import ExecutionLogger
 
 logger = logging.getLogger(__name__)
 
+# An artifact is either a local file path or {"filename": str, "content": str} held in memory
+Artifact = Union[str, Dict[str, Any]]
+
 class FileManager:
     def __init__(self, execution_logger: ExecutionLogger):
         self.logger = execution_logger
+        self._credentials = None
+        self._local = threading.local()
         self.drive_service = self._initialize_drive_service()
         self.slack_client = WebClient(token=SLACK_BOT_TOKEN) if SLACK_BOT_TOKEN else None
 
@@ -28,17 +39,17 @@ class FileManager:
             return None
         
         try:
-            creds = service_account.Credentials.from_service_account_file(
+            self._credentials = service_account.Credentials.from_service_account_file(
                 GOOGLE_SERVICE_ACCOUNT_JSON, scopes=['https://www.googleapis.com/auth/drive.file']
             )
-            return build('drive', 'v3', credentials=creds)
+            return build('drive', 'v3', credentials=self._credentials)
         except Exception as e:
             self.logger.log(f"Failed to initialize Google Drive service: {e}", level="ERROR")
             return None
 
-    def save_to_local(self, content: str, filename: str, directory: str = "output", sub_dir: str = None) -> str:
+    def local_path(self, filename: str, directory: str = "output", sub_dir: str = None) -> str:
         """
-        Saves content to a local file. Returns the absolute path.
+        Path save_to_local would write `filename` to, creating the directory if needed.
         """
         # Create directory
         if sub_dir:
@@ -49,7 +60,13 @@ class FileManager:
             
         os.makedirs(full_dir, exist_ok=True)
         
-        filepath = os.path.join(full_dir, filename)
+        return os.path.join(full_dir, filename)
+
+    def save_to_local(self, content: str, filename: str, directory: str = "output", sub_dir: str = None) -> str:
+        """
+        Saves content to a local file. Returns the absolute path.
+        """
+        filepath = self.local_path(filename, directory, sub_dir)
         
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
@@ -60,9 +77,26 @@ class FileManager:
             self.logger.log(f"Failed to save local file {filename}: {e}", level="ERROR")
             raise e
 
-    def upload_to_drive(self, file_path: str, folder_id: str = GOOGLE_DRIVE_FOLDER_ID) -> Optional[str]:
+    def _get_drive_service(self):
+        """
+        Drive service for the current thread; the underlying HTTP client is not thread-safe.
         """
-        Uploads a file to Google Drive. Returns the file ID.
+        if threading.current_thread() is threading.main_thread() or not self._credentials:
+            return self.drive_service
+        if not hasattr(self._local, "drive_service"):
+            self._local.drive_service = build('drive', 'v3', credentials=self._credentials)
+        return self._local.drive_service
+
+    @staticmethod
+    def _artifact_name(artifact: Artifact) -> str:
+        return artifact['filename'] if isinstance(artifact, dict) else os.path.basename(artifact)
+
+    def upload_to_drive(self, file_path: str = None, folder_id: str = GOOGLE_DRIVE_FOLDER_ID,
+                        content: str = None, filename: str = None) -> Optional[str]:
+        """
+        Uploads a file to Google Drive, either from `file_path` or from in-memory `content`.
+        Small files use a single multipart request; only large ones use resumable uploads.
+        Returns the file ID.
         """
         if not self.drive_service:
             return None
@@ -71,44 +105,97 @@ class FileManager:
             self.logger.log("Google Drive Folder ID not set. Skipping upload.", level="WARNING")
             return None
 
+        name = filename or os.path.basename(file_path)
         try:
             file_metadata = {
-                'name': os.path.basename(file_path),
+                'name': name,
                 'parents': [folder_id]
             }
-            media = MediaFileUpload(file_path, resumable=True)
+            mimetype = mimetypes.guess_type(name)[0] or 'text/plain'
+            if content is not None:
+                data = content.encode('utf-8')
+                media = MediaIoBaseUpload(
+                    io.BytesIO(data), mimetype=mimetype,
+                    resumable=len(data) > DRIVE_RESUMABLE_THRESHOLD_BYTES
+                )
+            else:
+                media = MediaFileUpload(
+                    file_path, mimetype=mimetype,
+                    resumable=os.path.getsize(file_path) > DRIVE_RESUMABLE_THRESHOLD_BYTES
+                )
             
-            file = self.drive_service.files().create(
+            file = self._get_drive_service().files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id'
             ).execute()
             
             file_id = file.get('id')
-            self.logger.log(f"Uploaded to Drive: {os.path.basename(file_path)} (ID: {file_id})")
+            self.logger.log(f"Uploaded to Drive: {name} (ID: {file_id})")
             return file_id
             
         except Exception as e:
             self.logger.log(f"Failed to upload to Drive: {e}", level="ERROR")
             return None
 
-    def upload_to_slack(self, file_paths: List[str], channel_id: str, thread_ts: str = None):
+    def upload_many_to_drive(self, artifacts: List[Artifact], folder_id: str = GOOGLE_DRIVE_FOLDER_ID) -> List[Optional[str]]:
         """
-        Uploads multiple files to Slack.
+        Uploads several artifacts to Google Drive concurrently. Returns file IDs in input order.
+        """
+        if not self.drive_service or not artifacts:
+            return [None] * len(artifacts)
+
+        def upload(artifact: Artifact) -> Optional[str]:
+            if isinstance(artifact, dict):
+                return self.upload_to_drive(folder_id=folder_id, content=artifact['content'], filename=artifact['filename'])
+            return self.upload_to_drive(artifact, folder_id=folder_id)
+
+        workers = max(1, min(DRIVE_UPLOAD_MAX_WORKERS, len(artifacts)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drive-upload") as executor:
+            return list(executor.map(upload, artifacts))
+
+    def upload_to_slack(self, file_paths: List[Artifact], channel_id: str, thread_ts: str = None):
+        """
+        Uploads multiple files to Slack in a single files_upload_v2 request.
+        Entries may be local paths or in-memory {"filename", "content"} dicts.
         """
         if not self.slack_client:
             self.logger.log("Slack client not initialized. Skipping upload.", level="WARNING")
             return
 
-        for path in file_paths:
-            try:
-                response = self.slack_client.files_upload_v2(
-                    channel=channel_id,
-                    thread_ts=thread_ts,
-                    file=path,
-                    title=os.path.basename(path),
-                    initial_comment=f"Here is the generated file: {os.path.basename(path)}"
-                )
-                self.logger.log(f"Uploaded to Slack: {os.path.basename(path)}")
-            except SlackApiError as e:
-                self.logger.log(f"Failed to upload to Slack: {e.response['error']}", level="ERROR")
+        if not file_paths:
+            return
+
+        file_uploads = []
+        for artifact in file_paths:
+            name = self._artifact_name(artifact)
+            if isinstance(artifact, dict):
+                file_uploads.append({"content": artifact['content'], "filename": name, "title": name})
+            else:
+                file_uploads.append({"file": artifact, "filename": name, "title": name})
+
+        names = ", ".join(upload["filename"] for upload in file_uploads)
+        try:
+            self.slack_client.files_upload_v2(
+                channel=channel_id,
+                thread_ts=thread_ts,
+                file_uploads=file_uploads,
+                initial_comment=f"Here are the generated files: {names}"
+            )
+            self.logger.log(f"Uploaded to Slack: {names}")
+        except SlackApiError as e:
+            self.logger.log(f"Failed to upload to Slack: {e.response['error']}", level="ERROR")
+
+    def upload_artifacts(self, artifacts: List[Artifact], channel_id: str, thread_ts: str = None,
+                         extra_thread_ts: Sequence[str] = ()):
+        """
+        Uploads artifacts to Slack (one request per thread) and Google Drive (concurrently) in parallel.
+        `extra_thread_ts` are further threads that get the same files; Drive gets one copy.
+        """
+        threads = [thread_ts, *extra_thread_ts]
+        with ThreadPoolExecutor(max_workers=len(threads) + 1, thread_name_prefix="upload") as executor:
+            slack_futures = [executor.submit(self.upload_to_slack, artifacts, channel_id, ts) for ts in threads]
+            drive_future = executor.submit(self.upload_many_to_drive, artifacts)
+            for future in slack_futures:
+                future.result()
+            drive_future.result()
@@ -0,0 +1,164 @@
+import time
+import heapq
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class Job:
+    """
+    One pipeline run and the Slack threads waiting for its results. Mentions that
+    arrive while the run is queued or in progress attach as extra subscribers until
+    the run closes the list (right before it uploads its artifacts).
+    """
+    def __init__(self, key: str, say: Callable[..., Any], thread_ts: str, options: Optional[Dict[str, Any]] = None):
+        self.key = key
+        # Keyword arguments for the run, fixed by the submission that created the job
+        self.options = options or {}
+        # Output run directory name, set by the run once known; guards it against concurrent resumes
+        self.run_name: Optional[str] = None
+        self.subscribers: List[Tuple[Callable[..., Any], str]] = [(say, thread_ts)]
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self._open = True
+        self._lock = threading.Lock()
+
+    def attach(self, say: Callable[..., Any], thread_ts: str) -> bool:
+        with self._lock:
+            if not self._open:
+                return False
+            self.subscribers.append((say, thread_ts))
+            return True
+
+    def close(self) -> List[str]:
+        """
+        Stops accepting subscribers and returns every subscribed thread_ts.
+        """
+        with self._lock:
+            self._open = False
+            return [thread_ts for _, thread_ts in self.subscribers]
+
+    @property
+    def thread_timestamps(self) -> List[str]:
+        with self._lock:
+            return [thread_ts for _, thread_ts in self.subscribers]
+
+    def say(self, text: str):
+        """
+        Posts a message to every subscribed thread.
+        """
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for say, thread_ts in subscribers:
+            try:
+                say(text=text, thread_ts=thread_ts)
+            except Exception as e:
+                logger.warning(f"Failed to post to thread {thread_ts}: {e}")
+
+class JobManager:
+    """
+    Runs jobs on a fixed pool of worker threads with a bounded FIFO queue.
+    A submission with the same key as a queued or running job is coalesced into it
+    instead of starting a duplicate run. Every submission gets a status with the
+    queue position and an ETA based on recent run durations.
+    """
+    def __init__(self, run_job: Callable[[Job], None], max_workers: int = 1, max_queue: int = 2,
+                 estimated_duration: float = 720.0):
+        self.run_job = run_job
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        # Exponential moving average of completed run durations
+        self.estimated_duration = estimated_duration
+        self.pending: Deque[Job] = deque()
+        self.running: List[Job] = []
+        self._workers: List[threading.Thread] = []
+        self._condition = threading.Condition()
+
+    def _start_workers(self):
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f"job-worker-{len(self._workers) + 1}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self.pending:
+                    self._condition.wait()
+                job = self.pending.popleft()
+                job.started_at = time.time()
+                self.running.append(job)
+
+            logger.info(f"Job '{job.key}' started ({len(job.subscribers)} subscriber(s))")
+            try:
+                self.run_job(job)
+            except Exception as e:
+                logger.error(f"Job '{job.key}' failed: {e}")
+            finally:
+                duration = time.time() - job.started_at
+                with self._condition:
+                    self.running.remove(job)
+                    self.estimated_duration = 0.7 * self.estimated_duration + 0.3 * duration
+                logger.info(f"Job '{job.key}' finished in {duration:.0f}s")
+
+    def _eta(self, job: Job) -> float:
+        """
+        Seconds until `job` is expected to finish. Call with the condition held.
+        """
+        now = time.time()
+        if job.started_at is not None:
+            return max(self.estimated_duration - (now - job.started_at), 0.0)
+        # Simulate the workers draining the queue in order
+        free_at = [max(self.estimated_duration - (now - r.started_at), 0.0) for r in self.running]
+        free_at += [0.0] * (self.max_workers - len(free_at))
+        heapq.heapify(free_at)
+        for queued in self.pending:
+            start = heapq.heappop(free_at)
+            heapq.heappush(free_at, start + self.estimated_duration)
+            if queued is job:
+                return start + self.estimated_duration
+        return self.estimated_duration
+
+    def submit(self, key: str, say: Callable[..., Any], thread_ts: str,
+               options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Queues a job or attaches to an equivalent one. Returns {"status", "position", "eta_seconds", "job"}:
+        status is "started", "queued", "attached" or "rejected"; position is 0 for a running job.
+        `options` only apply to a new job; an attaching submission shares the existing job's.
+        """
+        with self._condition:
+            self._start_workers()
+
+            for job in self.running + list(self.pending):
+                if job.key == key and job.attach(say, thread_ts):
+                    position = 0 if job in self.running else list(self.pending).index(job) + 1
+                    return {"status": "attached", "position": position, "eta_seconds": self._eta(job), "job": job}
+
+            if len(self.pending) >= self.max_queue and len(self.running) >= self.max_workers:
+                # Earliest moment a queue slot frees up
+                eta = min((self._eta(r) for r in self.running), default=0.0)
+                return {"status": "rejected", "position": None, "eta_seconds": eta, "job": None}
+
+            job = Job(key, say, thread_ts, options)
+            self.pending.append(job)
+            busy = len(self.running) + len(self.pending) > self.max_workers
+            status = {"status": "queued" if busy else "started", "position": len(self.pending) if busy else 0,
+                      "eta_seconds": self._eta(job), "job": job}
+            self._condition.notify()
+            return status
+
+    def active_run_names(self) -> Set[str]:
+        """
+        Run directories owned by queued or running jobs (set by the run, or the run a job resumes).
+        A run stays active until its job returns, including after `Job.close()`.
+        """
+        with self._condition:
+            jobs = self.running + list(self.pending)
+        return {name for job in jobs for name in (job.run_name, job.options.get("resume_run")) if name}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {"running": len(self.running), "queued": len(self.pending),
+                    "estimated_duration": round(self.estimated_duration)}
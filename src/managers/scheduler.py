@@ -0,0 +1,153 @@
+import time
+import logging
+import datetime
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+# (name, first value, last value) of the five cron fields
+CRON_FIELDS = [("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6)]
+WEEKDAY_NAMES = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+
+def _parse_field(text: str, low: int, high: int) -> Set[int]:
+    """
+    One cron field: "*", "5", "1-5", "mon-fri", "*/15", "0-30/10" or a comma list of those.
+    """
+    values = set()
+    for part in text.lower().split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(WEEKDAY_NAMES.get(start_text, start_text)), int(WEEKDAY_NAMES.get(end_text, end_text))
+        else:
+            start = end = int(WEEKDAY_NAMES.get(part, part))
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Invalid cron field '{text}' (allowed {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronSchedule:
+    """
+    Standard five-field cron expression ("minute hour day month weekday", Sunday = 0),
+    evaluated in the given timezone. As in cron, when both day-of-month and weekday
+    are restricted a day matching either one runs ("0 7 1 * mon" = the 1st and every
+    Monday); a field starting with "*" is unrestricted.
+    """
+    def __init__(self, expression: str, tz: datetime.tzinfo):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        self.expression = expression
+        self.tz = tz
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_field(text, low, high) for text, (_, low, high) in zip(fields, CRON_FIELDS)
+        )
+        self.day_restricted = not fields[2].startswith("*")
+        self.weekday_restricted = not fields[4].startswith("*")
+
+    def _day_matches(self, moment: datetime.datetime) -> bool:
+        if moment.month not in self.months:
+            return False
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        """
+        The first matching minute strictly after `moment` (timezone-aware).
+        """
+        candidate = moment.astimezone(self.tz).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        # Skip whole days and hours that can't match; a year and a day covers every schedule
+        limit = candidate + datetime.timedelta(days=367)
+        while candidate < limit:
+            if not self._day_matches(candidate):
+                candidate = (candidate + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + datetime.timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += datetime.timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+def parse_schedule(spec: str, timezone: str) -> List[CronSchedule]:
+    """
+    Semicolon-separated cron expressions, e.g. "30 7 * * mon-fri; 15 6 * * tue-sat".
+    """
+    tz = ZoneInfo(timezone)
+    return [CronSchedule(expression.strip(), tz) for expression in spec.split(";") if expression.strip()]
+
+class PrecomputeScheduler:
+    """
+    Background thread that calls `trigger()` at every time matched by the schedules.
+    Missed times (e.g. while the process was down) are not replayed.
+    """
+    def __init__(self, schedules: List[CronSchedule], trigger: Callable[[], Any]):
+        self.schedules = schedules
+        self.trigger = trigger
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def next_run(self, now: Optional[datetime.datetime] = None) -> Optional[datetime.datetime]:
+        if not self.schedules:
+            return None
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        return min(schedule.next_after(now) for schedule in self.schedules)
+
+    def start(self):
+        if not self.schedules or self._thread:
+            return
+        self._thread = threading.Thread(target=self._loop, name="precompute-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Precompute scheduler started; next run at {self.next_run().isoformat()}")
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            next_run = self.next_run()
+            # Sleep in bounded steps so clock changes are picked up
+            while not self._stop.is_set():
+                remaining = (next_run - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+                if remaining <= 0:
+                    break
+                self._stop.wait(min(remaining, 60))
+            if self._stop.is_set():
+                return
+            logger.info(f"Precompute triggered for {next_run.isoformat()}")
+            try:
+                self.trigger()
+            except Exception as e:
+                logger.error(f"Precompute trigger failed: {e}")
+
+class WarmArtifacts:
+    """
+    The artifacts of the latest completed run, served to mentions while fresh.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest: Optional[Dict[str, Any]] = None
+
+    def update(self, artifacts: List[Dict[str, Any]], run_name: str):
+        with self._lock:
+            self._latest = {"artifacts": artifacts, "run_name": run_name, "created_at": time.time()}
+
+    def get_fresh(self, max_age_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        {"artifacts", "run_name", "created_at"} if the latest run is younger than `max_age_seconds`.
+        """
+        with self._lock:
+            latest = self._latest
+        if latest is None or time.time() - latest["created_at"] > max_age_seconds:
+            return None
+        return latest
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from src.config import (
+    ARTICLE_STORE_ENABLED, ARTICLE_STORE_PATH, ARTICLE_STORE_MAX_AGE_HOURS, ARTICLE_STORE_RETENTION_DAYS
+)
+
+logger = logging.getLogger(__name__)
+
+# Article fields set by ticker extraction and web search enrichment
+ENRICHMENT_FIELDS = ("ticker", "search_context", "search_results", "search_context_cached_at")
+
+class ArticleStore:
+    """
+    SQLite store of processed articles keyed by URL hash: the fetched article, its
+    enrichment (ticker + web search context) and its generated deep-dive section.
+    Stored work is reused only while the article content is unchanged and younger
+    than `max_age_seconds`; a content change clears the stored section.
+    Like DiskCache, a connection is opened per operation so instances are thread-safe.
+    """
+    def __init__(self, path: str, max_age_seconds: float, retention_seconds: float):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    url_hash TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    article TEXT NOT NULL,
+                    enrichment TEXT,
+                    enriched_at REAL,
+                    section TEXT,
+                    section_at REAL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("DELETE FROM articles WHERE updated_at <= ?", (time.time() - retention_seconds,))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def url_hash(url: str) -> str:
+        return hashlib.sha256(url.strip().rstrip('/').lower().encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def content_hash(article: Dict[str, Any]) -> str:
+        payload = json.dumps([article.get(k) or "" for k in ("title", "description", "content")], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _fresh_row(self, article: Dict[str, Any], column: str, timestamp_column: str) -> Optional[Any]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    f"SELECT content_hash, {column}, {timestamp_column} FROM articles WHERE url_hash = ?",
+                    (self.url_hash(article['url']),)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Article store read failed ({self.path}): {e}")
+            return None
+        if row is None or row[1] is None or row[0] != self.content_hash(article):
+            return None
+        if row[2] is None or row[2] <= time.time() - self.max_age_seconds:
+            return None
+        return row[1]
+
+    def get_enrichment(self, article: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        The stored ticker/search fields for an unchanged article, or None.
+        """
+        value = self._fresh_row(article, "enrichment", "enriched_at")
+        return json.loads(value) if value is not None else None
+
+    def get_section(self, article: Dict[str, Any]) -> Optional[str]:
+        """
+        The stored deep-dive section for an unchanged article, or None.
+        """
+        return self._fresh_row(article, "section", "section_at")
+
+    def save_enrichment(self, article: Dict[str, Any]):
+        """
+        Upserts the article with its enrichment. A changed content hash drops the old section.
+        """
+        now = time.time()
+        enrichment = {field: article.get(field) for field in ENRICHMENT_FIELDS}
+        stored = {k: v for k, v in article.items() if k not in ENRICHMENT_FIELDS}
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    INSERT INTO articles (url_hash, url, content_hash, article, enrichment, enriched_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url_hash) DO UPDATE SET
+                        section = CASE WHEN content_hash = excluded.content_hash THEN section END,
+                        section_at = CASE WHEN content_hash = excluded.content_hash THEN section_at END,
+                        url = excluded.url,
+                        content_hash = excluded.content_hash,
+                        article = excluded.article,
+                        enrichment = excluded.enrichment,
+                        enriched_at = excluded.enriched_at,
+                        updated_at = excluded.updated_at
+                """, (self.url_hash(article['url']), article['url'], self.content_hash(article),
+                      json.dumps(stored, ensure_ascii=False, default=str),
+                      json.dumps(enrichment, ensure_ascii=False, default=str), now, now))
+        except sqlite3.Error as e:
+            logger.warning(f"Article store write failed ({self.path}): {e}")
+
+    def save_section(self, article: Dict[str, Any], section: str):
+        """
+        Stores a generated deep-dive section for an article saved by save_enrichment.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE articles SET section = ?, section_at = ?, updated_at = ? WHERE url_hash = ? AND content_hash = ?",
+                    (section, now, now, self.url_hash(article['url']), self.content_hash(article))
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Article store write failed ({self.path}): {e}")
+
+_store: Optional[ArticleStore] = None
+_store_lock = threading.Lock()
+
+def get_article_store() -> Optional[ArticleStore]:
+    """
+    The shared article store, or None when it is disabled or cannot be opened.
+    """
+    global _store
+    if not ARTICLE_STORE_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = ArticleStore(ARTICLE_STORE_PATH, ARTICLE_STORE_MAX_AGE_HOURS * 3600,
+                                          ARTICLE_STORE_RETENTION_DAYS * 86400)
+                except Exception as e:
+                    logger.warning(f"Article store disabled: {e}")
+                    return None
+    return _store
@@ -0,0 +1,159 @@
+import time
+import logging
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60.0
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    True for HTTP 429 / quota errors from any of the provider SDKs.
+    """
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status == 429:
+        return True
+    text = str(error).lower()
+    return "429" in text or "rate limit" in text or "resource exhausted" in text
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    The Retry-After header of a provider error response, if there is one.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class ProviderScheduler:
+    """
+    Process-wide admission control for one provider.
+
+    Requests wait until the provider's in-flight, requests-per-minute and
+    tokens-per-minute budgets allow them. Waiting requests are grouped by run
+    and served round-robin across runs, so one busy run cannot starve another.
+    429 responses pause the provider for Retry-After seconds (or an adaptive
+    exponential delay when the header is missing).
+    """
+    def __init__(self, provider: str, rpm: int, tpm: int, max_inflight: int):
+        self.provider = provider
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_inflight = max(1, max_inflight)
+        self.inflight = 0
+        self.paused_until = 0.0
+        self.consecutive_rate_limits = 0
+        # (timestamp, tokens) of requests admitted in the last minute
+        self.window: Deque[Tuple[float, int]] = deque()
+        # run id -> FIFO of waiting tickets; key order is the round-robin order
+        self.queues: "OrderedDict[str, Deque[Any]]" = OrderedDict()
+        self.condition = threading.Condition()
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def _purge(self, now: float):
+        while self.window and now - self.window[0][0] >= WINDOW_SECONDS:
+            self.window.popleft()
+
+    def _next_ticket(self) -> Any:
+        # First run in rotation order with a waiting request
+        for queue in self.queues.values():
+            if queue:
+                return queue[0]
+        return None
+
+    def _delay_until_capacity(self, now: float, tokens: int) -> Optional[float]:
+        """
+        0 if a request of `tokens` can start now, seconds to wait if a time-based
+        budget is exhausted, or None if it must wait for an in-flight call to finish.
+        """
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.inflight >= self.max_inflight:
+            return None
+        self._purge(now)
+        if self.rpm and len(self.window) >= self.rpm:
+            return WINDOW_SECONDS - (now - self.window[0][0])
+        if self.tpm and self.window:
+            used = sum(t for _, t in self.window)
+            if used + tokens > self.tpm:
+                # Wait for enough of the oldest requests to age out
+                for timestamp, spent in self.window:
+                    used -= spent
+                    if used + tokens <= self.tpm:
+                        return WINDOW_SECONDS - (now - timestamp)
+                return WINDOW_SECONDS - (now - self.window[-1][0])
+        return 0
+
+    def acquire(self, run_id: str, tokens: int = 0) -> float:
+        """
+        Blocks until the request may start. Returns the time spent waiting.
+        """
+        ticket = object()
+        start = time.monotonic()
+        with self.condition:
+            self.queues.setdefault(run_id, deque()).append(ticket)
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            while True:
+                now = time.monotonic()
+                delay = None
+                if self._next_ticket() is ticket:
+                    delay = self._delay_until_capacity(now, tokens)
+                    if delay == 0:
+                        queue = self.queues.pop(run_id)
+                        queue.popleft()
+                        if queue:
+                            # Re-insert at the back: the next run gets the following turn
+                            self.queues[run_id] = queue
+                        self.window.append((now, tokens))
+                        self.inflight += 1
+                        self.condition.notify_all()
+                        return now - start
+                self.condition.wait(timeout=delay)
+
+    def release(self, rate_limited: bool = False, retry_after: Optional[float] = None):
+        with self.condition:
+            self.inflight = max(0, self.inflight - 1)
+            if rate_limited:
+                self.consecutive_rate_limits += 1
+                pause = retry_after if retry_after is not None else min(60.0, 2.0 ** self.consecutive_rate_limits)
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+                logger.warning(f"{self.provider} rate limited; pausing new requests for {pause:.1f}s")
+            else:
+                self.consecutive_rate_limits = 0
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, run_id: str, tokens: int = 0):
+        """
+        Admission + release around one provider call. Yields the queue wait in seconds.
+        A 429 raised inside the block pauses the provider before the error propagates.
+        """
+        waited = self.acquire(run_id, tokens)
+        rate_limited, retry_after = False, None
+        try:
+            yield waited
+        except Exception as e:
+            rate_limited = is_rate_limit_error(e)
+            retry_after = retry_after_seconds(e) if rate_limited else None
+            raise
+        finally:
+            # Also runs on GeneratorExit (a stream closed early) and KeyboardInterrupt
+            self.release(rate_limited=rate_limited, retry_after=retry_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.condition:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "inflight": self.inflight
+            }
@@ -1,119 +1,581 @@
 import os
 import logging
 import json
-from typing import Dict, Any, Optional
-import google.generativeai as genai
-from openai import OpenAI
-from anthropic import Anthropic
-from src.config import GOOGLE_API_KEY, OPENAI_API_KEY, ANTHROPIC_API_KEY
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from concurrent.futures import wait, FIRST_COMPLETED
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+from src.config import (
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES,
+    LLM_HEDGE_ENABLED, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MAX_PER_RUN, LLM_FAST_MODELS, LLM_TASK_TIERS
+)
+from src.utils.disk_cache import DiskCache
+from src.services.ticker_resolver import get_ticker_resolver
+from src.services.provider_registry import get_provider_registry, ProviderRegistry, CircuitBreaker
+from src.services.token_budget import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TASK = "general"
+
 class LLMService:
+    MODELS = ProviderRegistry.MODELS
+    # Cheaper, lower-latency models for short structured outputs
+    FAST_MODELS = LLM_FAST_MODELS
+    # Task type -> model tier ("quality" = MODELS, "fast" = FAST_MODELS); overridable via LLM_TASK_TIERS
+    TASK_TIERS = {
+        "ticker": "fast",
+        "themes": "fast",
+        "subtitles": "fast",
+        "market_overview": "quality",
+        "deep_dive": "quality",
+        "conclusion": "quality",
+        "script": "quality",
+        DEFAULT_TASK: "quality",
+        **LLM_TASK_TIERS
+    }
+    # Rough completion allowance counted against the tokens-per-minute budget
+    ESTIMATED_OUTPUT_TOKENS = 1000
+
     def __init__(self):
+        # Clients, circuit breakers and rate-limit schedulers are shared process-wide;
+        # the run id lets the schedulers share capacity fairly between concurrent runs
+        self.registry = get_provider_registry()
+        self.run_id = uuid.uuid4().hex
         self.provider = self._select_provider()
-        self.client = self._initialize_client()
+        self.client = self.registry.get_client(self.provider)
+        self.cache = self._initialize_cache()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.ticker_resolver = get_ticker_resolver()
+        self.tickers_resolved_locally = 0
+        self.ticker_llm_calls_avoided = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.scheduled_calls = 0
+        self.queued_calls = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_input_tokens = 0
+        self.task_stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+        # Per-thread admission time of the current provider call (see _admit)
+        self._call_state = threading.local()
         logger.info(f"LLM Service initialized with provider: {self.provider}")
 
     def _select_provider(self) -> str:
         # Priority: OpenAI -> Anthropic -> Gemini
-        if OPENAI_API_KEY:
-            return 'openai'
-        elif ANTHROPIC_API_KEY:
-            return 'anthropic'
-        elif GOOGLE_API_KEY:
-            return 'gemini'
-        else:
+        providers = self.registry.available_providers()
+        if not providers:
             raise ValueError("No LLM API key found")
+        return providers[0]
+
+    def _provider_chain(self) -> List[str]:
+        """
+        The primary provider followed by every lower-priority provider with a key.
+        """
+        providers = self.registry.available_providers()
+        return providers[providers.index(self.provider):]
 
-    def _initialize_client(self):
-        if self.provider == 'openai':
-            return OpenAI(api_key=OPENAI_API_KEY)
-        elif self.provider == 'anthropic':
-            return Anthropic(api_key=ANTHROPIC_API_KEY)
-        elif self.provider == 'gemini':
-            genai.configure(api_key=GOOGLE_API_KEY)
-            # Switching to stable Pro model to avoid 404/Quota errors with experimental versions
-            return genai.GenerativeModel('gemini-1.5-pro') 
-
-    def generate_text(self, prompt: str, system_prompt: str = None, temperature: float = 0.7) -> str:
-        if self.provider == 'openai':
+    def _initialize_cache(self) -> Optional[DiskCache]:
+        if not LLM_CACHE_ENABLED:
+            return None
+        try:
+            return DiskCache(LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES)
+        except Exception as e:
+            logger.warning(f"LLM response cache disabled: {e}")
+            return None
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        return {"hits": self.cache_hits, "misses": self.cache_misses}
+
+    def get_hedge_stats(self) -> Dict[str, int]:
+        return {"sent": self.hedges_sent, "won": self.hedges_won}
+
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """
+        Queueing this run saw in front of the shared provider schedulers.
+        """
+        return {
+            "calls": self.scheduled_calls,
+            "queued": self.queued_calls,
+            "total_wait": round(self.queue_wait_total, 2),
+            "max_wait": round(self.queue_wait_max, 2),
+            "max_queue_depth": max(
+                scheduler.get_stats()["max_queue_depth"] for scheduler in self.registry.schedulers.values()
+            )
+        }
+
+    def get_token_stats(self) -> Dict[str, int]:
+        return {"input": self.input_tokens, "output": self.output_tokens, "cached": self.cached_input_tokens}
+
+    def get_task_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Calls, cache hits, latency and tokens per task type.
+        """
+        with self._stats_lock:
+            stats = {task: dict(values) for task, values in self.task_stats.items()}
+        for values in stats.values():
+            values["avg_latency"] = round(values["latency"] / values["calls"], 2) if values["calls"] else None
+            values["latency"] = round(values["latency"], 2)
+        return stats
+
+    def _record_task(self, task: str, **increments: float):
+        with self._stats_lock:
+            values = self.task_stats.setdefault(task, {
+                "calls": 0, "cache_hits": 0, "latency": 0.0, "input_tokens": 0, "output_tokens": 0
+            })
+            for name, amount in increments.items():
+                values[name] += amount
+
+    def model_for(self, provider: str, task: str = DEFAULT_TASK) -> str:
+        """
+        The model a task type is routed to on a provider.
+        """
+        if self.TASK_TIERS.get(task, "quality") == "fast":
+            return self.FAST_MODELS.get(provider, self.MODELS[provider])
+        return self.MODELS[provider]
+
+    def get_ticker_stats(self) -> Dict[str, int]:
+        return {
+            "resolved_locally": self.tickers_resolved_locally,
+            "llm_calls_avoided": self.ticker_llm_calls_avoided
+        }
+
+    def generate_text(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                      prefix: Optional[str] = None, task: str = DEFAULT_TASK,
+                      cacheable: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Generate text, serving byte-identical requests from the response cache.
+        `prefix` is instruction text shared by many calls (format spec, themes); it is
+        sent ahead of `prompt` and marked cacheable where the provider supports it.
+        `cacheable(text)` rejects answers that must not be cached (or served from the cache),
+        e.g. malformed JSON.
+        """
+        if not self.cache:
+            return self._generate_uncached(prompt, system_prompt, temperature, prefix, task)
+
+        key = self._cache_key(prompt, system_prompt, temperature, prefix, task)
+        cached = self.cache.get(key)
+        if cached is not None and (cacheable is None or cacheable(cached)):
+            with self._stats_lock:
+                self.cache_hits += 1
+            self._record_task(task, cache_hits=1)
+            logger.info(f"LLM cache hit ({task})")
+            return cached
+
+        with self._stats_lock:
+            self.cache_misses += 1
+        provider, text = self._generate_answered(prompt, system_prompt, temperature, prefix, task)
+        if isinstance(text, str) and text and (cacheable is None or cacheable(text)):
+            # Keyed by the provider that answered, so a fallback or hedge win is never served as the primary's
+            self.cache.set(key if provider == self.provider else self._cache_key(
+                prompt, system_prompt, temperature, prefix, task, provider=provider), text)
+        return text
+
+    def _cache_key(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                   prefix: Optional[str] = None, task: str = DEFAULT_TASK, provider: Optional[str] = None) -> str:
+        provider = provider or self.provider
+        return DiskCache.make_key(provider, self.model_for(provider, task), system_prompt, prefix, prompt, temperature)
+
+    def stream_text(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                    prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> Iterator[str]:
+        """
+        Streaming variant of generate_text: yields text chunks as the provider produces them.
+        A provider that fails before its first chunk falls back to the next one; a failure
+        mid-stream is raised, since part of the answer has already been delivered.
+        The completed text goes into the response cache, and a cache hit is yielded whole.
+        """
+        key = None
+        if self.cache:
+            key = self._cache_key(prompt, system_prompt, temperature, prefix, task)
+            cached = self.cache.get(key)
+            if cached is not None:
+                with self._stats_lock:
+                    self.cache_hits += 1
+                self._record_task(task, cache_hits=1)
+                logger.info(f"LLM cache hit ({task})")
+                yield cached
+                return
+            with self._stats_lock:
+                self.cache_misses += 1
+
+        chunks = []
+        last_error = None
+        for provider in self._provider_chain():
+            breaker = self.registry.breakers[provider]
+            if not breaker.allow_request():
+                logger.info(f"Skipping {provider}: circuit open")
+                continue
+            if provider != self.provider:
+                logger.info(f"Falling back to {provider}...")
+            start = time.monotonic()
             try:
-                return self._generate_with_openai(prompt, system_prompt, temperature)
+                for chunk in self._stream_with(provider, prompt, system_prompt, temperature, prefix, task):
+                    if chunk:
+                        chunks.append(chunk)
+                        yield chunk
             except Exception as e:
-                logger.warning(f"OpenAI generation failed: {e}")
-                if ANTHROPIC_API_KEY:
-                    logger.info("Falling back to Anthropic (Claude)...")
-                    return self._generate_with_anthropic(prompt, system_prompt, temperature)
-                elif GOOGLE_API_KEY:
-                    logger.info("Falling back to Gemini...")
-                    return self._generate_with_gemini(prompt, system_prompt)
+                breaker.record_failure()
+                if chunks:
+                    raise
+                logger.warning(f"{provider} streaming failed: {e}")
+                last_error = e
+                continue
+            except BaseException:
+                # Closed early by the consumer (GeneratorExit) or interrupted: a half-open
+                # probe must still close or re-open the circuit, or the provider stays skipped
+                if chunks:
+                    breaker.record_success()
                 else:
-                    raise e
+                    breaker.record_failure()
+                raise
+            breaker.record_success()
+            self.registry.record_latency(provider, self._provider_latency(start), self.model_for(provider, task))
+            self._record_task(task, calls=1, latency=time.monotonic() - start)
+            self._record_usage(provider, self._user_text(prompt, prefix), system_prompt, "".join(chunks), task=task)
+            break
+        else:
+            if last_error is None:
+                raise RuntimeError("All LLM providers are unavailable (circuits open)")
+            raise last_error
+
+        text = "".join(chunks)
+        if key and text:
+            self.cache.set(key if provider == self.provider else self._cache_key(
+                prompt, system_prompt, temperature, prefix, task, provider=provider), text)
 
-        elif self.provider == 'anthropic':
+    def _generate_uncached(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                           prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> str:
+        return self._generate_answered(prompt, system_prompt, temperature, prefix, task)[1]
+
+    def _generate_answered(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                           prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> Tuple[str, str]:
+        """
+        Tries each provider in priority order, skipping those whose circuit is open.
+        Returns (provider that answered, text).
+        """
+        providers = self._provider_chain()
+        if LLM_HEDGE_ENABLED:
+            answered, result = self._generate_hedged(providers, prompt, system_prompt, temperature, prefix, task)
+            if answered:
+                return result
+            providers = result
+
+        last_error = None
+        for provider in providers:
+            breaker = self.registry.breakers[provider]
+            if not breaker.allow_request():
+                logger.info(f"Skipping {provider}: circuit open")
+                continue
+            if provider != self.provider:
+                logger.info(f"Falling back to {provider}...")
             try:
-                return self._generate_with_anthropic(prompt, system_prompt, temperature)
+                return provider, self._call_provider(provider, prompt, system_prompt, temperature, prefix, task)
             except Exception as e:
-                logger.warning(f"Anthropic generation failed: {e}")
-                if GOOGLE_API_KEY:
-                    logger.info("Falling back to Gemini...")
-                    return self._generate_with_gemini(prompt, system_prompt)
-                else:
-                    raise e
-        
-        elif self.provider == 'gemini':
-             # Gemini is last resort in this config, but if selected as primary (no other keys), it runs here
-            return self._generate_with_gemini(prompt, system_prompt)
+                logger.warning(f"{provider} generation failed: {e}")
+                last_error = e
+
+        if last_error is None:
+            raise RuntimeError("All LLM providers are unavailable (circuits open)")
+        raise last_error
+
+    def _call_provider(self, provider: str, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                       prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> str:
+        """
+        One provider call, feeding its circuit breaker and latency history.
+        """
+        breaker = self.registry.breakers[provider]
+        start = time.monotonic()
+        try:
+            text = self._generate_with(provider, prompt, system_prompt, temperature, prefix, task)
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        self.registry.record_latency(provider, self._provider_latency(start), self.model_for(provider, task))
+        self._record_task(task, calls=1, latency=time.monotonic() - start)
+        return text
+
+    def _provider_latency(self, start: float) -> float:
+        """
+        Seconds since the current call was admitted by the scheduler (queue wait excluded),
+        or since `start` if it was never admitted.
+        """
+        admitted_at = getattr(self._call_state, "admitted_at", None)
+        return time.monotonic() - (admitted_at if admitted_at is not None and admitted_at >= start else start)
+
+    def _reserve_hedge(self) -> bool:
+        with self._stats_lock:
+            if self.hedges_sent >= LLM_HEDGE_MAX_PER_RUN:
+                return False
+            self.hedges_sent += 1
+            return True
+
+    def _generate_hedged(self, providers: List[str], prompt: str, system_prompt: str,
+                         temperature: float, prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> Tuple[bool, Any]:
+        """
+        Sends the prompt to the first available provider. If it hasn't answered within
+        LLM_HEDGE_PERCENTILE of its observed latency, the same prompt also goes to the next
+        provider and the first complete answer wins. Backups run on their own pool so they
+        start immediately even when many primaries are in flight.
+        A losing call that has already started can't be cancelled: it runs to completion,
+        holding its scheduler slot and costing tokens, and its answer is discarded.
+        Returns (True, (provider, text)) when answered, otherwise (False, providers still
+        to try with the normal fallback loop).
+        """
+        available = [p for p in providers if self.registry.breakers[p].state == CircuitBreaker.CLOSED]
+        if len(available) < 2:
+            return False, providers
+        primary, backup = available[0], available[1]
+        # Samples of the model this task is routed to, so fast-tier calls don't set a deep dive's threshold
+        threshold = self.registry.latency_percentile(primary, LLM_HEDGE_PERCENTILE, self.model_for(primary, task))
+        if threshold is None:
+            return False, providers
+
+        primary_future = self.registry.hedge_executor.submit(self._call_provider, primary, prompt, system_prompt, temperature, prefix, task)
+        done, _ = wait([primary_future], timeout=threshold)
+        if not done:
+            if not self._reserve_hedge():
+                logger.info("Hedge budget exhausted for this run; waiting for primary")
+                wait([primary_future])
+            else:
+                logger.info(f"{primary} slower than p{LLM_HEDGE_PERCENTILE:g} ({threshold:.1f}s); hedging with {backup}")
+                futures = {primary_future: primary,
+                           self.registry.hedge_backup_executor.submit(self._call_provider, backup, prompt, system_prompt, temperature, prefix, task): backup}
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception() is None:
+                            for loser in pending:
+                                loser.cancel()
+                            if futures[future] == backup:
+                                with self._stats_lock:
+                                    self.hedges_won += 1
+                            logger.info(f"Hedged request answered by {futures[future]}")
+                            return True, (futures[future], future.result())
+                        logger.warning(f"{futures[future]} generation failed: {future.exception()}")
+                # Both failed: continue with the providers after the backup
+                return False, providers[providers.index(backup) + 1:]
 
-    def _generate_with_gemini(self, prompt: str, system_prompt: str = None) -> str:
+        if primary_future.exception() is None:
+            return True, (primary, primary_future.result())
+        logger.warning(f"{primary} generation failed: {primary_future.exception()}")
+        return False, providers[providers.index(primary) + 1:]
+
+    @classmethod
+    def _estimate_tokens(cls, provider: str, prompt: str, system_prompt: str = None) -> int:
+        # Prompt estimate plus the expected completion
+        return estimate_tokens(prompt, provider) + estimate_tokens(system_prompt, provider) + cls.ESTIMATED_OUTPUT_TOKENS
+
+    @staticmethod
+    def _usage_value(usage: Any, *path: str) -> Optional[int]:
+        value = usage
+        for name in path:
+            value = getattr(value, name, None)
+        return value if isinstance(value, int) else None
+
+    def _record_usage(self, provider: str, prompt: str, system_prompt: Optional[str], output: str,
+                      input_tokens: Optional[int] = None, output_tokens: Optional[int] = None,
+                      cached_tokens: Optional[int] = None, task: str = DEFAULT_TASK):
+        """
+        Logs and accumulates the token counts of one call. Counts the provider didn't
+        report are estimated from the text; `cached_tokens` is the part of the input
+        served from the provider's prompt cache.
+        """
+        estimated = input_tokens is None or output_tokens is None
+        if input_tokens is None:
+            input_tokens = estimate_tokens(prompt, provider) + estimate_tokens(system_prompt, provider)
+        if output_tokens is None:
+            output_tokens = estimate_tokens(output, provider)
+        cached_tokens = cached_tokens or 0
+        with self._stats_lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.cached_input_tokens += cached_tokens
+        self._record_task(task, input_tokens=input_tokens, output_tokens=output_tokens)
+        logger.info(f"{provider} {task} call: {input_tokens} input ({cached_tokens} cached) / {output_tokens} output tokens"
+                    + (" (estimated)" if estimated else ""))
+
+    @contextmanager
+    def _admit(self, provider: str, prompt: str, system_prompt: str = None):
+        """
+        Wait for the provider's shared scheduler, recording how long this run queued.
+        """
+        scheduler = self.registry.schedulers[provider]
+        depth = scheduler.get_stats()["queue_depth"]
+        with self.registry.slot(provider, self.run_id, self._estimate_tokens(provider, prompt, system_prompt)) as waited:
+            with self._stats_lock:
+                self.scheduled_calls += 1
+                if waited > 0.01:
+                    self.queued_calls += 1
+                self.queue_wait_total += waited
+                self.queue_wait_max = max(self.queue_wait_max, waited)
+            if waited >= 1.0:
+                logger.info(f"{provider} call waited {waited:.1f}s in the scheduler queue ({depth} ahead)")
+            self._call_state.admitted_at = time.monotonic()
+            yield
+
+    # Request layout: the stable parts (system prompt, then the shared `prefix`) always
+    # come first and the per-call prompt last, so providers can reuse the cached prefix.
+
+    @staticmethod
+    def _user_text(prompt: str, prefix: Optional[str] = None) -> str:
+        return f"{prefix}\n\n{prompt}" if prefix else prompt
+
+    def _gemini_prompt(self, prompt: str, system_prompt: str = None, prefix: Optional[str] = None) -> str:
         # Gemini doesn't have a separate system prompt in the same way, usually prepended
-        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-        response = self.client.generate_content(full_prompt)
-        return response.text
+        user_text = self._user_text(prompt, prefix)
+        return f"{system_prompt}\n\n{user_text}" if system_prompt else user_text
 
-    def _generate_with_openai(self, prompt: str, system_prompt: str = None, temperature: float = 0.7) -> str:
-        # Ensure we have a client if falling back
-        client = self.client if self.provider == 'openai' else OpenAI(api_key=OPENAI_API_KEY)
-        
+    def _openai_messages(self, prompt: str, system_prompt: str = None, prefix: Optional[str] = None) -> List[Dict[str, str]]:
+        # OpenAI caches prompt prefixes of 1024+ tokens automatically; nothing to mark
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-        
-        response = client.chat.completions.create(
-            # Reverting to stable model
-            model="gpt-4o",
-            messages=messages,
-            temperature=temperature
-        )
-        return response.choices[0].message.content
-
-    def _generate_with_anthropic(self, prompt: str, system_prompt: str = None, temperature: float = 0.7) -> str:
-        messages = [{"role": "user", "content": prompt}]
+        messages.append({"role": "user", "content": self._user_text(prompt, prefix)})
+        return messages
+
+    def _anthropic_kwargs(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                          prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> Dict[str, Any]:
+        # Anthropic caches everything up to the last cache_control breakpoint
+        cache_control = {"type": "ephemeral"}
+        content: Any = prompt
+        if prefix:
+            content = [
+                {"type": "text", "text": prefix, "cache_control": cache_control},
+                {"type": "text", "text": prompt}
+            ]
         kwargs = {
-            # Reverting to stable model
-            "model": "claude-3-5-sonnet-20241022",
+            "model": self.model_for('anthropic', task),
             "max_tokens": 4000,
-            "messages": messages,
+            "messages": [{"role": "user", "content": content}],
             "temperature": temperature
         }
         if system_prompt:
-            kwargs["system"] = system_prompt
+            system_block = {"type": "text", "text": system_prompt}
+            if not prefix:
+                system_block["cache_control"] = cache_control
+            kwargs["system"] = [system_block]
+        return kwargs
+
+    def _generate_with(self, provider: str, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                       prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> str:
+        if provider == 'openai':
+            return self._generate_with_openai(prompt, system_prompt, temperature, prefix, task)
+        elif provider == 'anthropic':
+            return self._generate_with_anthropic(prompt, system_prompt, temperature, prefix, task)
+        elif provider == 'gemini':
+            return self._generate_with_gemini(prompt, system_prompt, prefix, task)
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    def _generate_with_gemini(self, prompt: str, system_prompt: str = None, prefix: Optional[str] = None,
+                              task: str = DEFAULT_TASK) -> str:
+        full_prompt = self._gemini_prompt(prompt, system_prompt, prefix)
+        client = self.registry.get_client('gemini', self.model_for('gemini', task))
+        with self._admit('gemini', full_prompt):
+            response = client.generate_content(full_prompt)
+        usage = getattr(response, 'usage_metadata', None)
+        self._record_usage('gemini', full_prompt, None, response.text,
+                           self._usage_value(usage, 'prompt_token_count'), self._usage_value(usage, 'candidates_token_count'),
+                           self._usage_value(usage, 'cached_content_token_count'), task)
+        return response.text
+
+    def _generate_with_openai(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                              prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> str:
+        client = self.registry.get_client('openai')
+        user_text = self._user_text(prompt, prefix)
+        
+        with self._admit('openai', user_text, system_prompt):
+            response = client.chat.completions.create(
+                model=self.model_for('openai', task),
+                messages=self._openai_messages(prompt, system_prompt, prefix),
+                temperature=temperature
+            )
+        text = response.choices[0].message.content
+        usage = getattr(response, 'usage', None)
+        self._record_usage('openai', user_text, system_prompt, text,
+                           self._usage_value(usage, 'prompt_tokens'), self._usage_value(usage, 'completion_tokens'),
+                           self._usage_value(usage, 'prompt_tokens_details', 'cached_tokens'), task)
+        return text
+
+    def _generate_with_anthropic(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                                 prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> str:
+        client = self.registry.get_client('anthropic')
+        user_text = self._user_text(prompt, prefix)
         
-        response = self.client.messages.create(**kwargs)
-        return response.content[0].text
+        with self._admit('anthropic', user_text, system_prompt):
+            response = client.messages.create(**self._anthropic_kwargs(prompt, system_prompt, temperature, prefix, task))
+        text = response.content[0].text
+        usage = getattr(response, 'usage', None)
+        input_tokens = self._usage_value(usage, 'input_tokens')
+        cache_read = self._usage_value(usage, 'cache_read_input_tokens')
+        cache_write = self._usage_value(usage, 'cache_creation_input_tokens')
+        if input_tokens is not None:
+            # Anthropic reports cache reads/writes separately from the uncached input
+            input_tokens += (cache_read or 0) + (cache_write or 0)
+        self._record_usage('anthropic', user_text, system_prompt, text,
+                           input_tokens, self._usage_value(usage, 'output_tokens'), cache_read, task)
+        return text
+
+    def _stream_with(self, provider: str, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                     prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> Iterator[str]:
+        if provider == 'openai':
+            return self._stream_with_openai(prompt, system_prompt, temperature, prefix, task)
+        elif provider == 'anthropic':
+            return self._stream_with_anthropic(prompt, system_prompt, temperature, prefix, task)
+        elif provider == 'gemini':
+            return self._stream_with_gemini(prompt, system_prompt, prefix, task)
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    def _stream_with_gemini(self, prompt: str, system_prompt: str = None, prefix: Optional[str] = None,
+                            task: str = DEFAULT_TASK) -> Iterator[str]:
+        full_prompt = self._gemini_prompt(prompt, system_prompt, prefix)
+        client = self.registry.get_client('gemini', self.model_for('gemini', task))
+        with self._admit('gemini', full_prompt):
+            for chunk in client.generate_content(full_prompt, stream=True):
+                if chunk.text:
+                    yield chunk.text
+
+    def _stream_with_openai(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                            prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> Iterator[str]:
+        client = self.registry.get_client('openai')
+        with self._admit('openai', self._user_text(prompt, prefix), system_prompt):
+            stream = client.chat.completions.create(
+                model=self.model_for('openai', task),
+                messages=self._openai_messages(prompt, system_prompt, prefix),
+                temperature=temperature,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
 
-    def generate_json(self, prompt: str, system_prompt: str = None) -> Dict[str, Any]:
+    def _stream_with_anthropic(self, prompt: str, system_prompt: str = None, temperature: float = 0.7,
+                               prefix: Optional[str] = None, task: str = DEFAULT_TASK) -> Iterator[str]:
+        client = self.registry.get_client('anthropic')
+        with self._admit('anthropic', self._user_text(prompt, prefix), system_prompt):
+            with client.messages.stream(**self._anthropic_kwargs(prompt, system_prompt, temperature, prefix, task)) as stream:
+                for text in stream.text_stream:
+                    yield text
+
+    def generate_json(self, prompt: str, system_prompt: str = None, task: str = DEFAULT_TASK) -> Dict[str, Any]:
         """
         Generate JSON output. 
         Note: For robust JSON generation, we might need provider-specific 'json_mode' or parsing.
         """
         json_prompt = f"{prompt}\n\nIMPORTANT: Output ONLY valid JSON."
-        response_text = self.generate_text(json_prompt, system_prompt, temperature=0.2)
+        # An unparseable answer is not cached, so a rerun asks again instead of replaying it
+        response_text = self.generate_text(json_prompt, system_prompt, temperature=0.2, task=task,
+                                           cacheable=self._is_valid_json)
         
         # Clean up markdown code blocks if present
-        cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
+        cleaned_text = self._strip_code_fences(response_text)
         
         try:
             return json.loads(cleaned_text)
@@ -121,11 +583,45 @@ class LLMService:
             logger.error(f"Failed to parse JSON from LLM response: {cleaned_text}")
             raise e
 
+    @staticmethod
+    def _strip_code_fences(text: str) -> str:
+        return text.replace("```json", "").replace("```", "").strip()
+
+    @classmethod
+    def _is_valid_json(cls, text: str) -> bool:
+        try:
+            json.loads(cls._strip_code_fences(text))
+            return True
+        except json.JSONDecodeError:
+            return False
+
+    def _resolve_ticker_locally(self, text: str) -> Optional[Dict[str, Any]]:
+        resolver = getattr(self, 'ticker_resolver', None)
+        match = resolver.match(text) if resolver else None
+        if match:
+            with self._stats_lock:
+                self.tickers_resolved_locally += 1
+            logger.info(f"Resolved ticker locally: {match['alias']} -> {match['symbol']}")
+        return match
+
+    def _record_avoided_ticker_call(self):
+        with self._stats_lock:
+            self.ticker_llm_calls_avoided += 1
+
     def extract_ticker(self, text: str) -> Optional[str]:
         """
-        Extract the primary stock ticker from the given text using a high-quality model.
+        Extract the primary stock ticker from the given text.
+        The offline resolver is consulted first; the LLM (fast tier) is only used when it finds nothing.
         Returns the ticker symbol (e.g., "AAPL") or None if not found.
         """
+        match = self._resolve_ticker_locally(text)
+        if match:
+            self._record_avoided_ticker_call()
+            return match['symbol']
+
+        return self._extract_ticker_with_llm(text)
+
+    def _extract_ticker_with_llm(self, text: str) -> Optional[str]:
         prompt = f"""
 Identify the primary publicly traded company mentioned in the following news text and return its stock ticker symbol.
 If multiple companies are mentioned, choose the most relevant one.
@@ -136,20 +632,88 @@ Text: {text}
 Output format: Just the ticker symbol (e.g., AAPL) or "None". No other text.
 """
         try:
-            # Use generate_text which defaults to the configured high-quality provider (OpenAI/Claude)
-            ticker = self.generate_text(prompt, temperature=0.0).strip()
-            
-            # Basic cleanup
-            ticker = ticker.replace('"', '').replace("'", "").replace(".", "")
-            
-            if ticker.lower() == "none":
-                return None
-            
-            return ticker
+            # Routed to the provider's fast model tier
+            ticker = self.generate_text(prompt, temperature=0.0, task="ticker")
+            return self._clean_ticker(ticker)
         except Exception as e:
             logger.error(f"Ticker extraction failed: {e}")
             return None
 
+    def extract_tickers(self, titles: List[str],
+                        on_resolved: Optional[Callable[[int, Optional[str]], None]] = None) -> List[Optional[str]]:
+        """
+        Extract the primary stock ticker for each headline with a single structured call.
+        Headlines known to the offline resolver never reach the LLM. Returns a list aligned
+        with `titles`; headlines missing from an unparseable or incomplete batch response
+        fall back to one single-headline call each.
+        `on_resolved(index, ticker)` is called as soon as each ticker is known, so callers
+        can start follow-up work for locally resolved headlines while the LLM call runs.
+        """
+        if not titles:
+            return []
+
+        # Resolve well-known company names offline; only the rest go to the LLM
+        tickers: Dict[int, Optional[str]] = {}
+        unresolved = []
+        for i, title in enumerate(titles, 1):
+            match = self._resolve_ticker_locally(title)
+            if match:
+                tickers[i] = match['symbol']
+                if on_resolved:
+                    on_resolved(i - 1, tickers[i])
+            else:
+                unresolved.append(i)
+
+        if not unresolved:
+            self._record_avoided_ticker_call()
+            return [tickers[i] for i in range(1, len(titles) + 1)]
+
+        headlines = "\n".join(f"{n}. {titles[i - 1]}" for n, i in enumerate(unresolved, 1))
+        prompt = f"""
+For each numbered news headline below, identify the primary publicly traded company mentioned and return its stock ticker symbol.
+If multiple companies are mentioned, choose the most relevant one.
+If no public company is mentioned, use null.
+
+Headlines:
+{headlines}
+
+Output format: A JSON object mapping each headline number to its ticker, e.g. {{"1": "AAPL", "2": null}}
+"""
+        try:
+            result = self.generate_json(prompt, task="ticker")
+            if isinstance(result, list):
+                result = {str(n): value for n, value in enumerate(result, 1)}
+            for n, i in enumerate(unresolved, 1):
+                if str(n) in result:
+                    tickers[i] = self._clean_ticker(result[str(n)])
+                    if on_resolved:
+                        on_resolved(i - 1, tickers[i])
+        except Exception as e:
+            logger.warning(f"Batch ticker extraction failed, falling back to per-headline calls: {e}")
+
+        missing = [i for i in range(1, len(titles) + 1) if i not in tickers]
+        if missing:
+            logger.info(f"Resolving {len(missing)} ticker(s) individually")
+        for i in missing:
+            tickers[i] = self._extract_ticker_with_llm(titles[i - 1])
+            if on_resolved:
+                on_resolved(i - 1, tickers[i])
+
+        return [tickers[i] for i in range(1, len(titles) + 1)]
+
+    @staticmethod
+    def _clean_ticker(raw: Any) -> Optional[str]:
+        if raw is None:
+            return None
+        
+        # Basic cleanup
+        ticker = str(raw).strip().replace('"', '').replace("'", "").replace(".", "")
+        
+        if not ticker or ticker.lower() in ("none", "null"):
+            return None
+        
+        return ticker
+
     # --- Prompts ---
 
     @staticmethod
@@ -0,0 +1,91 @@
+import re
+import zlib
+import logging
+import numpy as np
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_MAX_HASH = (1 << 32) - 1
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles of normalised text. Character
+    shingles survive light rewording ("jumps" / "jumped", "U.S." / "US") far better
+    than word shingles, which matters for short headline + description pairs.
+    The permutations are seeded, so signatures are stable across runs.
+    """
+    def __init__(self, num_perm: int = 128, shingle_size: int = 4, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.shingle_size = shingle_size
+        # Multiply-shift hashing: h(x) = (a * x + b) >> 32 with odd 64-bit a, wrapping mod 2^64
+        self.a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    def _shingles(self, text: str) -> np.ndarray:
+        text = re.sub(r"[^\w ]+", "", re.sub(r"\s+", " ", text.lower())).strip()
+        size = self.shingle_size
+        grams = {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+        return np.array([zlib.crc32(g.encode("utf-8")) for g in grams if g], dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self._shingles(text)
+        if hashes.size == 0:
+            return np.full(len(self.a), _MAX_HASH, dtype=np.uint64)
+        # (num_perm, num_shingles)
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1)
+
+def similarity_matrix(signatures: np.ndarray) -> np.ndarray:
+    """
+    Estimated Jaccard similarity for every pair: the share of matching MinHash slots.
+    """
+    return (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+
+def cluster_near_duplicates(articles: List[Dict[str, Any]], threshold: float = 0.5,
+                            hasher: MinHasher = None) -> List[Dict[str, Any]]:
+    """
+    Groups articles whose title + description are near-duplicates (estimated Jaccard
+    similarity >= threshold, transitively) and returns one representative per cluster
+    in input order. The first article of each cluster is kept, so callers pass the
+    list best-first; the others are attached to it as `related_sources`.
+    """
+    if len(articles) < 2:
+        return list(articles)
+
+    hasher = hasher or MinHasher()
+    signatures = np.stack([
+        hasher.signature(f"{a.get('title', '')} {a.get('description') or ''}") for a in articles
+    ])
+    similar = similarity_matrix(signatures) >= threshold
+
+    # Union-find over the similar pairs; the root is always the earliest article
+    parent = list(range(len(articles)))
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(similar, k=1))):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    representatives = []
+    members: Dict[int, List[Dict[str, Any]]] = {}
+    for i, article in enumerate(articles):
+        root = find(i)
+        if root == i:
+            representatives.append(article)
+            members[i] = []
+        else:
+            members[root].append(article)
+            logger.info(f"Near-duplicate of '{articles[root]['title']}': {article['title']} ({article.get('source')})")
+
+    for i, others in members.items():
+        if others:
+            articles[i]['related_sources'] = [
+                {"title": a['title'], "source": a.get('source'), "url": a.get('url')} for a in others
+            ]
+    return representatives
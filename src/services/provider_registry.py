@@ -0,0 +1,179 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import google.generativeai as genai
+from openai import OpenAI
+from anthropic import Anthropic
+from src.services.llm_scheduler import ProviderScheduler
+from src.config import (
+    GOOGLE_API_KEY, OPENAI_API_KEY, ANTHROPIC_API_KEY, LLM_MAX_INFLIGHT, LLM_RPM_LIMIT, LLM_TPM_LIMIT,
+    LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_COOLDOWN_SECONDS, LLM_HEDGE_MIN_SAMPLES
+)
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Per-provider breaker. After `failure_threshold` consecutive failures the circuit
+    opens and callers skip the provider. Once `cooldown_seconds` have passed, a single
+    probe request is let through (half-open); its outcome closes or re-opens the circuit.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, cooldown_seconds: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                # Let exactly one probe through; concurrent callers keep using the fallback
+                self.state = self.HALF_OPEN
+                logger.info(f"Circuit for {self.name} half-open: probing provider")
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} consecutive failure(s)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+class ProviderRegistry:
+    """
+    Process-wide home for long-lived provider clients (and their HTTP pools),
+    circuit breakers, request schedulers (in-flight, RPM and TPM limits) and
+    observed call latencies.
+    """
+    LATENCY_WINDOW = 200
+
+    # Priority: OpenAI -> Anthropic -> Gemini
+    PROVIDER_ORDER = ['openai', 'anthropic', 'gemini']
+
+    # Reverting to stable models
+    MODELS = {
+        'openai': "gpt-4o",
+        'anthropic': "claude-3-5-sonnet-20241022",
+        # Switching to stable Pro model to avoid 404/Quota errors with experimental versions
+        'gemini': "gemini-1.5-pro",
+    }
+
+    def __init__(self):
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.breakers = {
+            provider: CircuitBreaker(provider, LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_COOLDOWN_SECONDS)
+            for provider in self.PROVIDER_ORDER
+        }
+        self.schedulers = {
+            provider: ProviderScheduler(
+                provider,
+                rpm=LLM_RPM_LIMIT.get(provider, 0),
+                tpm=LLM_TPM_LIMIT.get(provider, 0),
+                max_inflight=LLM_MAX_INFLIGHT.get(provider, 1)
+            )
+            for provider in self.PROVIDER_ORDER
+        }
+        # (provider, model) -> recent call latencies; fast and quality tiers are timed apart
+        self._latencies: Dict[Tuple[str, Optional[str]], Deque[float]] = {}
+        # Hedged requests: primaries and backups get separate pools, so a backup never
+        # queues behind the slow primaries it is meant to overtake
+        self.hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+        self.hedge_backup_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge-backup")
+
+    @staticmethod
+    def has_key(provider: str) -> bool:
+        return bool({
+            'openai': OPENAI_API_KEY,
+            'anthropic': ANTHROPIC_API_KEY,
+            'gemini': GOOGLE_API_KEY,
+        }.get(provider))
+
+    def available_providers(self) -> List[str]:
+        return [provider for provider in self.PROVIDER_ORDER if self.has_key(provider)]
+
+    def get_client(self, provider: str, model: Optional[str] = None) -> Any:
+        """
+        Returns the shared client for a provider, creating it on first use.
+        Gemini clients are bound to a model, so each routed Gemini model gets its own.
+        """
+        key = provider
+        if provider == 'gemini' and model and model != self.MODELS['gemini']:
+            key = f"gemini/{model}"
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._create_client(provider, model)
+                logger.info(f"Created shared {key} client")
+            return self._clients[key]
+
+    def _create_client(self, provider: str, model: Optional[str] = None) -> Any:
+        if provider == 'openai':
+            return OpenAI(api_key=OPENAI_API_KEY)
+        elif provider == 'anthropic':
+            return Anthropic(api_key=ANTHROPIC_API_KEY)
+        elif provider == 'gemini':
+            genai.configure(api_key=GOOGLE_API_KEY)
+            return genai.GenerativeModel(model or self.MODELS['gemini'])
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    def record_latency(self, provider: str, seconds: float, model: Optional[str] = None):
+        with self._lock:
+            self._latencies.setdefault((provider, model), deque(maxlen=self.LATENCY_WINDOW)).append(seconds)
+
+    def latency_percentile(self, provider: str, percentile: float, model: Optional[str] = None) -> Optional[float]:
+        """
+        The given percentile (0-100) of recent successful call latencies of one provider
+        model, or None until at least LLM_HEDGE_MIN_SAMPLES calls have been observed.
+        """
+        with self._lock:
+            samples = sorted(self._latencies.get((provider, model), ()))
+        if len(samples) < max(1, LLM_HEDGE_MIN_SAMPLES):
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    @contextmanager
+    def slot(self, provider: str, run_id: str = "default", tokens: int = 0):
+        """
+        Wait for the provider's scheduler to admit the call, then hold one of its
+        in-flight slots for the duration of the call. Yields the queue wait in seconds.
+        """
+        with self.schedulers[provider].slot(run_id, tokens) as waited:
+            yield waited
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_provider_registry() -> ProviderRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ProviderRegistry()
+    return _registry
@@ -0,0 +1,120 @@
+import os
+import re
+import json
+import math
+import logging
+import threading
+import numpy as np
+from typing import Dict, Any, Iterable, List, Optional
+from src.config import EXCLUDED_KEYWORDS, NON_US_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "relevance_weights.json")
+
+# Acronyms that only count in upper case, so the pronoun "us" or "eu" in running text don't match
+CASE_SENSITIVE_ACRONYMS = {"US", "UK", "EU", "ECB", "NFL", "NBA", "MLB", "NHL"}
+
+US_KEYWORDS = ["US", "U.S.", "american", "wall street", "fed", "federal reserve", "dollar", "nasdaq", "nyse", "dow"]
+
+def compile_keywords(keywords: Iterable[str], plurals: bool = False) -> re.Pattern:
+    """
+    One word-boundary regex for a keyword list. Acronyms in CASE_SENSITIVE_ACRONYMS
+    ("UK", "EU", "US") only match in upper case, so the pronoun "us" doesn't count;
+    everything else ("fed", "dow", "cup") is case-insensitive.
+    """
+    alternatives = []
+    for keyword in sorted({k.strip() for k in keywords if k.strip()}, key=len, reverse=True):
+        escaped = re.escape(keyword) + ("s?" if plurals else "")
+        if keyword.upper() in CASE_SENSITIVE_ACRONYMS:
+            # "(?-i:...)" keeps acronyms case-sensitive inside the case-insensitive pattern
+            escaped = f"(?-i:{re.escape(keyword.upper())})"
+        alternatives.append(escaped)
+    return re.compile(r"(?<![\w.])(?:" + "|".join(alternatives) + r")(?![\w])", re.IGNORECASE)
+
+class RelevanceScorer:
+    """
+    Local market-relevance filter and ranker for headlines.
+    Keyword rules use precompiled word-boundary matchers; the score is a linear
+    classifier over TF-IDF features (unigrams + bigrams) with weights shipped in
+    src/data/relevance_weights.json. Scores are probabilities in [0, 1].
+    """
+    def __init__(self, path: str = DEFAULT_WEIGHTS_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.bias = float(data.get("bias", 0.0))
+        self.scale = float(data.get("scale", 1.0))
+        vocabulary = sorted(data["weights"])
+        self.index = {term: i for i, term in enumerate(vocabulary)}
+        self.idf = np.array([data["idf"].get(term, 1.0) for term in vocabulary])
+        self.weights = np.array([data["weights"][term] for term in vocabulary])
+
+        self.excluded = compile_keywords(EXCLUDED_KEYWORDS, plurals=True)
+        self.non_us = compile_keywords(NON_US_KEYWORDS)
+        self.us = compile_keywords(US_KEYWORDS)
+        logger.info(f"Relevance scorer loaded {len(vocabulary)} weighted terms")
+
+    def rejection_reason(self, title: str) -> Optional[str]:
+        """
+        "lifestyle" or "non_us" when a headline fails the keyword rules, else None.
+        """
+        match = self.excluded.search(title)
+        if match:
+            return f"lifestyle ({match.group(0)})"
+        # Non-US (UK/EU) headlines are only kept when they also mention the US market
+        if self.non_us.search(title) and not self.us.search(title):
+            return "non_us"
+        return None
+
+    def _features(self, text: str) -> List[int]:
+        words = re.findall(r"[a-z0-9&$-]+", text.lower())
+        terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return [self.index[term] for term in terms if term in self.index]
+
+    def score(self, title: str, description: str = "") -> float:
+        return self.score_many([(title, description)])[0]
+
+    def score_many(self, texts: List[tuple]) -> List[float]:
+        """
+        Scores (title, description) pairs in one pass. The title counts double.
+        """
+        if not texts:
+            return []
+        matrix = np.zeros((len(texts), len(self.index)))
+        for row, (title, description) in enumerate(texts):
+            indices = self._features(f"{title} {title} {description or ''}")
+            if indices:
+                matrix[row] = np.bincount(indices, minlength=len(self.index))
+        # Sublinear TF x IDF, L2-normalised per document
+        tfidf = np.where(matrix > 0, 1 + np.log(np.maximum(matrix, 1)), 0) * self.idf
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        tfidf = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+        logits = self.bias + self.scale * (tfidf @ self.weights)
+        return [1 / (1 + math.exp(-logit)) for logit in logits]
+
+    def rank(self, articles: List[Dict[str, Any]], min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Sets `relevance_score` on each article and returns those scoring at least
+        `min_score`, most relevant first (ties keep the original order).
+        """
+        scores = self.score_many([(a.get('title', ''), a.get('description') or '') for a in articles])
+        kept = []
+        for article, score in zip(articles, scores):
+            article['relevance_score'] = round(score, 3)
+            if score >= min_score:
+                kept.append(article)
+            else:
+                logger.info(f"Skipping low-relevance article ({score:.2f}): {article.get('title')}")
+        return sorted(kept, key=lambda a: a['relevance_score'], reverse=True)
+
+_scorer: Optional[RelevanceScorer] = None
+_scorer_lock = threading.Lock()
+
+def get_relevance_scorer() -> RelevanceScorer:
+    global _scorer
+    if _scorer is None:
+        with _scorer_lock:
+            if _scorer is None:
+                _scorer = RelevanceScorer()
+    return _scorer
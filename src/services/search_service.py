@@ -1,63 +1,173 @@
+import re
 import logging
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Any, Optional, Tuple
 from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import RatelimitException
 import time
-import random
+from src.config import (
+    SEARCH_MAX_WORKERS, SEARCH_RATE_PER_SECOND, SEARCH_RATE_BURST, SEARCH_MAX_RETRIES,
+    SEARCH_CACHE_ENABLED, SEARCH_CACHE_PATH, SEARCH_CACHE_TTL_SECONDS,
+    SEARCH_NEGATIVE_CACHE_TTL_SECONDS, SEARCH_CACHE_MAX_ENTRIES
+)
+from src.utils.disk_cache import DiskCache
+from src.utils.rate_limiter import TokenBucket, backoff_delay
+from src.services.token_budget import format_snippets
 
 logger = logging.getLogger(__name__)
 
+_rate_limiter: Optional[TokenBucket] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_shared_lock = threading.Lock()
+
+def get_search_limits() -> Tuple[TokenBucket, ThreadPoolExecutor]:
+    """
+    Process-wide DuckDuckGo rate limiter and worker pool. Every SearchService (concurrent
+    report runs, the background poller) shares them, so the rate limit caps the process.
+    """
+    global _rate_limiter, _executor
+    if _rate_limiter is None:
+        with _shared_lock:
+            if _rate_limiter is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, SEARCH_MAX_WORKERS), thread_name_prefix="search")
+                _rate_limiter = TokenBucket(SEARCH_RATE_PER_SECOND, SEARCH_RATE_BURST)
+    return _rate_limiter, _executor
+
 class SearchService:
     def __init__(self):
-        self.ddgs = DDGS()
+        # DDGS keeps a session per instance, so each worker thread gets its own
+        self._local = threading.local()
+        self.rate_limiter, self.executor = get_search_limits()
+        self.cache = self._initialize_cache()
+
+    def _initialize_cache(self) -> Optional[DiskCache]:
+        if not SEARCH_CACHE_ENABLED:
+            return None
+        try:
+            return DiskCache(SEARCH_CACHE_PATH, SEARCH_CACHE_TTL_SECONDS, SEARCH_CACHE_MAX_ENTRIES)
+        except Exception as e:
+            logger.warning(f"Search result cache disabled: {e}")
+            return None
+
+    @staticmethod
+    def normalize_query(search_query: str) -> str:
+        """
+        Cache key form of a query: lowercase words, punctuation and extra whitespace dropped.
+        """
+        return " ".join(re.findall(r"[\w$&]+", search_query.lower()))
+
+    @property
+    def ddgs(self) -> DDGS:
+        if not hasattr(self._local, "ddgs"):
+            self._local.ddgs = DDGS()
+        return self._local.ddgs
+
+    def _search_with_backoff(self, search_query: str, max_results: int) -> List[Dict[str, Any]]:
+        """
+        Runs a DuckDuckGo text search under the shared rate limiter,
+        retrying rate-limit errors with exponential backoff and jitter.
+        """
+        for attempt in range(SEARCH_MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            try:
+                return self.ddgs.text(search_query, max_results=max_results) or []
+            except RatelimitException as e:
+                if attempt == SEARCH_MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt, base=2.0)
+                logger.warning(f"Search rate limited ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return []
 
     def search_news_context(self, query: str, ticker: str = None, max_results: int = 5) -> str:
         """
         Search for additional context using DuckDuckGo.
         Returns a combined string of snippets.
         """
+        return self._get_context(query, ticker, max_results)['context']
+
+    def _get_context(self, query: str, ticker: str = None, max_results: int = 5) -> Dict[str, Any]:
+        """
+        Returns {"context": str, "results": list of {"title", "body", "href"}, "cached_at": Optional[float]}.
+        Results come from the cache while fresh; failed searches are cached for a
+        shorter window so a failing query isn't retried on every run.
+        """
+        # Construct high-precision query
+        # Add (Bloomberg OR Reuters OR "Wall Street Journal") to prioritize high-quality syndicated content
+        sources_hint = '(Bloomberg OR Reuters OR "Wall Street Journal")'
+        
+        if ticker:
+            search_query = f"${ticker} stock price reaction {query} {sources_hint}"
+        else:
+            search_query = f"{query} latest update stock price {sources_hint}"
+
+        cache_key = DiskCache.make_key(self.normalize_query(search_query), max_results)
+        entry = self.cache.get(cache_key) if self.cache else None
+        if entry is not None:
+            logger.info(f"Search cache hit: {search_query}")
+            results = entry.get('results') or []
+            # Only real cached context gets a timestamp (and the "(cached)" note); not a cached miss
+            return {"context": self._format_entry(entry), "results": results,
+                    "cached_at": entry['fetched_at'] if results else None}
+
         try:
-            # Construct high-precision query
-            # Add (Bloomberg OR Reuters OR "Wall Street Journal") to prioritize high-quality syndicated content
-            sources_hint = '(Bloomberg OR Reuters OR "Wall Street Journal")'
-            
-            if ticker:
-                search_query = f"${ticker} stock price reaction {query} {sources_hint}"
-            else:
-                search_query = f"{query} latest update stock price {sources_hint}"
-            
             logger.info(f"Searching web for: {search_query}")
             
-            results = self.ddgs.text(search_query, max_results=max_results)
-            
-            if not results:
-                return "No additional context found via web search."
-
-            context_parts = []
-            for r in results:
-                title = r.get('title', 'No Title')
-                snippet = r.get('body', '')
-                link = r.get('href', '')
-                context_parts.append(f"Source: {title} ({link})\nSummary: {snippet}")
-            
-            combined_context = "\n\n".join(context_parts)
-            return combined_context
+            results = self._search_with_backoff(search_query, max_results)
+            entry = {"ok": True, "results": results, "fetched_at": time.time()}
+            ttl = SEARCH_CACHE_TTL_SECONDS
 
         except Exception as e:
             logger.error(f"Web search failed for '{query}': {e}")
-            return f"Search failed: {e}"
+            entry = {"ok": False, "error": str(e), "fetched_at": time.time()}
+            ttl = SEARCH_NEGATIVE_CACHE_TTL_SECONDS
+
+        if self.cache:
+            self.cache.set(cache_key, entry, ttl_seconds=ttl)
+        return {"context": self._format_entry(entry), "results": entry.get('results') or [], "cached_at": None}
+
+    @staticmethod
+    def _format_entry(entry: Dict[str, Any]) -> str:
+        if not entry['ok']:
+            return f"Search failed: {entry['error']}"
+
+        results = entry['results']
+        if not results:
+            return "No additional context found via web search."
+
+        return format_snippets(results)
 
     def enrich_article(self, article: Dict[str, Any], ticker: str = None) -> Dict[str, Any]:
         """
         Add search context to an article dictionary.
+        Pacing is handled by the shared rate limiter.
+        `search_context_cached_at` is set (epoch seconds) when non-empty context came from the cache.
+        `search_results` keeps the raw results so prompts can budget them.
         """
-        # Sleep briefly to avoid rate limits if calling in a loop
-        time.sleep(random.uniform(1.0, 2.0))
-        
         title = article.get('title', '')
         if title:
-            context = self.search_news_context(title, ticker=ticker)
-            article['search_context'] = context
+            result = self._get_context(title, ticker=ticker)
+            article['search_context'] = result['context']
+            article['search_results'] = result['results']
+            article['search_context_cached_at'] = result['cached_at']
         else:
             article['search_context'] = "No title to search."
+            article['search_results'] = []
+            article['search_context_cached_at'] = None
             
         return article
+
+    def submit_enrichment(self, article: Dict[str, Any], ticker: str = None) -> Future:
+        """
+        Schedule enrich_article on the search pool. The future resolves to the enriched article.
+        """
+        return self.executor.submit(self.enrich_article, article, ticker)
+
+    def enrich_articles(self, articles: List[Dict[str, Any]], tickers: Optional[List[Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Enrich several articles concurrently. Results are returned in input order.
+        """
+        tickers = tickers or [article.get('ticker') for article in articles]
+        futures = [self.submit_enrichment(article, ticker) for article, ticker in zip(articles, tickers)]
+        return [future.result() for future in futures]
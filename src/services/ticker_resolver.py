@@ -0,0 +1,70 @@
+import os
+import re
+import json
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALIASES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "ticker_aliases.json")
+
+class TickerResolver:
+    """
+    Offline company-name -> ticker lookup.
+    All aliases from the bundled table are compiled once into a single regex,
+    so resolving a headline is one scan over the text.
+    """
+    def __init__(self, path: str = DEFAULT_ALIASES_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        # alias -> symbol; None marks well-known private companies (no ticker, no LLM call needed)
+        self.aliases: Dict[str, Optional[str]] = {}
+        for company in data.get("companies", []):
+            for alias in company["aliases"]:
+                self.aliases[alias] = company["symbol"]
+        for name in data.get("private", []):
+            self.aliases[name] = None
+
+        # Longest alias first so "Meta Platforms" wins over "Meta".
+        # Case-sensitive on purpose: company names are capitalised in headlines.
+        alternatives = sorted(self.aliases, key=len, reverse=True)
+        self.pattern = re.compile(
+            r"(?<![\w&.-])(" + "|".join(re.escape(alias) for alias in alternatives) + r")(?![\w&-])"
+        )
+        logger.info(f"Ticker resolver loaded {len(self.aliases)} aliases")
+
+    def match(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns {"alias": ..., "symbol": ...} for the first public company named in the text,
+        or None if no known company is mentioned. A symbol of None means the text only
+        names known private companies ("OpenAI buys Nvidia chips" resolves to NVDA).
+        """
+        if not text:
+            return None
+        private = None
+        for m in self.pattern.finditer(text):
+            alias = m.group(1)
+            if self.aliases[alias] is not None:
+                return {"alias": alias, "symbol": self.aliases[alias]}
+            private = private or {"alias": alias, "symbol": None}
+        return private
+
+_resolver: Optional[TickerResolver] = None
+_resolver_lock = threading.Lock()
+
+def get_ticker_resolver() -> Optional[TickerResolver]:
+    """
+    Process-wide resolver, compiled on first use. Returns None if the table can't be loaded.
+    """
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                try:
+                    _resolver = TickerResolver()
+                except Exception as e:
+                    logger.warning(f"Ticker resolver unavailable: {e}")
+                    return None
+    return _resolver
@@ -0,0 +1,130 @@
+import re
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Approximate characters per token for Latin text; CJK and other non-ASCII
+# characters are counted as roughly one token each by all three tokenizers.
+CHARS_PER_TOKEN = {
+    'openai': 4.0,
+    'anthropic': 3.5,
+    'gemini': 4.0,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is",
+    "it", "its", "of", "on", "or", "that", "the", "to", "was", "were", "will", "with", "after",
+    "over", "new", "says", "said"
+}
+
+def estimate_tokens(text: str, provider: Optional[str] = None) -> int:
+    """
+    Token count estimate for `text` under the given provider's tokenizer.
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    ascii_chars = len(text) - non_ascii
+    chars_per_token = CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN)
+    return int(ascii_chars / chars_per_token + non_ascii + 0.999)
+
+def truncate_to_tokens(text: str, max_tokens: int, provider: Optional[str] = None) -> str:
+    """
+    Cuts `text` to at most `max_tokens`, preferring a sentence or word boundary.
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    if estimate_tokens(text, provider) <= max_tokens:
+        return text
+    # Binary search on the character length
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid], provider) + 1 <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text[:low]
+    boundary = max(cut.rfind(". "), cut.rfind("。"), cut.rfind("\n"))
+    if boundary < len(cut) // 2:
+        boundary = cut.rfind(" ")
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + "…"
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9$%.]+", (text or "").lower())
+
+def keywords(text: str) -> Set[str]:
+    return {w.strip(".") for w in _words(text) if w.strip(".") and w.strip(".") not in STOPWORDS}
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    words = _words(text)
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def select_snippets(results: List[Dict[str, Any]], headline: str, max_tokens: int,
+                    provider: Optional[str] = None, near_duplicate_threshold: float = 0.6) -> List[Dict[str, Any]]:
+    """
+    Drops duplicate and near-duplicate search results (same URL, or Jaccard similarity
+    of word 3-shingles above the threshold), ranks the rest by keyword overlap with the
+    headline and keeps as many as fit in `max_tokens`. The last one that doesn't fit
+    whole is truncated.
+    """
+    unique = []
+    seen_urls = set()
+    seen_shingles: List[Set[str]] = []
+    for result in results or []:
+        body = result.get('body', '') or ''
+        url = (result.get('href') or '').rstrip('/').lower()
+        if url and url in seen_urls:
+            continue
+        signature = shingles(f"{result.get('title', '')} {body}")
+        if any(jaccard(signature, other) >= near_duplicate_threshold for other in seen_shingles):
+            continue
+        if url:
+            seen_urls.add(url)
+        seen_shingles.append(signature)
+        unique.append(result)
+
+    headline_words = keywords(headline)
+    def overlap(result: Dict[str, Any]) -> float:
+        words = keywords(f"{result.get('title', '')} {result.get('body', '')}")
+        return len(words & headline_words) / (len(headline_words) or 1)
+
+    # Stable sort keeps the search engine's order among equally relevant results
+    ranked = sorted(unique, key=overlap, reverse=True)
+
+    selected = []
+    remaining = max_tokens
+    for result in ranked:
+        cost = estimate_tokens(format_snippets([result]), provider)
+        if cost <= remaining:
+            selected.append(result)
+            remaining -= cost
+            continue
+        overhead = cost - estimate_tokens(result.get('body', ''), provider)
+        if remaining - overhead >= 30:
+            selected.append(dict(result, body=truncate_to_tokens(result.get('body', ''), remaining - overhead, provider)))
+        break
+
+    if len(selected) < len(results or []):
+        logger.info(f"Search snippets: kept {len(selected)} of {len(results)} ({len(results) - len(unique)} duplicates dropped)")
+    return selected
+
+def format_snippets(results: List[Dict[str, Any]]) -> str:
+    context_parts = []
+    for r in results:
+        title = r.get('title', 'No Title')
+        snippet = r.get('body', '')
+        link = r.get('href', '')
+        context_parts.append(f"Source: {title} ({link})\nSummary: {snippet}")
+    return "\n\n".join(context_parts)
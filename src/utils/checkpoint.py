@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import logging
+import itertools
+from typing import Any, Callable, Collection, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sub-directory of a run's output directory that holds its checkpoints
+CHECKPOINT_DIR_NAME = "checkpoints"
+COMPLETE_MARKER = "_complete"
+
+class CheckpointStore:
+    """
+    Stage outputs of one run, one JSON file per checkpoint under the run's output
+    directory. Files are written atomically (temp file + rename), so a crash never
+    leaves a half-written checkpoint behind.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    def has(self, name: str) -> bool:
+        return os.path.exists(self._path(name))
+
+    def load(self, name: str) -> Optional[Any]:
+        """
+        The stored value, or None if the checkpoint is missing or unreadable.
+        """
+        try:
+            with open(self._path(name), encoding="utf-8") as f:
+                return json.load(f)["value"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {name}: {e}")
+            return None
+
+    def save(self, name: str, value: Any):
+        path = self._path(name)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"saved_at": time.time(), "value": value}, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to save checkpoint {name}: {e}")
+
+    def get_or_compute(self, name: str, compute: Callable[[], Any],
+                       on_reuse: Optional[Callable[[str], None]] = None) -> Any:
+        """
+        Returns the stored value of `name`, or computes and stores it.
+        """
+        value = self.load(name)
+        if value is not None:
+            if on_reuse:
+                on_reuse(name)
+            return value
+        value = compute()
+        self.save(name, value)
+        return value
+
+    def mark_complete(self):
+        self.save(COMPLETE_MARKER, True)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.has(COMPLETE_MARKER)
+
+def claim_new_run(checkpoint_path: Callable[[str], str], base_name: str) -> Tuple[str, str]:
+    """
+    Reserves a run name that no other run has used: `base_name`, else "base_name-2", ...
+    `checkpoint_path(name)` gives the checkpoint directory of a run (its parent must exist);
+    creating it is the atomic claim, so two runs started in the same minute never share
+    checkpoints. Returns (run name, checkpoint directory).
+    """
+    for attempt in itertools.count(1):
+        name = base_name if attempt == 1 else f"{base_name}-{attempt}"
+        path = checkpoint_path(name)
+        try:
+            os.mkdir(path)
+            return name, path
+        except FileExistsError:
+            continue
+
+def find_resumable_run(output_dir: str, max_age_seconds: Optional[float] = None,
+                       checkpoint_dir_name: str = CHECKPOINT_DIR_NAME,
+                       exclude: Collection[str] = ()) -> Optional[str]:
+    """
+    Name of the most recently updated run directory under `output_dir` that has
+    checkpoints but never completed, or None. Runs idle for longer than
+    `max_age_seconds` are ignored when it is given, and so are the runs in `exclude`
+    (runs still in flight, which aren't complete yet but mustn't be resumed twice).
+    """
+    candidates = []
+    try:
+        run_names = os.listdir(output_dir)
+    except OSError:
+        return None
+    for run_name in run_names:
+        if run_name in exclude:
+            continue
+        directory = os.path.join(output_dir, run_name, checkpoint_dir_name)
+        if not os.path.isdir(directory) or os.path.exists(os.path.join(directory, f"{COMPLETE_MARKER}.json")):
+            continue
+        files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".json")]
+        if not files:
+            continue
+        updated_at = max(os.path.getmtime(f) for f in files)
+        if max_age_seconds is not None and time.time() - updated_at > max_age_seconds:
+            continue
+        candidates.append((updated_at, run_name))
+    return max(candidates)[1] if candidates else None
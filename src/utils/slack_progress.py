@@ -0,0 +1,113 @@
+import time
+import logging
+import threading
+from typing import Any, List, Optional
+from src.config import SLACK_PROGRESS_UPDATE_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class SlackProgressMessage:
+    """
+    One Slack message in the run's thread, edited in place with chat_update as
+    sections complete. Edits are throttled to one per `min_interval` seconds;
+    the latest state is always flushed once the interval has passed.
+    Slack errors are logged and never interrupt the run.
+    """
+    PREVIEW_CHARS = 600
+
+    def __init__(self, client: Any, channel: str, thread_ts: str, title: str,
+                 min_interval: float = SLACK_PROGRESS_UPDATE_INTERVAL_SECONDS):
+        self.client = client
+        self.channel = channel
+        self.thread_ts = thread_ts
+        self.title = title
+        self.min_interval = min_interval
+        self.ts: Optional[str] = None
+        self.sections: List[str] = []
+        self.preview_text = ""
+        self.updates = 0
+        self._dirty = False
+        self._last_update = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._finished = False
+        self._lock = threading.Lock()
+        # Held from rendering until chat_update returns, so edits reach Slack in render order
+        self._send_lock = threading.Lock()
+
+    def start(self):
+        try:
+            response = self.client.chat_postMessage(channel=self.channel, thread_ts=self.thread_ts, text=self._render())
+            self.ts = response["ts"]
+            self._last_update = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Failed to post progress message: {e}")
+
+    def section_done(self, label: str):
+        with self._lock:
+            self.sections.append(label)
+            self.preview_text = ""
+        self._schedule()
+
+    def preview(self, text: str):
+        """
+        Shows the tail of the section currently being streamed.
+        """
+        with self._lock:
+            self.preview_text = text
+        self._schedule()
+
+    def _render(self) -> str:
+        lines = [self.title] + [f"✔️ {label}" for label in self.sections]
+        text = "\n".join(lines)
+        if self.preview_text:
+            tail = self.preview_text[-self.PREVIEW_CHARS:]
+            if len(tail) < len(self.preview_text):
+                tail = "…" + tail
+            text += "\n\n```\n" + tail + "\n```"
+        return text
+
+    def _schedule(self):
+        with self._lock:
+            if self.ts is None:
+                return
+            self._dirty = True
+            if self._timer is not None:
+                return
+            delay = self._last_update + self.min_interval - time.monotonic()
+            if delay > 0:
+                self._timer = threading.Timer(delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self.flush()
+
+    def flush(self, final: bool = False):
+        with self._send_lock:
+            with self._lock:
+                self._timer = None
+                # After finish() only the final edit goes out; a late timer must not overwrite it
+                if (self._finished and not final) or not self._dirty or self.ts is None:
+                    return
+                self._dirty = False
+                self._last_update = time.monotonic()
+                text = self._render()
+                self.updates += 1
+            try:
+                self.client.chat_update(channel=self.channel, ts=self.ts, text=text)
+            except Exception as e:
+                logger.warning(f"Failed to update progress message: {e}")
+
+    def finish(self, title: Optional[str] = None):
+        """
+        Cancels any pending edit and writes the final state immediately.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if title:
+                self.title = title
+            self.preview_text = ""
+            self._dirty = True
+            self._finished = True
+        self.flush(final=True)
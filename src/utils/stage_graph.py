@@ -0,0 +1,102 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+class StageAborted(Exception):
+    """
+    Raised by a stage to stop the pipeline early without treating it as a failure.
+    """
+
+class Stage:
+    def __init__(self, name: str, func: Callable[..., Any], depends_on: Sequence[str] = (),
+                 start_message: Optional[str] = None, done_message: Optional[str] = None):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.start_message = start_message
+        self.done_message = done_message
+
+class StageGraph:
+    """
+    Runs pipeline stages as soon as their dependencies have finished.
+    Each stage function receives the results of its dependencies as keyword
+    arguments named after the dependency stages.
+    """
+    def __init__(self, on_message: Optional[Callable[[str], None]] = None, max_workers: int = 4):
+        self.on_message = on_message
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+
+    def add_stage(self, name: str, func: Callable[..., Any], depends_on: Sequence[str] = (),
+                  start_message: Optional[str] = None, done_message: Optional[str] = None):
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        self.stages[name] = Stage(name, func, depends_on, start_message, done_message)
+
+    def _validate(self):
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        # Kahn's algorithm to reject cycles before anything is started
+        remaining = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Stage graph has a cycle between: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def _notify(self, message: Optional[str]):
+        if message and self.on_message:
+            try:
+                self.on_message(message)
+            except Exception as e:
+                logger.warning(f"Failed to post stage message: {e}")
+
+    def _run_stage(self, stage: Stage, results: Dict[str, Any]) -> Any:
+        self._notify(stage.start_message)
+        kwargs = {dep: results[dep] for dep in stage.depends_on}
+        result = stage.func(**kwargs)
+        self._notify(stage.done_message)
+        return result
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Executes every stage and returns a dict of stage name -> result.
+        The first stage error (including StageAborted) cancels pending stages and is re-raised.
+        """
+        self._validate()
+
+        results: Dict[str, Any] = {}
+        pending: List[str] = list(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                # Submit every stage whose dependencies are all complete
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if all(dep in results for dep in stage.depends_on):
+                        pending.remove(name)
+                        logger.info(f"Starting stage: {name}")
+                        running[executor.submit(self._run_stage, stage, results)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        logger.info(f"Stage '{name}' stopped the pipeline: {error!r}")
+                        for other in running:
+                            other.cancel()
+                        raise error
+                    results[name] = future.result()
+                    logger.info(f"Finished stage: {name}")
+
+        return results
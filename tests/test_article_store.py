@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import tempfile
+
+# Mock environment variables before importing modules that might use them at top level
+with patch.dict(os.environ, {'NEWSAPI_KEY': 'test_key'}):
+    from src.services.article_store import ArticleStore
+    from src.generators.report_generator import ReportGenerator
+
+class TestArticleStore(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.store = ArticleStore(os.path.join(tmp_dir.name, "articles.sqlite3"), 3600, 86400)
+        self.article = {"title": "Fed holds rates", "url": "http://reuters.com/fed", "description": "Steady",
+                        "content": "Body", "ticker": None, "search_context": "ctx", "search_results": [],
+                        "search_context_cached_at": None}
+
+    def test_enrichment_and_section_reused_until_content_changes(self):
+        self.assertIsNone(self.store.get_enrichment(self.article))
+        self.store.save_enrichment(self.article)
+        self.store.save_section(self.article, "### 3. Fed")
+
+        self.assertEqual(self.store.get_enrichment(dict(self.article))["search_context"], "ctx")
+        self.assertEqual(self.store.get_section(dict(self.article, url="http://reuters.com/fed/")), "### 3. Fed")
+
+        updated = dict(self.article, content="Body with an update")
+        self.assertIsNone(self.store.get_enrichment(updated))
+        self.store.save_enrichment(updated)
+        self.assertIsNone(self.store.get_section(updated))
+
+    def test_expired_entries_are_not_reused(self):
+        store = ArticleStore(self.store.path, 0, 86400)
+        store.save_enrichment(self.article)
+        self.assertIsNone(store.get_enrichment(self.article))
+
+    def test_report_generator_reuses_and_renumbers_sections(self):
+        self.store.save_enrichment(self.article)
+        self.store.save_section(self.article, "### 3. Fed holds rates\nAnalysis")
+        fresh = dict(self.article, title="Oil slips", url="http://reuters.com/oil", publishedAt="", source="Reuters")
+        self.store.save_enrichment(fresh)
+
+        llm = MagicMock()
+        llm.generate_text.return_value = "### 2. Oil slips\nNew analysis"
+        generator = ReportGenerator(llm, MagicMock(), article_store=self.store)
+        content = generator._generate_news_section([self.article, fresh], "themes")
+
+        self.assertIn("### 1. Fed holds rates\nAnalysis", content)
+        self.assertEqual(llm.generate_text.call_count, 1)
+        self.assertEqual(generator.section_stats, {"reused": 1, "regenerated": 1})
+        self.assertEqual(self.store.get_section(fresh), "### 2. Oil slips\nNew analysis")
+
+if __name__ == '__main__':
+    unittest.main()
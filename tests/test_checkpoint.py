@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import time
+import tempfile
+
+# Mock environment variables before importing modules that might use them at top level
+with patch.dict(os.environ, {'NEWSAPI_KEY': 'test_key'}):
+    from src.utils.checkpoint import CheckpointStore, CHECKPOINT_DIR_NAME, claim_new_run, find_resumable_run
+    from src.generators.report_generator import ReportGenerator
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.output_dir = tmp_dir.name
+
+    def _store(self, run_name):
+        return CheckpointStore(os.path.join(self.output_dir, run_name, CHECKPOINT_DIR_NAME))
+
+    def test_get_or_compute_reuses_saved_value(self):
+        store = self._store("run1")
+        compute = MagicMock(return_value={"NASDAQ": 1.5})
+        self.assertEqual(store.get_or_compute("stocks", compute), {"NASDAQ": 1.5})
+        self.assertEqual(self._store("run1").get_or_compute("stocks", compute), {"NASDAQ": 1.5})
+        compute.assert_called_once()
+        self.assertFalse(os.path.exists(os.path.join(store.directory, "stocks.json.tmp")))
+
+    def test_runs_in_the_same_minute_get_their_own_checkpoints(self):
+        def checkpoint_path(run_name):
+            os.makedirs(os.path.join(self.output_dir, run_name), exist_ok=True)
+            return os.path.join(self.output_dir, run_name, CHECKPOINT_DIR_NAME)
+
+        first, first_dir = claim_new_run(checkpoint_path, "20251125_07:30")
+        CheckpointStore(first_dir).save("news", [])
+        second, second_dir = claim_new_run(checkpoint_path, "20251125_07:30")
+
+        self.assertEqual((first, second), ("20251125_07:30", "20251125_07:30-2"))
+        self.assertFalse(CheckpointStore(second_dir).has("news"))
+
+    def test_finds_latest_unfinished_run(self):
+        self._store("old").save("stocks", {})
+        finished = self._store("finished")
+        finished.save("stocks", {})
+        finished.mark_complete()
+        self._store("empty")
+        latest = self._store("latest")
+        latest.save("news", [])
+        past = time.time() - 7200
+        os.utime(os.path.join(self.output_dir, "old", CHECKPOINT_DIR_NAME, "stocks.json"), (past, past))
+
+        self.assertEqual(find_resumable_run(self.output_dir), "latest")
+        os.utime(os.path.join(latest.directory, "news.json"), (past - 60, past - 60))
+        self.assertEqual(find_resumable_run(self.output_dir), "old")
+        self.assertIsNone(find_resumable_run(self.output_dir, max_age_seconds=3600))
+        self.assertIsNone(find_resumable_run(os.path.join(self.output_dir, "missing")))
+
+    def test_report_resumes_completed_sections(self):
+        store = self._store("run1")
+        store.save("themes", "1. Rates")
+        store.save("deep_dive_01", {"url": "http://reuters.com/1", "section": "### 1. Saved\n\n---\n\n"})
+        # Checkpoint for a different article at the same position is ignored
+        store.save("deep_dive_02", {"url": "http://reuters.com/old", "section": "### 2. Stale\n\n---\n\n"})
+
+        llm = MagicMock()
+        llm.generate_text.return_value = "### 2. Fresh"
+        llm.stream_text.side_effect = lambda prompt, system_prompt=None, **kwargs: iter(["Section"])
+        generator = ReportGenerator(llm, MagicMock())
+        news_items = [
+            {"title": f"News {i}", "source": "Reuters", "publishedAt": "", "url": f"http://reuters.com/{i}", "description": ""}
+            for i in range(1, 3)
+        ]
+        report = generator.generate_report({"S&P 500": {"close": 1, "change": 0, "change_pct": 0}}, news_items,
+                                           checkpoints=store)
+
+        self.assertIn("### 1. Saved", report)
+        self.assertIn("### 2. Fresh", report)
+        self.assertNotIn("Stale", report)
+        # Only the second deep dive needed the LLM; themes came from the checkpoint
+        self.assertEqual(llm.generate_text.call_count, 1)
+        self.assertEqual(store.load("deep_dive_02")["url"], "http://reuters.com/2")
+        self.assertEqual(store.load("conclusion"), "Section")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,35 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import os
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # Mock environment variables before importing modules that might use them at top level
 with patch.dict(os.environ, {'NEWSAPI_KEY': 'test_key'}):
     from src.collectors.news_collector import NewsDataCollector
     from src.collectors.stock_collector import StockDataCollector
+    from src.collectors.price_store import PriceHistoryStore
     from src.services.llm_service import LLMService
-    from src.config import MARKET_NAMES
+    from src.services.ticker_resolver import TickerResolver
+    from src.services.provider_registry import CircuitBreaker, ProviderRegistry
+    from src.services.search_service import SearchService, RatelimitException
+    from src.utils.rate_limiter import TokenBucket
+    from src.utils.disk_cache import DiskCache
+    from src.generators.report_generator import ReportGenerator
+    from src.managers.file_manager import FileManager
+    from src.config import MARKET_NAMES, PRICE_HISTORY_BACKFILL, parse_task_tiers
+
+def make_llm_service(registry, provider='openai'):
+    """
+    LLMService bound to a test registry, without API keys or the on-disk cache.
+    """
+    with patch.object(LLMService, '_select_provider', return_value=provider), \
+            patch('src.services.llm_service.get_provider_registry', return_value=registry), \
+            patch('src.services.llm_service.LLM_CACHE_ENABLED', False):
+        return LLMService()
 
 class TestCollectors(unittest.TestCase):
     
@@ -50,6 +72,37 @@ class TestCollectors(unittest.TestCase):
         self.assertEqual(news[0]['title'], 'Valid News')
         self.assertEqual(news[0]['source'], 'Reuters')
 
+    @patch('src.collectors.news_collector.NewsApiClient')
+    @patch('src.services.search_service.SearchService')
+    def test_iter_enriched_streams_in_rank_order(self, mock_search_cls, _mock_newsapi_cls):
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=3)
+        self.addCleanup(pool.shutdown)
+        release_last = threading.Event()
+
+        def enrich(article, ticker=None):
+            if article['title'] == 'News 3':
+                release_last.wait(5)
+            return dict(article, search_context=f"ctx {article['title']}")
+        mock_search_cls.return_value.submit_enrichment.side_effect = lambda article, ticker=None: pool.submit(enrich, article, ticker)
+
+        llm = MagicMock()
+        def extract(titles, on_resolved=None):
+            for i in reversed(range(len(titles))):
+                on_resolved(i, None)
+            return [None] * len(titles)
+        llm.extract_tickers.side_effect = extract
+
+        collector = NewsDataCollector(llm)
+        candidates = [{"title": f"News {i}", "url": f"http://reuters.com/{i}"} for i in range(1, 4)]
+        stream = collector.iter_enriched(candidates)
+
+        # The first two arrive while the third search is still running
+        self.assertEqual(next(stream)['search_context'], "ctx News 1")
+        self.assertEqual(next(stream)['search_context'], "ctx News 2")
+        release_last.set()
+        self.assertEqual([a['title'] for a in stream], ["News 3"])
+
     @patch('src.collectors.stock_collector.yf.Ticker')
     def test_stock_collector_naming(self, mock_ticker_cls):
         # Setup mock
@@ -65,6 +118,64 @@ class TestCollectors(unittest.TestCase):
         # Check if keys map to correct Japanese names
         self.assertIn("ナスダック総合指数", [MARKET_NAMES[k] for k in collector.tickers.keys()])
 
+    @patch('src.collectors.stock_collector.yf.download')
+    def test_stock_collector_bulk_download(self, mock_download):
+        import numpy as np
+        import pandas as pd
+        
+        # One batched download; Nikkei is closed on the last day
+        closes = pd.DataFrame(
+            {"^DJI": [100.0, 110.0], "^N225": [200.0, np.nan]},
+            index=pd.to_datetime(["2025-11-20", "2025-11-21"])
+        )
+        closes.loc[pd.Timestamp("2025-11-19")] = [90.0, 190.0]
+        closes = closes.sort_index()
+        history = pd.concat({"Close": closes, "Open": closes}, axis=1)
+        mock_download.return_value = history
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            collector = StockDataCollector()
+            collector.tickers = {"DOW": "^DJI", "NIKKEI": "^N225"}
+            collector.store = PriceHistoryStore(tmp_dir)
+            data = collector.fetch_stock_prices()
+            
+            mock_download.assert_called_once()
+            self.assertEqual(data["ダウ平均株価"], {"close": 110.0, "change": 10.0, "change_pct": 10.0, "symbol": "^DJI"})
+            self.assertEqual(data["日経平均株価"]["close"], 200.0)
+            self.assertEqual(data["日経平均株価"]["change_pct"], 5.26)
+            
+            # Second run only asks for the bars after the stored history
+            collector.fetch_stock_prices()
+            self.assertIn("start", mock_download.call_args.kwargs)
+            
+            # No new bars for the Nikkei: its stored close is stale and left out
+            mock_download.return_value = pd.concat({"Close": closes.assign(**{"^N225": np.nan})}, axis=1)
+            with self.assertLogs('src.collectors.stock_collector', level='WARNING'):
+                data = collector.fetch_stock_prices()
+            self.assertIn("ダウ平均株価", data)
+            self.assertNotIn("日経平均株価", data)
+            
+            # Without a store the same numbers come from the downloaded frame
+            collector.store = None
+            mock_download.return_value = history
+            self.assertEqual(collector.fetch_stock_prices()["日経平均株価"]["change_pct"], 5.26)
+
+    def test_lagging_symbol_gets_its_own_download_window(self):
+        import numpy as np
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            collector = StockDataCollector()
+            collector.store = PriceHistoryStore(tmp_dir)
+            collector.store.append("^DJI", np.array(["2025-11-21"], dtype="datetime64[D]"), [100.0])
+            collector.store.append("^GSPC", np.array(["2025-11-20"], dtype="datetime64[D]"), [50.0])
+            collector.store.append("^N225", np.array(["2025-10-01"], dtype="datetime64[D]"), [200.0])
+            
+            windows = collector._download_windows(["^DJI", "^GSPC", "^N225", "NEW"])
+            self.assertEqual(windows, [
+                (["NEW"], {"period": PRICE_HISTORY_BACKFILL}),
+                (["^N225"], {"start": "2025-09-27"}),
+                (["^DJI", "^GSPC"], {"start": "2025-11-16"}),
+            ])
+
 class TestLLMService(unittest.TestCase):
     def test_prompt_structure(self):
         # Verify system prompts contain key constraints
@@ -77,5 +188,436 @@ class TestLLMService(unittest.TestCase):
         self.assertIn("Taitsu", persona_prompt)
         self.assertIn("タイツでした。", persona_prompt)
 
+    def test_extract_tickers_batch(self):
+        service = LLMService.__new__(LLMService)
+        service.generate_text = MagicMock(return_value='```json\n{"1": "MSFT", "2": null, "3": "None"}\n```')
+        
+        tickers = service.extract_tickers(["Microsoft earnings", "Fed holds rates", "Oil rises"])
+        
+        self.assertEqual(tickers, ["MSFT", None, None])
+        service.generate_text.assert_called_once()
+
+    def test_extract_tickers_falls_back_per_item(self):
+        service = LLMService.__new__(LLMService)
+        # Batch response is not JSON, then one answer per headline
+        service.generate_text = MagicMock(side_effect=["Sorry, I can't.", "NVDA", "None"])
+        
+        tickers = service.extract_tickers(["Nvidia beats", "Markets calm"])
+        
+        self.assertEqual(tickers, ["NVDA", None])
+        self.assertEqual(service.generate_text.call_count, 3)
+
+class TestProviderRegistry(unittest.TestCase):
+    def test_circuit_breaker_opens_and_probes(self):
+        breaker = CircuitBreaker("openai", failure_threshold=2, cooldown_seconds=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+        
+        time.sleep(0.06)
+        # Exactly one probe after the cool-down
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertTrue(breaker.allow_request())
+
+    @patch.object(ProviderRegistry, 'has_key', side_effect=lambda provider: provider in ('openai', 'anthropic'))
+    def test_fallback_skips_open_circuit(self, _mock_has_key):
+        registry = ProviderRegistry()
+        registry.breakers['openai'] = CircuitBreaker('openai', failure_threshold=1, cooldown_seconds=60)
+        openai_client = MagicMock()
+        openai_client.chat.completions.create.side_effect = Exception("503")
+        anthropic_client = MagicMock()
+        anthropic_client.messages.create.return_value.content[0].text = "Fallback Success"
+        registry._clients = {'openai': openai_client, 'anthropic': anthropic_client}
+        
+        service = make_llm_service(registry)
+        
+        self.assertEqual(service._generate_uncached("prompt"), "Fallback Success")
+        self.assertEqual(service._generate_uncached("prompt"), "Fallback Success")
+        
+        # The second call went straight to the fallback
+        self.assertEqual(openai_client.chat.completions.create.call_count, 1)
+        self.assertEqual(anthropic_client.messages.create.call_count, 2)
+
+    @patch('src.services.llm_service.LLM_HEDGE_MAX_PER_RUN', 1)
+    @patch('src.services.llm_service.LLM_HEDGE_ENABLED', True)
+    @patch.object(ProviderRegistry, 'has_key', side_effect=lambda provider: provider in ('openai', 'anthropic'))
+    def test_hedged_request_uses_faster_provider(self, _mock_has_key):
+        registry = ProviderRegistry()
+        for _ in range(10):
+            registry.record_latency('openai', 0.05, LLMService.MODELS['openai'])
+        openai_client = MagicMock()
+        openai_client.chat.completions.create.side_effect = lambda **kwargs: time.sleep(0.5) or MagicMock()
+        anthropic_client = MagicMock()
+        anthropic_client.messages.create.return_value.content[0].text = "Hedge Success"
+        registry._clients = {'openai': openai_client, 'anthropic': anthropic_client}
+        
+        service = make_llm_service(registry)
+        
+        start = time.time()
+        self.assertEqual(service._generate_uncached("prompt"), "Hedge Success")
+        self.assertLess(time.time() - start, 0.4)
+        self.assertEqual(service.get_hedge_stats(), {"sent": 1, "won": 1})
+        
+        # Per-run cap reached: the next slow call just waits for the primary
+        service._generate_uncached("prompt")
+        self.assertEqual(anthropic_client.messages.create.call_count, 1)
+
+    @patch.object(ProviderRegistry, 'has_key', side_effect=lambda provider: provider in ('openai', 'anthropic'))
+    def test_latency_samples_are_per_model_and_exclude_queue_wait(self, _mock_has_key):
+        registry = ProviderRegistry()
+        openai_client = MagicMock()
+        openai_client.chat.completions.create.side_effect = lambda **kwargs: time.sleep(0.05) or MagicMock()
+        registry._clients = {'openai': openai_client}
+        service = make_llm_service(registry)
+
+        real_admit = service._admit
+
+        @contextmanager
+        def slow_admit(*args, **kwargs):
+            time.sleep(0.3)  # queued behind other calls
+            with real_admit(*args, **kwargs):
+                yield
+
+        with patch.object(service, '_admit', slow_admit), \
+                patch('src.services.provider_registry.LLM_HEDGE_MIN_SAMPLES', 1):
+            service._generate_uncached("prompt")
+            quality = registry.latency_percentile('openai', 50, LLMService.MODELS['openai'])
+            self.assertLess(quality, 0.25)
+            # Nothing recorded for the fast tier, so it has no threshold of its own yet
+            self.assertIsNone(registry.latency_percentile('openai', 50, LLMService.FAST_MODELS['openai']))
+
+    @patch('src.services.llm_service.LLM_HEDGE_ENABLED', True)
+    @patch.object(ProviderRegistry, 'has_key', side_effect=lambda provider: provider in ('openai', 'anthropic'))
+    def test_hedge_backup_has_own_pool_and_cache_key(self, _mock_has_key):
+        registry = ProviderRegistry()
+        # A saturated primary pool must not hold the backup back
+        registry.hedge_executor = ThreadPoolExecutor(max_workers=1)
+        for _ in range(10):
+            registry.record_latency('openai', 0.05, LLMService.MODELS['openai'])
+        openai_client = MagicMock()
+        openai_client.chat.completions.create.side_effect = lambda **kwargs: time.sleep(0.5) or MagicMock()
+        anthropic_client = MagicMock()
+        anthropic_client.messages.create.return_value.content[0].text = "Hedge Success"
+        registry._clients = {'openai': openai_client, 'anthropic': anthropic_client}
+        service = make_llm_service(registry)
+        service.cache = MagicMock()
+        service.cache.get.return_value = None
+
+        start = time.time()
+        self.assertEqual(service.generate_text("prompt"), "Hedge Success")
+        self.assertLess(time.time() - start, 0.4)
+        # Cached as Anthropic's answer, not under the primary's key
+        key = service.cache.set.call_args[0][0]
+        self.assertEqual(key, service._cache_key("prompt", provider='anthropic'))
+        self.assertNotEqual(key, service._cache_key("prompt"))
+
+    @patch.object(ProviderRegistry, 'has_key', side_effect=lambda provider: provider in ('openai', 'anthropic'))
+    def test_stream_text_falls_back_before_first_chunk(self, _mock_has_key):
+        registry = ProviderRegistry()
+        openai_client = MagicMock()
+        openai_client.chat.completions.create.side_effect = Exception("503")
+        anthropic_client = MagicMock()
+        anthropic_client.messages.stream.return_value.__enter__.return_value.text_stream = iter(["Hel", "lo"])
+        registry._clients = {'openai': openai_client, 'anthropic': anthropic_client}
+        
+        service = make_llm_service(registry)
+        service.cache = MagicMock()
+        service.cache.get.return_value = None
+        
+        self.assertEqual(list(service.stream_text("prompt")), ["Hel", "lo"])
+        # The completed stream is cached as one response
+        self.assertEqual(service.cache.set.call_args[0][1], "Hello")
+        self.assertEqual(service.get_scheduler_stats()["calls"], 2)
+
+    @patch.object(ProviderRegistry, 'has_key', side_effect=lambda provider: provider == 'openai')
+    def test_unparseable_json_is_not_cached(self, _mock_has_key):
+        registry = ProviderRegistry()
+        openai_client = MagicMock()
+        openai_client.chat.completions.create.return_value.choices[0].message.content = "not json"
+        registry._clients = {'openai': openai_client}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            service = make_llm_service(registry)
+            service.cache = DiskCache(os.path.join(tmp_dir, "llm.sqlite3"), ttl_seconds=60, max_entries=100)
+
+            with self.assertRaises(ValueError):
+                service.generate_json("Tickers?", task="ticker")
+            # The rerun asks the provider again and caches the valid answer
+            openai_client.chat.completions.create.return_value.choices[0].message.content = '{"1": "AAPL"}'
+            self.assertEqual(service.generate_json("Tickers?", task="ticker"), {"1": "AAPL"})
+            self.assertEqual(service.generate_json("Tickers?", task="ticker"), {"1": "AAPL"})
+            self.assertEqual(openai_client.chat.completions.create.call_count, 2)
+
+    @patch.object(ProviderRegistry, 'has_key', side_effect=lambda provider: provider == 'anthropic')
+    def test_stream_closed_early_releases_scheduler_slot(self, _mock_has_key):
+        registry = ProviderRegistry()
+        anthropic_client = MagicMock()
+        anthropic_client.messages.stream.return_value.__enter__.return_value.text_stream = iter(["a", "b", "c"])
+        registry._clients = {'anthropic': anthropic_client}
+        service = make_llm_service(registry, provider='anthropic')
+
+        stream = service.stream_text("prompt")
+        self.assertEqual(next(stream), "a")
+        self.assertEqual(registry.schedulers['anthropic'].inflight, 1)
+        stream.close()
+        self.assertEqual(registry.schedulers['anthropic'].inflight, 0)
+
+    @patch.object(ProviderRegistry, 'has_key', side_effect=lambda provider: provider == 'anthropic')
+    def test_half_open_probe_closed_early_closes_circuit(self, _mock_has_key):
+        registry = ProviderRegistry()
+        breaker = registry.breakers['anthropic'] = CircuitBreaker('anthropic', failure_threshold=1, cooldown_seconds=0)
+        breaker.record_failure()
+        anthropic_client = MagicMock()
+        anthropic_client.messages.stream.return_value.__enter__.return_value.text_stream = iter(["a", "b"])
+        registry._clients = {'anthropic': anthropic_client}
+        service = make_llm_service(registry, provider='anthropic')
+
+        stream = service.stream_text("prompt")
+        self.assertEqual(next(stream), "a")
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        stream.close()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    @patch.object(ProviderRegistry, 'has_key', side_effect=lambda provider: provider == 'openai')
+    def test_tasks_routed_to_model_tiers(self, _mock_has_key):
+        registry = ProviderRegistry()
+        openai_client = MagicMock()
+        openai_client.chat.completions.create.return_value.choices[0].message.content = "NVDA"
+        registry._clients = {'openai': openai_client}
+        service = make_llm_service(registry)
+        
+        service.generate_text("Which ticker?", task="ticker")
+        service.generate_text("Deep dive", task="deep_dive")
+        
+        models = [call.kwargs["model"] for call in openai_client.chat.completions.create.call_args_list]
+        self.assertEqual(models, [LLMService.FAST_MODELS['openai'], LLMService.MODELS['openai']])
+        stats = service.get_task_stats()
+        self.assertEqual(stats["ticker"]["calls"], 1)
+        self.assertEqual(stats["deep_dive"]["calls"], 1)
+        self.assertGreater(stats["deep_dive"]["input_tokens"], 0)
+
+    def test_task_tier_overrides_are_parsed_leniently(self):
+        with self.assertLogs('src.config', level='WARNING'):
+            tiers = parse_task_tiers("deep_dive: fast, themes = Quality,script=cheap,")
+        self.assertEqual(tiers, {"deep_dive": "fast", "themes": "quality"})
+
+class TestTickerResolver(unittest.TestCase):
+    def test_resolves_known_companies(self):
+        resolver = TickerResolver()
+        self.assertEqual(resolver.match("Microsoft to invest $10 billion in Japan")['symbol'], "MSFT")
+        self.assertEqual(resolver.match("Meta Platforms shares slide")['alias'], "Meta Platforms")
+        self.assertEqual(resolver.match("UK's Babcock raises outlook")['symbol'], "BAB.L")
+        # Known private company: matched, but no ticker
+        match = resolver.match("SpaceX valuation hits record")
+        self.assertIsNotNone(match)
+        self.assertIsNone(match['symbol'])
+
+    def test_prefers_public_company_over_private(self):
+        resolver = TickerResolver()
+        self.assertEqual(resolver.match("OpenAI to buy $10 billion of chips from Nvidia")['symbol'], "NVDA")
+        self.assertEqual(resolver.match("SpaceX valuation tops Tesla")['symbol'], "TSLA")
+        # Person names are not companies; "Ford Motor" still is
+        self.assertIsNone(resolver.match("Harrison Ford film tops box office"))
+        self.assertEqual(resolver.match("Ford Motor recalls 100,000 trucks")['symbol'], "F")
+
+    def test_no_match_or_partial_word(self):
+        resolver = TickerResolver()
+        self.assertIsNone(resolver.match("Fed holds rates steady"))
+        self.assertIsNone(resolver.match("Metals rally on supply worries"))
+
+    def test_extract_tickers_skips_llm_when_resolved(self):
+        service = LLMService.__new__(LLMService)
+        service.ticker_resolver = TickerResolver()
+        service.tickers_resolved_locally = 0
+        service.ticker_llm_calls_avoided = 0
+        service._stats_lock = MagicMock()
+        service.generate_text = MagicMock()
+        
+        tickers = service.extract_tickers(["Microsoft earnings beat", "Nvidia unveils chip"])
+        
+        self.assertEqual(tickers, ["MSFT", "NVDA"])
+        service.generate_text.assert_not_called()
+        self.assertEqual(service.get_ticker_stats(), {"resolved_locally": 2, "llm_calls_avoided": 1})
+
+class TestSearchService(unittest.TestCase):
+    @patch('src.services.search_service.backoff_delay', return_value=0)
+    @patch('src.services.search_service.DDGS')
+    def test_enrich_articles_in_order_with_retry(self, mock_ddgs_cls, _mock_delay):
+        calls = []
+        def fake_text(query, max_results=5):
+            calls.append(query)
+            # First query is rate limited once
+            if len(calls) == 1:
+                raise RatelimitException("202 Ratelimit")
+            return [{"title": query.split()[0], "body": "snippet", "href": "http://example.com"}]
+        mock_ddgs_cls.return_value.text.side_effect = fake_text
+        
+        service = SearchService()
+        service.rate_limiter = TokenBucket(rate=1000, capacity=10)
+        service.cache = None
+        articles = [{"title": f"Headline{i}"} for i in range(5)]
+        enriched = service.enrich_articles(articles, tickers=[None] * 5)
+        
+        self.assertEqual([a['title'] for a in enriched], [f"Headline{i}" for i in range(5)])
+        for article in enriched:
+            self.assertIn("Summary: snippet", article['search_context'])
+        self.assertEqual(len(calls), 6)
+
+    def test_rate_limit_and_pool_are_shared_across_instances(self):
+        first, second = SearchService(), SearchService()
+        self.assertIs(first.rate_limiter, second.rate_limiter)
+        self.assertIs(first.executor, second.executor)
+
+    @patch('src.services.search_service.DDGS')
+    def test_search_cache_and_negative_cache(self, mock_ddgs_cls):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            service = SearchService()
+            service.cache = DiskCache(os.path.join(tmp_dir, "search.sqlite3"), ttl_seconds=60, max_entries=100)
+            mock_ddgs_cls.return_value.text.return_value = [{"title": "T", "body": "B", "href": "http://example.com"}]
+            
+            first = service.enrich_article({"title": "Fed holds rates"})
+            # Same query modulo case/punctuation is served from the cache
+            second = service.enrich_article({"title": "FED holds rates!"})
+            
+            self.assertIsNone(first['search_context_cached_at'])
+            self.assertIsNotNone(second['search_context_cached_at'])
+            self.assertEqual(first['search_context'], second['search_context'])
+            self.assertEqual(mock_ddgs_cls.return_value.text.call_count, 1)
+            
+            # Failures are cached too
+            mock_ddgs_cls.return_value.text.side_effect = Exception("network down")
+            self.assertIn("Search failed", service.search_news_context("Oil jumps"))
+            self.assertIn("Search failed", service.search_news_context("Oil jumps"))
+            self.assertEqual(mock_ddgs_cls.return_value.text.call_count, 2)
+            # A cached miss is not presented as cached context
+            self.assertIsNone(service.enrich_article({"title": "Oil jumps"})['search_context_cached_at'])
+            mock_ddgs_cls.return_value.text.side_effect = None
+            mock_ddgs_cls.return_value.text.return_value = []
+            service.enrich_article({"title": "Gold steady"})
+            self.assertIsNone(service.enrich_article({"title": "Gold steady"})['search_context_cached_at'])
+
+class TestReportGenerator(unittest.TestCase):
+    def test_news_section_keeps_order_and_placeholders(self):
+        mock_llm = MagicMock()
+        
+        # Earlier items finish last; item 2 fails
+        def fake_generate(prompt, system_prompt=None, **kwargs):
+            if "Article Title: News 2" in prompt:
+                raise Exception("API error")
+            for i in range(1, 5):
+                if f"Article Title: News {i}\n" in prompt:
+                    time.sleep((5 - i) * 0.05)
+                    return f"Analysis {i}"
+        mock_llm.generate_text.side_effect = fake_generate
+        
+        generator = ReportGenerator(mock_llm, MagicMock())
+        news_items = [
+            {"title": f"News {i}", "source": "Reuters", "publishedAt": "", "url": f"http://reuters.com/{i}", "description": ""}
+            for i in range(1, 5)
+        ]
+        section = generator._generate_news_section(news_items, "themes")
+        
+        self.assertLess(section.index("Analysis 1"), section.index("### 2. News 2"))
+        self.assertLess(section.index("### 2. News 2"), section.index("Analysis 3"))
+        self.assertLess(section.index("Analysis 3"), section.index("Analysis 4"))
+        self.assertIn("*Error generating analysis.*", section)
+
+    def test_deep_dives_consume_stream(self):
+        mock_llm = MagicMock()
+        first_started = threading.Event()
+        def fake_generate(prompt, system_prompt=None, **kwargs):
+            if "Article Title: News 1\n" in prompt:
+                first_started.set()
+            return "Analysis"
+        mock_llm.generate_text.side_effect = fake_generate
+
+        def stream():
+            yield {"title": "News 1", "source": "Reuters", "publishedAt": "", "url": "http://reuters.com/1", "description": ""}
+            # Article 2 is still being enriched while article 1 is analysed
+            self.assertTrue(first_started.wait(5))
+            yield {"title": "News 2", "source": "Reuters", "publishedAt": "", "url": "http://reuters.com/2", "description": ""}
+
+        generator = ReportGenerator(mock_llm, MagicMock())
+        sections = []
+        generator._generate_news_section(stream(), "themes", on_section=lambda index, item, section: sections.append(item['title']))
+        self.assertEqual(sections, ["News 1", "News 2"])
+
+    def test_finished_deep_dive_emitted_while_stream_blocks(self):
+        mock_llm = MagicMock()
+        mock_llm.generate_text.return_value = "Analysis"
+        first_emitted = threading.Event()
+
+        def stream():
+            yield {"title": "News 1", "source": "Reuters", "publishedAt": "", "url": "http://reuters.com/1", "description": ""}
+            # The next article is still being enriched; section 1 must not wait for it
+            self.assertTrue(first_emitted.wait(5))
+            yield {"title": "News 2", "source": "Reuters", "publishedAt": "", "url": "http://reuters.com/2", "description": ""}
+
+        def on_section(index, item, section):
+            if index == 1:
+                first_emitted.set()
+
+        generator = ReportGenerator(mock_llm, MagicMock())
+        content = generator._generate_news_section(stream(), "themes", on_section=on_section)
+        self.assertNotIn("第2章", content)
+        self.assertLess(content.index("Analysis"), content.rindex("Analysis"))
+
+    def test_report_sections_written_as_they_complete(self):
+        mock_llm = MagicMock()
+        mock_llm.generate_text.return_value = "Analysis"
+        mock_llm.stream_text.side_effect = lambda prompt, system_prompt=None, **kwargs: iter(["Streamed ", "section"])
+        progress = MagicMock()
+        written = []
+        
+        generator = ReportGenerator(mock_llm, MagicMock())
+        news_items = [
+            {"title": f"News {i}", "source": "Reuters", "publishedAt": "", "url": f"http://reuters.com/{i}", "description": ""}
+            for i in range(1, 3)
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "report.md")
+            # Record what is on disk each time a section is reported
+            progress.section_done.side_effect = lambda label: written.append((label, open(path, encoding='utf-8').read()))
+            report = generator.generate_report({"S&P 500": {"close": 1, "change": 0, "change_pct": 0}}, news_items,
+                                               output_path=path, progress=progress)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), report)
+        
+        labels = [label for label, _ in written]
+        self.assertEqual(labels, ["テーマ分析", "市場概況", "ニュース 1/2: News 1", "ニュース 2/2: News 2", "総括"])
+        # The market overview was on disk before any deep dive finished
+        self.assertIn("Streamed section", dict(written)["市場概況"])
+        self.assertNotIn("Analysis", dict(written)["市場概況"])
+        progress.preview.assert_called_with("Streamed section")
+
+class TestFileManager(unittest.TestCase):
+    @patch('src.managers.file_manager.MediaIoBaseUpload')
+    @patch('src.managers.file_manager.WebClient')
+    @patch('src.managers.file_manager.SLACK_BOT_TOKEN', 'test_token')
+    def test_batched_uploads_from_memory(self, mock_web_client_cls, mock_media_cls):
+        file_manager = FileManager(MagicMock())
+        file_manager.drive_service = MagicMock()
+        file_manager.drive_service.files.return_value.create.return_value.execute.return_value = {"id": "drive-id"}
+        artifacts = [
+            {"filename": "report.md", "content": "# Report"},
+            {"filename": "log.txt", "content": "log"},
+        ]
+        
+        file_manager.upload_to_slack(artifacts, "C12345", "thread_ts")
+        ids = file_manager.upload_many_to_drive(artifacts, folder_id="folder")
+        
+        # One Slack request carrying every file
+        mock_web_client_cls.return_value.files_upload_v2.assert_called_once()
+        uploads = mock_web_client_cls.return_value.files_upload_v2.call_args.kwargs["file_uploads"]
+        self.assertEqual([u["filename"] for u in uploads], ["report.md", "log.txt"])
+        self.assertEqual(uploads[0]["content"], "# Report")
+        
+        # Small in-memory files use simple (non-resumable) Drive uploads
+        self.assertEqual(ids, ["drive-id", "drive-id"])
+        for call in mock_media_cls.call_args_list:
+            self.assertFalse(call.kwargs["resumable"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import tempfile
+import threading
+import time
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.disk_cache import DiskCache
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cache", "test.sqlite3")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key_is_content_addressed(self):
+        key = DiskCache.make_key("openai", "gpt-4o", "system", "prompt", 0.7)
+        self.assertEqual(key, DiskCache.make_key("openai", "gpt-4o", "system", "prompt", 0.7))
+        self.assertNotEqual(key, DiskCache.make_key("openai", "gpt-4o", "system", "prompt", 0.2))
+
+    def test_roundtrip_and_ttl(self):
+        cache = DiskCache(self.path, ttl_seconds=60, max_entries=10)
+        cache.set("a", "日本語テキスト")
+        cache.set("b", {"x": 1}, ttl_seconds=0.05)
+        
+        self.assertEqual(cache.get("a"), "日本語テキスト")
+        self.assertEqual(cache.get("b"), {"x": 1})
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNone(cache.get("missing"))
+
+    def test_lru_eviction(self):
+        cache = DiskCache(self.path, ttl_seconds=60, max_entries=2)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        cache.set("b", 2)
+        time.sleep(0.01)
+        cache.get("a")  # "b" is now least recently used
+        time.sleep(0.01)
+        cache.set("c", 3)
+        
+        self.assertEqual(cache.count(), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+    def test_concurrent_writers(self):
+        # Separate instances on the same file behave like separate runs
+        caches = [DiskCache(self.path, ttl_seconds=60, max_entries=1000) for _ in range(4)]
+        def worker(n):
+            for i in range(25):
+                caches[n].set(f"{n}-{i}", i)
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(caches[0].count(), 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import MagicMock, patch
 import os
 import sys
+import tempfile
 
 # Mock slack_bolt.App BEFORE importing src.bot to prevent auth check
 with patch('slack_bolt.App') as mock_app_cls:
@@ -31,7 +32,7 @@ class TestIntegration(unittest.TestCase):
         }
         
         mock_news_instance = mock_news_cls.return_value
-        mock_news_instance.fetch_news.return_value = [
+        mock_news_instance.fetch_candidates.return_value = news_items = [
             {
                 "title": "Test News",
                 "url": "http://reuters.com/test",
@@ -40,12 +41,16 @@ class TestIntegration(unittest.TestCase):
                 "content": "Test content"
             }
         ]
+        mock_news_instance.iter_enriched.side_effect = lambda candidates: iter(candidates)
         
         mock_llm_instance = mock_llm_cls.return_value
         mock_llm_instance.generate_text.return_value = "Generated Content"
         
         mock_file_manager_instance = mock_file_manager_cls.return_value
         mock_file_manager_instance.save_to_local.return_value = "/tmp/test_file.txt"
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        mock_file_manager_instance.local_path.side_effect = lambda filename, **kwargs: os.path.join(tmp_dir.name, filename)
         
         # Mock Slack 'say' function
         mock_say = MagicMock()
@@ -56,7 +61,8 @@ class TestIntegration(unittest.TestCase):
         # Assertions
         # 1. Check if data was collected
         mock_stock_instance.fetch_stock_prices.assert_called_once()
-        mock_news_instance.fetch_news.assert_called_once()
+        mock_news_instance.fetch_candidates.assert_called_once()
+        mock_news_instance.iter_enriched.assert_called_once_with(news_items)
         
         # 2. Check if LLM was called for report, script, and subtitles
         # We expect generate_text to be called multiple times
@@ -65,8 +71,8 @@ class TestIntegration(unittest.TestCase):
         # 3. Check if files were saved
         self.assertTrue(mock_file_manager_instance.save_to_local.call_count >= 4) # Report, Script, Subs, Log
         
-        # 4. Check if uploaded to Slack
-        mock_file_manager_instance.upload_to_slack.assert_called_once()
+        # 4. Check if uploaded (Slack and Drive in one combined stage)
+        mock_file_manager_instance.upload_artifacts.assert_called_once()
         
         # 5. Check if completion message was sent
         mock_say.assert_any_call(text="✅ レポート生成が完了しました！", thread_ts="thread_ts_123")
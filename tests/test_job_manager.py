@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import MagicMock
+import threading
+import time
+import tempfile
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.managers.job_manager import JobManager
+from src.utils.checkpoint import CheckpointStore, CHECKPOINT_DIR_NAME, find_resumable_run
+
+class TestJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.finished = []
+
+        def run_job(job):
+            self.started.set()
+            self.release.wait(5)
+            threads = job.close()
+            job.say("done")
+            self.finished.append((job.key, threads))
+        self.manager = JobManager(run_job, max_workers=1, max_queue=1, estimated_duration=600)
+        self.addCleanup(self.release.set)
+
+    def test_duplicate_mentions_attach_to_running_job(self):
+        say_a, say_b = MagicMock(), MagicMock()
+        first = self.manager.submit("report", say_a, "ts1")
+        self.assertEqual(first["status"], "started")
+        self.assertTrue(self.started.wait(5))
+
+        second = self.manager.submit("report", say_b, "ts2")
+        self.assertEqual(second["status"], "attached")
+        self.assertEqual(second["position"], 0)
+        self.assertLessEqual(second["eta_seconds"], 600)
+        self.assertIs(second["job"], first["job"])
+
+        self.release.set()
+        for _ in range(100):
+            if self.finished:
+                break
+            time.sleep(0.05)
+        self.assertEqual(self.finished, [("report", ["ts1", "ts2"])])
+        say_b.assert_called_with(text="done", thread_ts="ts2")
+
+    def test_queue_is_bounded_and_reports_position(self):
+        running = self.manager.submit("report", MagicMock(), "ts1")
+        self.assertTrue(self.started.wait(5))
+
+        queued = self.manager.submit("resume", MagicMock(), "ts2")
+        self.assertEqual((queued["status"], queued["position"]), ("queued", 1))
+        # Waits for the running job (~600s) and then runs for ~600s itself
+        self.assertGreater(queued["eta_seconds"], running["eta_seconds"])
+
+        rejected = self.manager.submit("fresh", MagicMock(), "ts3")
+        self.assertEqual(rejected["status"], "rejected")
+        # Same key as the queued job: coalesced even though the queue is full
+        self.assertEqual(self.manager.submit("resume", MagicMock(), "ts4")["status"], "attached")
+        self.assertEqual(self.manager.get_stats()["queued"], 1)
+
+    def test_closed_job_run_is_not_resumable(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            checkpoints = CheckpointStore(os.path.join(output_dir, "run1", CHECKPOINT_DIR_NAME))
+            closed = threading.Event()
+
+            def run_job(job):
+                job.run_name = "run1"
+                checkpoints.save("stocks", {})
+                # Closed to new subscribers but still uploading, not yet marked complete
+                job.close()
+                closed.set()
+                self.release.wait(5)
+            manager = JobManager(run_job, max_workers=1, max_queue=1)
+            manager.submit("report", MagicMock(), "ts1")
+            self.assertTrue(closed.wait(5))
+
+            self.assertEqual(manager.active_run_names(), {"run1"})
+            self.assertIsNone(find_resumable_run(output_dir, exclude=manager.active_run_names()))
+
+            self.release.set()
+            for _ in range(100):
+                if not manager.active_run_names():
+                    break
+                time.sleep(0.05)
+            # The job ended without completing the run: resumable now
+            self.assertEqual(find_resumable_run(output_dir, exclude=manager.active_run_names()), "run1")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import threading
+import time
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.llm_scheduler import ProviderScheduler, is_rate_limit_error, retry_after_seconds
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("Error code: 429")
+        self.status_code = 429
+        self.response = type("Response", (), {"headers": {"retry-after": retry_after} if retry_after else {}})()
+
+class TestProviderScheduler(unittest.TestCase):
+
+    def test_round_robin_across_runs(self):
+        scheduler = ProviderScheduler("openai", rpm=0, tpm=0, max_inflight=1)
+        order = []
+        # Hold the only slot so every request below has to queue
+        scheduler.acquire("blocker")
+
+        def call(run_id):
+            with scheduler.slot(run_id):
+                order.append(run_id)
+
+        threads = []
+        for run_id in ["a", "a", "a", "b"]:
+            thread = threading.Thread(target=call, args=(run_id,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.02)
+
+        self.assertEqual(scheduler.get_stats()["queue_depth"], 4)
+        scheduler.release()
+        for thread in threads:
+            thread.join(timeout=2)
+
+        # Run "b" queued last but is served second, not behind all of "a"
+        self.assertEqual(order, ["a", "b", "a", "a"])
+        self.assertEqual(scheduler.get_stats()["max_queue_depth"], 4)
+
+    def test_requests_per_minute_budget(self):
+        scheduler = ProviderScheduler("anthropic", rpm=2, tpm=0, max_inflight=5)
+        scheduler.acquire("run")
+        scheduler.acquire("run")
+        now = time.monotonic()
+        self.assertGreater(scheduler._delay_until_capacity(now, 0), 59)
+
+        # Age the window out instead of waiting a minute
+        scheduler.window = type(scheduler.window)((t - 60, n) for t, n in scheduler.window)
+        self.assertLess(scheduler.acquire("run"), 0.5)
+
+    def test_tokens_per_minute_budget(self):
+        scheduler = ProviderScheduler("openai", rpm=0, tpm=1000, max_inflight=5)
+        scheduler.acquire("run", tokens=800)
+        scheduler.release()
+        now = time.monotonic()
+        self.assertEqual(scheduler._delay_until_capacity(now, 200), 0)
+        self.assertGreater(scheduler._delay_until_capacity(now, 300), 59)
+
+    def test_rate_limit_pauses_provider(self):
+        scheduler = ProviderScheduler("openai", rpm=0, tpm=0, max_inflight=5)
+        with self.assertRaises(RateLimitError):
+            with scheduler.slot("run"):
+                raise RateLimitError(retry_after="0.2")
+
+        waited = scheduler.acquire("run")
+        self.assertGreater(waited, 0.1)
+        self.assertEqual(scheduler.inflight, 1)
+
+    def test_rate_limit_detection(self):
+        self.assertTrue(is_rate_limit_error(RateLimitError()))
+        self.assertTrue(is_rate_limit_error(Exception("429 Resource has been exhausted")))
+        self.assertFalse(is_rate_limit_error(Exception("503 Service Unavailable")))
+        self.assertEqual(retry_after_seconds(RateLimitError(retry_after="7")), 7.0)
+        self.assertIsNone(retry_after_seconds(Exception("429")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import time
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+with patch.dict(os.environ, {'NEWSAPI_KEY': 'test_key'}):
+    from src.collectors.market_poller import MarketPoller
+
+HEADLINES = {
+    1: ("Fed holds rates steady", "Policymakers signal patience on inflation"),
+    2: ("Oil jumps on supply cuts", "Crude climbs after producers trim output"),
+    3: ("Chipmaker beats estimates", "Semiconductor demand lifts quarterly revenue"),
+}
+
+def make_article(n, score):
+    title, description = HEADLINES[n]
+    return {'title': title, 'description': description, 'content': description, 'url': f"http://example.com/{n}",
+            'source': 'Src', 'relevance_score': score}
+
+class TestMarketPoller(unittest.TestCase):
+
+    def setUp(self):
+        self.news_collector = MagicMock()
+        self.enrich_calls = []
+
+        def iter_enriched(candidates):
+            top = candidates[:10]
+            self.enrich_calls.append([a['url'] for a in top if 'search_context' not in a])
+            for article in top:
+                article.setdefault('search_context', f"context for {article['url']}")
+            return iter(top)
+        self.news_collector.iter_enriched.side_effect = iter_enriched
+        self.stock_collector = MagicMock()
+        self.poller = MarketPoller(self.news_collector, self.stock_collector, news_interval=60, quote_interval=30,
+                                   daily_news_quota=2, window_seconds=3600)
+
+    def test_window_merges_polls_and_keeps_enrichment(self):
+        self.news_collector.fetch_candidates.return_value = [make_article(1, 5.0), make_article(2, 3.0)]
+        self.assertTrue(self.poller.poll_news())
+        self.news_collector.fetch_candidates.return_value = [make_article(3, 4.0), make_article(1, 5.0)]
+        self.assertTrue(self.poller.poll_news())
+
+        news = self.poller.get_news()
+        self.assertEqual([a['url'] for a in news], ["http://example.com/1", "http://example.com/3", "http://example.com/2"])
+        # Story 1 and 2 were enriched by the first poll only
+        self.assertEqual(self.enrich_calls[1], ["http://example.com/3"])
+
+    @patch('src.collectors.market_poller.SEARCH_CACHE_TTL_SECONDS', 600)
+    def test_stale_search_context_is_refreshed(self):
+        self.poller.daily_news_quota = 10
+        self.news_collector.fetch_candidates.return_value = [make_article(1, 5.0), make_article(2, 3.0)]
+        self.poller.poll_news()
+        # Story 2 drops out of the feed but stays in the window
+        self.news_collector.fetch_candidates.return_value = [make_article(1, 5.0)]
+        with patch('src.collectors.market_poller.time.time', return_value=time.time() + 300):
+            self.poller.poll_news()
+        self.assertEqual(self.enrich_calls[1], [])
+        with patch('src.collectors.market_poller.time.time', return_value=time.time() + 900):
+            self.poller.poll_news()
+        self.assertEqual(self.enrich_calls[2], ["http://example.com/1", "http://example.com/2"])
+
+    def test_articles_expire_from_window(self):
+        self.news_collector.fetch_candidates.return_value = [make_article(1, 5.0)]
+        self.poller.poll_news()
+        self.news_collector.fetch_candidates.return_value = [make_article(2, 1.0)]
+        with patch('src.collectors.market_poller.time.time', return_value=time.time() + 4000):
+            self.poller.poll_news()
+            self.assertEqual([a['url'] for a in self.poller.get_news()], ["http://example.com/2"])
+
+    def test_daily_quota_skips_polls(self):
+        self.news_collector.fetch_candidates.return_value = [make_article(1, 5.0)]
+        self.assertTrue(self.poller.poll_news())
+        self.assertTrue(self.poller.poll_news())
+        self.assertFalse(self.poller.poll_news())
+        self.assertEqual(self.news_collector.fetch_candidates.call_count, 2)
+
+    def test_stale_or_missing_data_returns_none(self):
+        self.assertIsNone(self.poller.get_quotes())
+        self.stock_collector.fetch_stock_prices.return_value = {"S&P 500": {"price": 1.0}}
+        self.assertTrue(self.poller.poll_quotes())
+        self.assertEqual(self.poller.get_quotes(), {"S&P 500": {"price": 1.0}})
+        with patch('src.collectors.market_poller.time.time', return_value=time.time() + 121):
+            self.assertIsNone(self.poller.get_quotes())
+
+    def test_readers_get_copies(self):
+        self.news_collector.fetch_candidates.return_value = [make_article(1, 5.0)]
+        self.poller.poll_news()
+        self.poller.get_news()[0]['title'] = "changed"
+        self.assertEqual(self.poller.get_news()[0]['title'], "Fed holds rates steady")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import os
+import sys
+import time
+import random
+import string
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.near_duplicates import cluster_near_duplicates
+
+class TestNearDuplicates(unittest.TestCase):
+
+    def test_clusters_reworded_story_across_sources(self):
+        articles = [
+            {"title": "Nvidia shares jump after record data center revenue", "source": "Reuters", "url": "http://reuters.com/nvda",
+             "description": "Chipmaker beats quarterly forecasts on AI demand"},
+            {"title": "Fed holds rates steady as inflation cools", "source": "Bloomberg", "url": "http://bloomberg.com/fed",
+             "description": "Policymakers signal patience"},
+            {"title": "Nvidia shares jump on record data-center revenue", "source": "Bloomberg", "url": "http://bloomberg.com/nvda",
+             "description": "The chipmaker beat quarterly forecasts on strong AI demand"},
+        ]
+        result = cluster_near_duplicates(articles, threshold=0.5)
+
+        self.assertEqual([a["url"] for a in result], ["http://reuters.com/nvda", "http://bloomberg.com/fed"])
+        self.assertEqual(result[0]["related_sources"],
+                         [{"title": articles[2]["title"], "source": "Bloomberg", "url": "http://bloomberg.com/nvda"}])
+        self.assertNotIn("related_sources", result[1])
+
+    def test_distinct_stories_are_kept(self):
+        articles = [{"title": f"Company {name} reports results", "description": f"{name} guidance {i}"}
+                    for i, name in enumerate(["Apple", "Tesla", "Oracle", "Boeing"])]
+        self.assertEqual(len(cluster_near_duplicates(articles, threshold=0.8)), 4)
+
+    def test_fast_enough_for_wide_pool(self):
+        rng = random.Random(7)
+        def words(n):
+            return " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(6)) for _ in range(n))
+        articles = [{"title": words(10), "description": words(25)} for _ in range(100)]
+        # Best of three, so a busy test machine doesn't make this flaky
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            result = cluster_near_duplicates(articles)
+            timings.append((time.perf_counter() - start) / len(articles))
+        per_article = min(timings)
+        self.assertEqual(len(result), 100)
+        self.assertLess(per_article, 0.001)
+
+if __name__ == '__main__':
+    unittest.main()
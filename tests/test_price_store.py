@@ -0,0 +1,64 @@
+import unittest
+import tempfile
+import datetime
+import time
+import os
+import sys
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.collectors.price_store import PriceHistoryStore
+
+class TestPriceHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = PriceHistoryStore(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_append_only_new_bars_and_update_last(self):
+        dates = np.arange("2025-01-01", "2025-01-04", dtype="datetime64[D]")
+        self.assertEqual(self.store.append("^DJI", dates, [1.0, 2.0, 3.0]), 3)
+        
+        # Overlapping download: older bars are ignored, the last bar is corrected
+        dates = np.arange("2025-01-02", "2025-01-06", dtype="datetime64[D]")
+        self.assertEqual(self.store.append("^DJI", dates, [2.0, 3.5, 4.0, np.nan]), 2)
+        
+        bars = self.store.read("^DJI")
+        self.assertEqual(list(bars["close"]), [1.0, 2.0, 3.5, 4.0])
+        self.assertEqual(self.store.last_date("^DJI"), datetime.date(2025, 1, 4))
+        self.assertIsNone(self.store.last_date("UNKNOWN"))
+
+    def test_metrics(self):
+        dates = np.arange("2025-01-01", "2025-01-22", dtype="datetime64[D]")
+        closes = 100.0 * 1.01 ** np.arange(21)
+        self.store.append("SPY", dates, closes)
+        
+        metrics = self.store.compute_metrics(["SPY", "MISSING"])["SPY"]
+        
+        self.assertAlmostEqual(metrics["change_pct"], 1.0)
+        self.assertAlmostEqual(metrics["ret_5d"], (1.01 ** 5 - 1) * 100)
+        self.assertAlmostEqual(metrics["ret_20d"], (1.01 ** 20 - 1) * 100)
+        # Constant daily return -> zero volatility
+        self.assertAlmostEqual(metrics["vol_20d"], 0.0)
+
+    def test_large_history_reads_fast(self):
+        dates = np.arange("2000-01-01", "2025-01-01", dtype="datetime64[D]")
+        symbols = [f"SYM{i}" for i in range(200)]
+        for symbol in symbols:
+            self.store.append(symbol, dates, np.linspace(1, 2, len(dates)))
+        
+        start = time.perf_counter()
+        metrics = self.store.compute_metrics(symbols)
+        elapsed = time.perf_counter() - start
+        
+        self.assertEqual(len(metrics), 200)
+        # Well under a millisecond per symbol
+        self.assertLess(elapsed / len(symbols), 0.005)
+
+if __name__ == '__main__':
+    unittest.main()
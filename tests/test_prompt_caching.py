@@ -0,0 +1,120 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+import os
+import json
+import threading
+
+# Mock environment variables before importing modules that might use them at top level
+with patch.dict(os.environ, {'NEWSAPI_KEY': 'test_key'}):
+    from src.services.llm_service import LLMService
+    from src.services.provider_registry import ProviderRegistry
+    from src.generators.report_generator import ReportGenerator
+
+def count_tokens(text):
+    return len(text) // 4
+
+class FakeAnthropic:
+    """
+    Local stand-in for the Anthropic client: caches the request prefix up to the
+    last cache_control breakpoint and reports cache reads/writes in `usage`.
+    """
+    def __init__(self):
+        self.cache = set()
+        self.requests = []
+        # Deep dives call the client from several threads
+        self._lock = threading.Lock()
+        self.messages = SimpleNamespace(create=self.create)
+
+    def create(self, **kwargs):
+        with self._lock:
+            return self._create(**kwargs)
+
+    def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        blocks = list(kwargs.get("system", []))
+        for message in kwargs["messages"]:
+            content = message["content"]
+            blocks.extend(content if isinstance(content, list) else [{"type": "text", "text": content}])
+        breakpoint_index = max((i for i, b in enumerate(blocks) if "cache_control" in b), default=-1)
+        cached_text = "".join(b["text"] for b in blocks[:breakpoint_index + 1])
+        rest_text = "".join(b["text"] for b in blocks[breakpoint_index + 1:])
+
+        read = write = 0
+        if cached_text in self.cache:
+            read = count_tokens(cached_text)
+        elif cached_text:
+            self.cache.add(cached_text)
+            write = count_tokens(cached_text)
+        usage = SimpleNamespace(input_tokens=count_tokens(rest_text), output_tokens=10,
+                                cache_read_input_tokens=read, cache_creation_input_tokens=write)
+        return SimpleNamespace(content=[SimpleNamespace(text="### Analysis")], usage=usage)
+
+class FakeOpenAI:
+    """
+    Local stand-in for the OpenAI client: reports the longest prefix (in 128-token
+    steps, 1024 minimum) shared with an earlier request as cached tokens.
+    """
+    def __init__(self):
+        self.seen = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        text = json.dumps(kwargs["messages"], ensure_ascii=False)
+        with self._lock:
+            common = max((len(os.path.commonprefix([text, other])) for other in self.seen), default=0)
+            self.seen.append(text)
+        cached = count_tokens(text[:common]) // 128 * 128
+        usage = SimpleNamespace(prompt_tokens=count_tokens(text), completion_tokens=10,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=cached if cached >= 1024 else 0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="### Analysis"))], usage=usage)
+
+class TestPromptCaching(unittest.TestCase):
+
+    def _run_deep_dives(self, provider, client):
+        with patch.object(ProviderRegistry, 'has_key', side_effect=lambda p: p == provider):
+            registry = ProviderRegistry()
+            registry._clients = {provider: client}
+            with patch('src.services.llm_service.get_provider_registry', return_value=registry), \
+                    patch('src.services.llm_service.LLM_CACHE_ENABLED', False):
+                llm = LLMService()
+            generator = ReportGenerator(llm, MagicMock())
+            news_items = [
+                {"title": f"News {i}", "source": "Reuters", "publishedAt": "2025-01-01", "url": f"http://reuters.com/{i}",
+                 "description": f"Story number {i}", "search_results": []}
+                for i in range(1, 4)
+            ]
+            # Long enough for OpenAI's 1024-token minimum
+            themes = "\n".join(f"{i}. Theme {i}: rates, earnings and the dollar moved together." * 3 for i in range(1, 40))
+            # One worker: the first call writes the prompt cache before the others read it
+            with patch('src.generators.report_generator.DEEP_DIVE_MAX_WORKERS', 1):
+                generator._generate_news_section(news_items, themes)
+        return llm
+
+    def test_anthropic_prefix_is_marked_and_reused(self):
+        client = FakeAnthropic()
+        llm = self._run_deep_dives('anthropic', client)
+
+        first = next(request for request in client.requests
+                     if "News 1" in json.dumps(request["messages"], ensure_ascii=False))
+        content = first["messages"][0]["content"]
+        self.assertIn("cache_control", content[0])
+        self.assertIn("Identified Market Themes", content[0]["text"])
+        # The article itself is outside the cached prefix
+        self.assertNotIn("News 1", content[0]["text"])
+        self.assertIn("News 1", content[1]["text"])
+
+        stats = llm.get_token_stats()
+        self.assertGreater(stats["cached"], 0)
+        self.assertLess(stats["cached"], stats["input"])
+
+    def test_openai_shared_prefix_comes_first(self):
+        client = FakeOpenAI()
+        llm = self._run_deep_dives('openai', client)
+
+        # Two of the three calls reuse the shared system prompt + instructions
+        self.assertGreaterEqual(llm.get_token_stats()["cached"], 2 * 1024)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.relevance_scorer import RelevanceScorer
+
+class TestRelevanceScorer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scorer = RelevanceScorer()
+
+    def test_keyword_rules_match_whole_words(self):
+        self.assertIsNotNone(self.scorer.rejection_reason("The best holiday gift guides of 2025"))
+        self.assertIsNotNone(self.scorer.rejection_reason("Cruise reviews: seven nights in the Caribbean"))
+        self.assertIsNotNone(self.scorer.rejection_reason("ECB holds rates as euro zone stalls"))
+        # Substrings no longer trigger: "eu" in "Euro"/"Reuters", "uk" in "Ukraine", "cup" in "cupertino"
+        self.assertIsNone(self.scorer.rejection_reason("European gas prices fall on Ukraine talks"))
+        self.assertIsNone(self.scorer.rejection_reason("Apple's Cupertino campus expansion approved"))
+        # UK/EU headlines that also mention the US market are kept
+        self.assertIsNone(self.scorer.rejection_reason("UK gilts track U.S. Treasuries lower"))
+
+    def test_short_keywords_are_case_insensitive(self):
+        self.assertIsNone(self.scorer.rejection_reason("UK gilts slide as Fed signals more hikes"))
+        self.assertIsNone(self.scorer.rejection_reason("Bank of England holds rates; Fed in focus"))
+        self.assertIsNone(self.scorer.rejection_reason("Europe stocks fall as Dow slumps"))
+        self.assertIsNotNone(self.scorer.rejection_reason("Argentina wins World Cup final"))
+        # The pronoun "us" is not the US
+        self.assertEqual(self.scorer.rejection_reason("Europe: what it means for us"), "non_us")
+
+    def test_market_news_outranks_lifestyle(self):
+        articles = [
+            {"title": "Celebrity chef opens new restaurant in Manhattan", "description": "A tasting menu review"},
+            {"title": "Nvidia shares jump after record data center revenue", "description": "Quarterly earnings beat forecasts"},
+            {"title": "Fed holds rates steady as inflation cools", "description": "Treasury yields fall"},
+        ]
+        ranked = self.scorer.rank(articles, min_score=0.3)
+        titles = [a["title"] for a in ranked]
+        self.assertEqual(len(titles), 2)
+        self.assertNotIn("Celebrity chef opens new restaurant in Manhattan", titles)
+        self.assertTrue(all(0 <= a["relevance_score"] <= 1 for a in articles))
+        self.assertGreater(ranked[0]["relevance_score"], 0.8)
+
+    def test_unknown_text_is_neutral(self):
+        self.assertAlmostEqual(self.scorer.score("Valid News", "Test"), 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
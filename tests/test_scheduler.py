@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import datetime
+from zoneinfo import ZoneInfo
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.managers.scheduler import CronSchedule, PrecomputeScheduler, WarmArtifacts, parse_schedule
+
+TOKYO = ZoneInfo("Asia/Tokyo")
+
+class TestScheduler(unittest.TestCase):
+
+    def test_next_after_weekdays(self):
+        schedule = CronSchedule("30 7 * * mon-fri", TOKYO)
+        # Friday 08:00 -> Monday 07:30
+        friday = datetime.datetime(2025, 11, 21, 8, 0, tzinfo=TOKYO)
+        self.assertEqual(schedule.next_after(friday), datetime.datetime(2025, 11, 24, 7, 30, tzinfo=TOKYO))
+        # Exactly on a match -> the next one
+        monday = datetime.datetime(2025, 11, 24, 7, 30, tzinfo=TOKYO)
+        self.assertEqual(schedule.next_after(monday), datetime.datetime(2025, 11, 25, 7, 30, tzinfo=TOKYO))
+
+    def test_steps_lists_and_timezones(self):
+        schedule = CronSchedule("*/20 6,18 1 * *", TOKYO)
+        start = datetime.datetime(2025, 11, 30, 12, 0, tzinfo=datetime.timezone.utc)  # 21:00 JST
+        self.assertEqual(schedule.next_after(start), datetime.datetime(2025, 12, 1, 6, 0, tzinfo=TOKYO))
+        self.assertEqual(schedule.next_after(datetime.datetime(2025, 12, 1, 6, 0, tzinfo=TOKYO)),
+                         datetime.datetime(2025, 12, 1, 6, 20, tzinfo=TOKYO))
+
+    def test_day_and_weekday_are_ored(self):
+        schedule = CronSchedule("0 7 1 * 1", TOKYO)
+        # Tuesday 28 Oct -> Saturday 1 Nov (the 1st), then Monday 3 Nov
+        tuesday = datetime.datetime(2025, 10, 28, 12, 0, tzinfo=TOKYO)
+        first = schedule.next_after(tuesday)
+        self.assertEqual(first, datetime.datetime(2025, 11, 1, 7, 0, tzinfo=TOKYO))
+        self.assertEqual(schedule.next_after(first), datetime.datetime(2025, 11, 3, 7, 0, tzinfo=TOKYO))
+
+    def test_invalid_expressions(self):
+        for expression in ["30 7 * *", "61 7 * * *", "0 0 31 2 *", "0 5-2 * * *"]:
+            with self.assertRaises(ValueError):
+                CronSchedule(expression, TOKYO).next_after(datetime.datetime(2025, 1, 1, tzinfo=TOKYO))
+
+    def test_scheduler_picks_earliest_schedule(self):
+        scheduler = PrecomputeScheduler(parse_schedule("30 7 * * 1-5; 30 6 * * 2-6", "Asia/Tokyo"), lambda: None)
+        now = datetime.datetime(2025, 11, 25, 6, 0, tzinfo=TOKYO)  # Tuesday
+        self.assertEqual(scheduler.next_run(now), datetime.datetime(2025, 11, 25, 6, 30, tzinfo=TOKYO))
+        self.assertIsNone(PrecomputeScheduler([], lambda: None).next_run(now))
+
+    def test_warm_artifacts_expire(self):
+        warm = WarmArtifacts()
+        self.assertIsNone(warm.get_fresh(60))
+        with patch('src.managers.scheduler.time.time', return_value=1000.0):
+            warm.update([{"filename": "report.md", "content": "x"}], "20251125_07:30")
+        with patch('src.managers.scheduler.time.time', return_value=1030.0):
+            self.assertEqual(warm.get_fresh(60)["run_name"], "20251125_07:30")
+        with patch('src.managers.scheduler.time.time', return_value=1100.0):
+            self.assertIsNone(warm.get_fresh(60))
+
+if __name__ == '__main__':
+    unittest.main()
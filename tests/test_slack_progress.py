@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import MagicMock
+import time
+import threading
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.slack_progress import SlackProgressMessage
+
+class TestSlackProgressMessage(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.chat_postMessage.return_value = {"ts": "123.456"}
+
+    def test_updates_are_throttled_and_coalesced(self):
+        progress = SlackProgressMessage(self.client, "C1", "111.222", "Progress", min_interval=0.2)
+        progress.start()
+        for i in range(5):
+            progress.section_done(f"Section {i}")
+        # Still inside the interval after posting: nothing edited yet
+        self.assertEqual(self.client.chat_update.call_count, 0)
+
+        time.sleep(0.3)
+        # The five sections arrive in a single edit
+        self.assertEqual(self.client.chat_update.call_count, 1)
+        text = self.client.chat_update.call_args.kwargs["text"]
+        self.assertIn("✔️ Section 0", text)
+        self.assertIn("✔️ Section 4", text)
+        self.assertEqual(self.client.chat_update.call_args.kwargs["ts"], "123.456")
+
+    def test_finish_flushes_immediately(self):
+        progress = SlackProgressMessage(self.client, "C1", "111.222", "Progress", min_interval=60)
+        progress.start()
+        progress.preview("partial text")
+        progress.finish("Done")
+        self.assertEqual(self.client.chat_update.call_count, 1)
+        text = self.client.chat_update.call_args.kwargs["text"]
+        self.assertTrue(text.startswith("Done"))
+        self.assertNotIn("partial text", text)
+
+    def test_in_flight_edit_never_overwrites_final_message(self):
+        sending = threading.Event()
+        release = threading.Event()
+        delivered = []
+        def chat_update(**kwargs):
+            if not sending.is_set():
+                sending.set()
+                release.wait(5)
+            delivered.append(kwargs["text"])
+        self.client.chat_update.side_effect = chat_update
+        progress = SlackProgressMessage(self.client, "C1", "111.222", "Progress", min_interval=0)
+        progress._last_update = -1.0
+        progress.ts = "123.456"
+
+        # A section edit is on its way to Slack when the run finishes
+        updater = threading.Thread(target=progress.section_done, args=("Section",))
+        updater.start()
+        self.assertTrue(sending.wait(5))
+        finisher = threading.Thread(target=progress.finish, args=("Done",))
+        finisher.start()
+        time.sleep(0.05)
+        release.set()
+        updater.join(5)
+        finisher.join(5)
+
+        # The final state is the last edit Slack receives
+        self.assertEqual(len(delivered), 2)
+        self.assertTrue(delivered[-1].startswith("Done"))
+        # Edits after finish() are dropped
+        progress.section_done("Late")
+        self.assertEqual(self.client.chat_update.call_count, 2)
+
+    def test_slack_errors_do_not_propagate(self):
+        self.client.chat_postMessage.side_effect = Exception("not_in_channel")
+        progress = SlackProgressMessage(self.client, "C1", "111.222", "Progress", min_interval=0)
+        progress.start()
+        progress.section_done("Section")
+        progress.finish()
+        self.client.chat_update.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import threading
+import time
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.stage_graph import StageGraph, StageAborted
+
+class TestStageGraph(unittest.TestCase):
+
+    def test_dependencies_results_and_messages(self):
+        messages = []
+        graph = StageGraph(on_message=messages.append)
+        graph.add_stage("a", lambda: 1, start_message="start a", done_message="done a")
+        graph.add_stage("b", lambda: 2)
+        graph.add_stage("c", lambda a, b: a + b, depends_on=["a", "b"])
+        
+        results = graph.run()
+        
+        self.assertEqual(results["c"], 3)
+        self.assertEqual(messages, ["start a", "done a"])
+
+    def test_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=2)
+        graph = StageGraph()
+        # Both stages must be in flight at the same time to pass the barrier
+        graph.add_stage("stocks", lambda: barrier.wait())
+        graph.add_stage("news", lambda: barrier.wait())
+        
+        start = time.time()
+        graph.run()
+        self.assertLess(time.time() - start, 2)
+
+    def test_abort_skips_dependents(self):
+        called = []
+        def abort():
+            raise StageAborted("nothing to do")
+        graph = StageGraph()
+        graph.add_stage("news", abort)
+        graph.add_stage("report", lambda news: called.append(news), depends_on=["news"])
+        
+        with self.assertRaises(StageAborted):
+            graph.run()
+        self.assertEqual(called, [])
+
+    def test_cycle_is_rejected(self):
+        graph = StageGraph()
+        graph.add_stage("a", lambda b: b, depends_on=["b"])
+        graph.add_stage("b", lambda a: a, depends_on=["a"])
+        
+        with self.assertRaises(ValueError):
+            graph.run()
+
+if __name__ == '__main__':
+    unittest.main()
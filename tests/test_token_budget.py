@@ -0,0 +1,49 @@
+import unittest
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.token_budget import estimate_tokens, truncate_to_tokens, select_snippets, format_snippets
+
+class TestTokenBudget(unittest.TestCase):
+
+    def test_estimates_differ_by_script(self):
+        english = "Stocks rallied after the Fed held rates steady."
+        japanese = "米連邦準備制度理事会は政策金利を据え置いた。"
+        self.assertLess(estimate_tokens(english, 'openai'), len(english) / 2)
+        self.assertGreaterEqual(estimate_tokens(japanese, 'openai'), len(japanese))
+        self.assertGreater(estimate_tokens(english, 'anthropic'), estimate_tokens(english, 'openai'))
+        self.assertEqual(estimate_tokens("", 'openai'), 0)
+
+    def test_truncate_respects_budget(self):
+        text = "The quick brown fox jumps over the lazy dog. " * 50
+        cut = truncate_to_tokens(text, 40, 'openai')
+        self.assertLessEqual(estimate_tokens(cut, 'openai'), 40)
+        self.assertTrue(cut.endswith("…"))
+        self.assertEqual(truncate_to_tokens("short", 40, 'openai'), "short")
+
+    def test_drops_duplicates_and_ranks_by_headline(self):
+        headline = "Nvidia shares jump on record data center revenue"
+        results = [
+            {"title": "Oil prices slip", "body": "Crude futures fell on demand worries.", "href": "https://a.com/oil"},
+            {"title": "Nvidia revenue hits record", "body": "Nvidia reported record data center revenue, shares jump.", "href": "https://b.com/nvda"},
+            {"title": "Nvidia revenue hits record", "body": "Nvidia reported record data center revenue, shares jump.", "href": "https://c.com/nvda-syndicated"},
+            {"title": "Nvidia revenue hits record", "body": "Different text", "href": "https://b.com/nvda/"},
+        ]
+        selected = select_snippets(results, headline, max_tokens=500, provider='openai')
+        self.assertEqual([r["href"] for r in selected], ["https://b.com/nvda", "https://a.com/oil"])
+
+    def test_selection_fits_budget(self):
+        results = [
+            {"title": f"Story {i}", "body": " ".join(f"word{i}x{j}" for j in range(60)), "href": f"https://x.com/{i}"}
+            for i in range(5)
+        ]
+        selected = select_snippets(results, "Story", max_tokens=150, provider='openai')
+        self.assertGreater(len(selected), 0)
+        self.assertLess(len(selected), 5)
+        self.assertLessEqual(estimate_tokens(format_snippets(selected), 'openai'), 150 + len(selected))
+
+if __name__ == '__main__':
+    unittest.main()